@@ -0,0 +1,58 @@
+"""Build a versioned, read-only index snapshot of the knowledge base.
+
+Run this once per knowledge base change (e.g. in CI or a deploy job) and
+point every server at the output with INDEX_SNAPSHOT_DIR. Servers then open
+the snapshot memory-mapped and never embed or index on startup.
+"""
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+from src.rag.snapshot import SNAPSHOT_BACKENDS, load_snapshot_info, prune_versions
+from src.rag.vector_store import VectorStore
+
+
+if __name__ == '__main__':
+    default_backend = config.Config.INDEX_BACKEND.lower()
+    if default_backend not in SNAPSHOT_BACKENDS:
+        default_backend = "flat"
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--output",
+        default=config.Config.INDEX_SNAPSHOT_DIR or "./data/index_snapshots",
+        help="Directory holding the snapshot versions"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=SNAPSHOT_BACKENDS,
+        default=default_backend,
+        help="Index format of the snapshot"
+    )
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=config.Config.INDEX_SNAPSHOT_KEEP,
+        help="Number of snapshot versions to keep"
+    )
+    args = parser.parse_args()
+
+    store = VectorStore(load_index=False)
+    version = store.build_snapshot(args.output, backend=args.backend)
+    info = load_snapshot_info(os.path.join(args.output, version))
+    removed = prune_versions(args.output, max(args.keep, 1))
+
+    print("=" * 60)
+    print(f"Snapshot:  {version}")
+    print(f"Location:  {os.path.join(args.output, version)}")
+    print(f"Backend:   {info['backend']}")
+    print(f"Model:     {info['embedding_model']}")
+    print(f"Chunks:    {info['chunk_count']}")
+    if removed:
+        print(f"Pruned:    {', '.join(removed)}")
+    print("=" * 60)
+    print(f"\nServe it with INDEX_SNAPSHOT_DIR={args.output}")
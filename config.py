@@ -12,9 +12,34 @@ class Config:
     LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4-turbo-preview")
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
     
+    # Embedding Backend Configuration ("openai" or "local" sentence-transformers)
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+    LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+    EMBEDDING_NUM_THREADS = int(os.getenv("EMBEDDING_NUM_THREADS", 0))  # 0 = library default
+    EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "cpu")
+    
     # Vector Store Configuration
+    INDEX_BACKEND = os.getenv("INDEX_BACKEND", "chroma")  # "chroma", "flat" (exact NumPy) or "ivf" (approximate NumPy)
     CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "./data/vectorstore")
     COLLECTION_NAME = "ecommerce_knowledge_base"
+    FLAT_INDEX_DIR = os.getenv("FLAT_INDEX_DIR", "./data/flat_index")
+    
+    # IVF (approximate) Index Configuration, see evaluation/ann_benchmark.py for tuning
+    IVF_NLIST = int(os.getenv("IVF_NLIST", 0))  # 0 = 4 * sqrt(number of chunks)
+    IVF_NPROBE = int(os.getenv("IVF_NPROBE", 8))
+    IVF_TRAIN_ITERATIONS = int(os.getenv("IVF_TRAIN_ITERATIONS", 20))
+    IVF_TRAIN_SAMPLE_SIZE = int(os.getenv("IVF_TRAIN_SAMPLE_SIZE", 50000))
+    IVF_MIN_TRAIN_SIZE = int(os.getenv("IVF_MIN_TRAIN_SIZE", 1000))  # exact search below this size
+    
+    # Quantized scan vectors for the NumPy backends, see evaluation/quantization_benchmark.py.
+    # float16 halves memory but scans several times slower; int8 saves 75% at close to float32 speed
+    INDEX_PRECISION = os.getenv("INDEX_PRECISION", "float32")  # "float32", "float16" or "int8"
+    INDEX_RERANK_FACTOR = int(os.getenv("INDEX_RERANK_FACTOR", 4))  # Candidates per result re-scored at float32
+    
+    # Embedding Cache Configuration (set EMBEDDING_CACHE_PATH empty to disable)
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./data/cache/embeddings.sqlite3")
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 100000))
     
     # Application Configuration
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"  # Default to False for production
@@ -24,11 +49,63 @@ class Config:
     # RAG Configuration
     TOP_K_RESULTS = 3
     SIMILARITY_THRESHOLD = 0.7
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1200))  # Max tokens of retrieved context per prompt
+    
+    # Hybrid (BM25 + vector) Retrieval Configuration
+    HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "True").lower() == "true"
+    HYBRID_CANDIDATES = 20  # Hits taken from each ranking before fusion
+    RRF_K = 60  # Reciprocal rank fusion damping constant
+    BM25_MIN_COVERAGE = 0.5  # Keyword-only hits below this are dropped
+    BM25_FAST_PATH_MIN_COVERAGE = 0.8  # Skip embedding when the top keyword hit is this strong...
+    BM25_FAST_PATH_MARGIN = 1.5  # ...and scores this many times higher than the runner-up
+    
+    # Retrieval Cache Configuration (set a size to 0 to disable that cache)
+    RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", 1024))  # Exact normalized-query LRU
+    SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", 512))
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95))  # Min cosine similarity
+    RETRIEVAL_CACHE_TTL = int(os.getenv("RETRIEVAL_CACHE_TTL", 3600))  # Seconds
     
     # Knowledge Base Paths
     KNOWLEDGE_BASE_DIR = "./data/knowledge_base"
+    CATALOG_FILES = os.getenv("CATALOG_FILES", "products.md")  # Comma-separated markdown/CSV files for search_products, relative to KNOWLEDGE_BASE_DIR
+    
+    # Prebuilt index snapshots (see build_index.py); when set, servers open the
+    # snapshot read-only instead of building the index at startup
+    INDEX_SNAPSHOT_DIR = os.getenv("INDEX_SNAPSHOT_DIR", "")
+    INDEX_SNAPSHOT_KEEP = int(os.getenv("INDEX_SNAPSHOT_KEEP", 3))  # Versions kept by build_index.py
+    
+    # Knowledge Base Hot Reload
+    KB_WATCH_INTERVAL = float(os.getenv("KB_WATCH_INTERVAL", 0))  # Seconds between polls, 0 disables
+    INDEX_GENERATION_GRACE_SECONDS = int(os.getenv("INDEX_GENERATION_GRACE_SECONDS", 600))  # Superseded generations older than this are deleted (the previous one is always kept)
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # Required by /api/admin/reload, endpoint disabled if unset
+    
+    # Chunking Configuration (markdown sections, no overlap)
+    CHUNK_MAX_SIZE = 1000  # Longer sections are split on paragraph/line boundaries
+    CHUNK_MIN_SIZE = 300  # Smaller sibling sections are merged up to this size
+    
+    # Answer Cache (complete answers to first-turn knowledge base questions;
+    # set ANSWER_CACHE_PATH to also keep them on disk)
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "True").lower() == "true"
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 1024))
+    ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 86400))  # Seconds
+    ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", "")
+    ANSWER_CACHE_MAX_DISK_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_DISK_ENTRIES", 10000))
+    
+    # Conversation Sessions
+    SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")  # "memory" (one process) or "sqlite" (shared by worker processes)
+    SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "./data/sessions/sessions.sqlite3")
+    MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", 10000))  # Least recently used sessions are evicted beyond this
+    MAX_SESSION_MESSAGES = int(os.getenv("MAX_SESSION_MESSAGES", 50))  # Oldest messages are dropped beyond this
+    SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", 3600))  # Idle sessions expire after this
+    HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 2000))  # Max tokens of conversation history per prompt
+    HISTORY_SUMMARY_ENABLED = os.getenv("HISTORY_SUMMARY_ENABLED", "True").lower() == "true"  # Fold older turns into a summary instead of dropping them
+    HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", 300))  # Max tokens of the rolling summary
     
     # Tool Configuration
+    INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "True").lower() == "true"  # Answer simple order/return lookups without the LLM
+    PREFETCH_TOOLS = os.getenv("PREFETCH_TOOLS", "True").lower() == "true"  # Look up mentioned orders/returns before the first LLM call
     MAX_RETRIES = 3
-    TIMEOUT_SECONDS = 30
+    TIMEOUT_SECONDS = float(os.getenv("TIMEOUT_SECONDS", 30))  # Per tool call
+    TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", 8))  # Tool calls of all conversations running at once
+    RETRIEVAL_MAX_WORKERS = int(os.getenv("RETRIEVAL_MAX_WORKERS", 4))  # Prefetched RAG lookups running at once (own pool, so they never queue tool calls)
 
@@ -0,0 +1,118 @@
+"""Recall@k vs. latency benchmark for the IVF (approximate) index."""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.rag.flat_index import FlatIndex, normalize_rows
+from src.rag.ivf_index import IVFIndex
+
+
+def synthetic_corpus(size: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Generate clustered unit vectors that loosely resemble text embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.standard_normal((clusters, dim)).astype(np.float32))
+    labels = rng.integers(0, clusters, size)
+    noise = rng.standard_normal((size, dim)).astype(np.float32) * 0.05
+    return normalize_rows(centers[labels] + noise)
+
+
+def synthetic_queries(corpus: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    """Perturb random corpus vectors to get queries that have true neighbors."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(corpus), count, replace=False)
+    noise = rng.standard_normal((count, corpus.shape[1])).astype(np.float32) * 0.03
+    return normalize_rows(corpus[rows] + noise)
+
+
+def _fill(index: FlatIndex, vectors: np.ndarray):
+    ids = [str(i) for i in range(len(vectors))]
+    index.upsert(ids, [""] * len(ids), [{}] * len(ids), vectors)
+
+
+def _timed_queries(index, queries: np.ndarray, k: int, **kwargs):
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = index.query(query, k, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({hit['id'] for hit in hits})
+    return results, np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+
+def benchmark_size(size: int, dim: int, k: int, nprobes: List[int], query_count: int) -> List[Dict]:
+    """Measure exact search and IVF at several nprobe values for one corpus size."""
+    corpus = synthetic_corpus(size, dim, clusters=max(8, size // 500))
+    queries = synthetic_queries(corpus, query_count)
+    rows = []
+
+    with tempfile.TemporaryDirectory() as flat_dir, tempfile.TemporaryDirectory() as ivf_dir:
+        flat = FlatIndex(flat_dir)
+        _fill(flat, corpus)
+        truth, p50, p95 = _timed_queries(flat, queries, k)
+        rows.append({"size": size, "index": "flat", "nlist": "-", "nprobe": "-",
+                     "recall": 1.0, "p50_ms": p50, "p95_ms": p95, "build_s": 0.0})
+
+        start = time.perf_counter()
+        ivf = IVFIndex(ivf_dir, min_train_size=0)
+        _fill(ivf, corpus)
+        build_seconds = time.perf_counter() - start
+
+        for nprobe in nprobes:
+            found, p50, p95 = _timed_queries(ivf, queries, k, nprobe=nprobe)
+            recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+            rows.append({"size": size, "index": "ivf", "nlist": len(ivf.centroids),
+                         "nprobe": nprobe, "recall": recall, "p50_ms": p50,
+                         "p95_ms": p95, "build_s": build_seconds})
+    return rows
+
+
+def generate_report(rows: List[Dict], k: int, dim: int, output_file: str):
+    """Write the benchmark results as a markdown table."""
+    report = f"""
+# ANN Index Benchmark
+
+Recall@{k} of the IVF index against exact (flat) search, with per-query
+latency, on synthetic clustered {dim}-dimensional unit vectors.
+Use it to choose `IVF_NPROBE` (and `IVF_NLIST`) as the chunk count grows.
+
+| Chunks | Index | nlist | nprobe | Recall@{k} | p50 (ms) | p95 (ms) | Build (s) |
+|-------:|:------|------:|-------:|----------:|---------:|---------:|----------:|
+"""
+    for row in rows:
+        report += (
+            f"| {row['size']} | {row['index']} | {row['nlist']} | {row['nprobe']} | "
+            f"{row['recall']:.3f} | {row['p50_ms']:.3f} | {row['p95_ms']:.3f} | "
+            f"{row['build_s']:.1f} |\n"
+        )
+
+    with open(output_file, 'w') as f:
+        f.write(report)
+    print(f"Report saved to {output_file}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--output", default="./evaluation/ann_report.md")
+    args = parser.parse_args()
+
+    all_rows = []
+    for corpus_size in args.sizes:
+        print(f"Benchmarking {corpus_size} chunks...")
+        all_rows.extend(benchmark_size(corpus_size, args.dim, args.k, args.nprobe, args.queries))
+
+    generate_report(all_rows, args.k, args.dim, args.output)
@@ -0,0 +1,193 @@
+"""Cache of complete assistant answers to knowledge-base questions."""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.rag.manifest import content_hash
+from src.rag.retrieval_cache import TTLCache, normalize_query
+
+
+class AnswerCache:
+    """
+    LRU/TTL cache of answers keyed by normalized question and knowledge base version.
+
+    Only answers that depend on nothing but the knowledge base belong here
+    (no customer-specific lookups, no earlier turns); the caller decides that. Keys include the
+    knowledge base content version, so a reindex that changes the content
+    makes every older answer unreachable; the first lookup under a new
+    version also drops the previous version's entries.
+
+    With a ``path``, answers are also kept in a SQLite database, so they
+    survive restarts and are shared by worker processes on the host. Each
+    process opens its own connection on first use, so workers forked after
+    the cache was created never share one.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 86400,
+        path: Optional[str] = None,
+        max_disk_entries: int = 10000
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            max_size: Answers kept in memory before the least recently used is evicted
+            ttl_seconds: Answers older than this are regenerated
+            path: Optional SQLite database file for the disk tier
+            max_disk_entries: Answers kept on disk before the least recently used are evicted
+        """
+        self.memory = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.disk_hits = 0
+        self._kb_version: Optional[str] = None
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._lock:
+                self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Return this process's connection (caller holds the lock).
+
+        A connection inherited through fork is never reused: worker
+        processes forked after the cache was created open their own.
+        """
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS answers (
+                    key TEXT PRIMARY KEY,
+                    kb_version TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_last_used ON answers (last_used)")
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def make_key(question: str, kb_version: str, model: str, prompt: str) -> str:
+        """Cache key for a question under a knowledge base version, model and system prompt."""
+        return content_hash("\x00".join([kb_version, model, content_hash(prompt), normalize_query(question)]))
+
+    def _check_version(self, kb_version: str):
+        """
+        Drop the previous version's answers when the knowledge base version changes.
+
+        Only the version this process served before is deleted from disk;
+        answers of versions other workers may still serve are left to expire.
+        """
+        if kb_version == self._kb_version:
+            return
+        with self._lock:
+            if kb_version == self._kb_version:
+                return
+            if self._kb_version is not None:
+                self.memory.clear()
+                if self.path:
+                    conn = self._connection()
+                    conn.execute("DELETE FROM answers WHERE kb_version = ?", (self._kb_version,))
+                    conn.commit()
+            self._kb_version = kb_version
+
+    def get(self, key: str, kb_version: str) -> Optional[Dict]:
+        """
+        Look up an answer.
+
+        Args:
+            key: Key from ``make_key``
+            kb_version: Knowledge base version the key was made with
+
+        Returns:
+            The cached answer, or None
+        """
+        self._check_version(kb_version)
+        answer = self.memory.get(key)
+        if answer is not None or not self.path:
+            return answer
+
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT answer FROM answers WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.disk_hits += 1
+        answer = json.loads(row[0])
+        self.memory.put(key, answer)
+        return answer
+
+    def put(self, key: str, kb_version: str, answer: Dict):
+        """Store an answer in memory and, if configured, on disk."""
+        self._check_version(kb_version)
+        self.memory.put(key, answer)
+        if not self.path:
+            return
+
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO answers (key, kb_version, answer, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, kb_version, json.dumps(answer), now, now)
+            )
+            count = conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            if count > self.max_disk_entries:
+                conn.execute(
+                    "DELETE FROM answers WHERE key IN ("
+                    "SELECT key FROM answers ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_disk_entries,)
+                )
+            conn.commit()
+
+    def clear(self):
+        """Drop every answer."""
+        with self._lock:
+            self.memory.clear()
+            if self.path:
+                conn = self._connection()
+                conn.execute("DELETE FROM answers")
+                conn.commit()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters of the memory tier plus disk hits."""
+        return {**self.memory.stats(), "disk_hits": self.disk_hits}
+
+    def close(self):
+        """Close this process's connection to the disk database, if any (it is reopened on next use)."""
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
@@ -0,0 +1,148 @@
+"""Per-conversation message histories with bounded memory."""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+
+
+class _Session:
+    """One conversation: its messages, its lock and when it was last used."""
+
+    __slots__ = ("messages", "lock", "last_access")
+
+    def __init__(self, max_messages: int):
+        self.messages = deque(maxlen=max_messages)
+        self.lock = threading.RLock()
+        self.last_access = time.monotonic()
+
+
+class ConversationStore:
+    """
+    In-memory conversation histories keyed by conversation ID.
+
+    Sessions live in an LRU-ordered dictionary, so lookups, appends and
+    evictions are O(1). Each session keeps at most ``max_messages``
+    messages (older ones are dropped first), at most ``max_sessions``
+    sessions are kept (the least recently used goes first), and sessions
+    idle for longer than ``ttl_seconds`` are discarded.
+
+    ``lock`` serializes the turns of one conversation; different
+    conversations never wait on each other.
+    """
+
+    def __init__(self, max_sessions: int = 10000, max_messages: int = 50, ttl_seconds: float = 3600):
+        """
+        Initialize store.
+
+        Args:
+            max_sessions: Maximum number of conversations kept in memory
+            max_messages: Maximum messages kept per conversation
+            ttl_seconds: Conversations idle longer than this are discarded
+        """
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        """Drop idle sessions from the least recently used end (caller holds the lock)."""
+        while self._sessions:
+            conversation_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access <= self.ttl_seconds:
+                break
+            del self._sessions[conversation_id]
+            self.evictions += 1
+
+    def _session(self, conversation_id: str, create: bool = True):
+        """Look up (or create) a session and mark it as most recently used."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(conversation_id)
+            if session is None:
+                if not create:
+                    return None
+                session = _Session(self.max_messages)
+                self._sessions[conversation_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._sessions.move_to_end(conversation_id)
+            session.last_access = now
+            return session
+
+    @contextmanager
+    def lock(self, conversation_id: str) -> Iterator[None]:
+        """Hold a conversation's lock, e.g. for the duration of one chat turn."""
+        session = self._session(conversation_id)
+        with session.lock:
+            yield
+
+    def get_history(self, conversation_id: str) -> List[Dict]:
+        """Return a copy of a conversation's messages, oldest first."""
+        session = self._session(conversation_id, create=False)
+        if session is None:
+            return []
+        with session.lock:
+            return list(session.messages)
+
+    def append(self, conversation_id: str, *messages: Dict):
+        """Add messages to a conversation, dropping its oldest ones beyond the cap."""
+        session = self._session(conversation_id)
+        with session.lock:
+            session.messages.extend(messages)
+
+    def reset(self, conversation_id: str):
+        """Forget one conversation."""
+        with self._lock:
+            self._sessions.pop(conversation_id, None)
+
+    def clear(self):
+        """Forget every conversation."""
+        with self._lock:
+            self._sessions.clear()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict:
+        """Number of live sessions and how many were evicted."""
+        return {"sessions": len(self._sessions), "evictions": self.evictions}
+
+
+def create_conversation_store():
+    """
+    Create the session backend selected by ``Config.SESSION_BACKEND``.
+
+    "memory" keeps conversations in this process; "sqlite" keeps them in
+    ``Config.SESSION_DB_PATH`` so several worker processes share them.
+    """
+    backend = config.Config.SESSION_BACKEND.lower()
+    if backend == "memory":
+        return ConversationStore(
+            max_sessions=config.Config.MAX_SESSIONS,
+            max_messages=config.Config.MAX_SESSION_MESSAGES,
+            ttl_seconds=config.Config.SESSION_TTL_SECONDS
+        )
+    if backend == "sqlite":
+        from src.assistant.sqlite_conversation_store import SQLiteConversationStore
+        return SQLiteConversationStore(
+            config.Config.SESSION_DB_PATH,
+            max_sessions=config.Config.MAX_SESSIONS,
+            max_messages=config.Config.MAX_SESSION_MESSAGES,
+            ttl_seconds=config.Config.SESSION_TTL_SECONDS
+        )
+    raise ValueError(f"Unknown SESSION_BACKEND: {config.Config.SESSION_BACKEND}")
@@ -1,20 +1,68 @@
 """Main customer support assistant with LLM, RAG, and tool calling."""
+import asyncio
 import json
 import sys
 import os
-from typing import List, Dict, Optional
-from openai import OpenAI
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from openai import AsyncOpenAI, OpenAI
 
 # Add project root to path
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from src.assistant.answer_cache import AnswerCache
+from src.assistant.conversation_store import create_conversation_store
+from src.assistant.history_manager import HistoryManager
+from src.assistant.intent_router import IntentRouter
+from src.assistant.prompt_cache import canonical_tools, new_turn_usage, PromptCacheStats
 from src.rag.vector_store import VectorStore
-from src.tools.mock_apis import execute_tool, TOOL_DEFINITIONS
+from src.tools.mock_apis import aexecute_tools, execute_tools, TOOL_DEFINITIONS
 import config
 
 
+# Conversation used when a caller does not pass a conversation ID
+DEFAULT_CONVERSATION_ID = "default"
+
+# Tools whose results are the same for every customer: a turn that used only
+# these (e.g. the refund policy prefetched for a returns question) can still
+# be answered from the answer cache
+STATIC_TOOLS = {"get_refund_policy"}
+
+# Answer used when the model returns no text
+NO_RESPONSE = "I apologize, but I couldn't generate a response."
+
+
+class _Turn:
+    """
+    State of one chat turn, shared by the blocking and async entry points.
+    
+    ``_start_turn`` fills it in before the first completion and
+    ``_complete_turn`` turns it into the result; the entry points differ
+    only in how they call the model and the tools in between.
+    """
+    
+    __slots__ = (
+        "conversation_id", "result", "cache_key", "messages", "rag_context",
+        "context_tokens", "prefetched", "tool_calls_made", "usage"
+    )
+    
+    def __init__(self, conversation_id: str):
+        self.conversation_id = conversation_id
+        # Set when the turn was answered without the LLM (fast path or answer cache)
+        self.result: Optional[Dict] = None
+        self.cache_key: Optional[Tuple[str, str]] = None
+        self.messages: List[Dict] = []
+        self.rag_context = ""
+        self.context_tokens = 0
+        self.prefetched: List[Dict] = []
+        self.tool_calls_made: List[Dict] = []
+        self.usage = new_turn_usage()
+
+
 class CustomerSupportAssistant:
     """AI-powered customer support assistant with RAG and tool calling."""
     
@@ -24,9 +72,38 @@ class CustomerSupportAssistant:
             raise ValueError("OPENAI_API_KEY not set in environment variables")
         
         self.client = OpenAI(api_key=config.Config.OPENAI_API_KEY)
+        self.async_client = AsyncOpenAI(api_key=config.Config.OPENAI_API_KEY)
         self.model = config.Config.LLM_MODEL
         self.vector_store = VectorStore()
-        self.conversation_history: List[Dict] = []
+        self.conversations = create_conversation_store()
+        self.tool_executor = ThreadPoolExecutor(
+            max_workers=config.Config.TOOL_MAX_WORKERS,
+            thread_name_prefix="tool"
+        )
+        self.retrieval_executor = ThreadPoolExecutor(
+            max_workers=config.Config.RETRIEVAL_MAX_WORKERS,
+            thread_name_prefix="retrieval"
+        )
+        self._async_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.router = IntentRouter()
+        self.tools = canonical_tools(TOOL_DEFINITIONS)
+        self.prompt_cache = PromptCacheStats()
+        self.history = HistoryManager(
+            self._summarize_history if config.Config.HISTORY_SUMMARY_ENABLED else None,
+            token_budget=config.Config.HISTORY_TOKEN_BUDGET,
+            summary_tokens=config.Config.HISTORY_SUMMARY_TOKENS,
+            model=self.model,
+            max_sessions=config.Config.MAX_SESSIONS,
+            ttl_seconds=config.Config.SESSION_TTL_SECONDS
+        )
+        self.answer_cache = None
+        if config.Config.ANSWER_CACHE_ENABLED:
+            self.answer_cache = AnswerCache(
+                max_size=config.Config.ANSWER_CACHE_SIZE,
+                ttl_seconds=config.Config.ANSWER_CACHE_TTL,
+                path=config.Config.ANSWER_CACHE_PATH or None,
+                max_disk_entries=config.Config.ANSWER_CACHE_MAX_DISK_ENTRIES
+            )
         
         # System prompt for the assistant
         self.system_prompt = """You are a helpful and professional customer support assistant for an e-commerce platform. 
@@ -43,13 +120,71 @@ Guidelines:
 
 You have access to:
 - A knowledge base with FAQs, policies, and product information (via RAG)
-- Tools to check order status, create returns, check refund policies, and check refund status
+- Tools to check order status, create returns, check refund policies, check refund status, and look up products by category, price, warranty, and return window
 
 Use these tools when appropriate to provide accurate, actionable information."""
     
-    def _get_rag_context(self, query: str) -> str:
-        """Get relevant context from RAG system."""
-        return self.vector_store.get_relevant_context(query)
+    def _get_rag_context(self, query: str) -> Dict:
+        """Get relevant context from RAG system, packed within the token budget."""
+        return self.vector_store.build_context(query, filters=self._detect_rag_filters(query))
+    
+    def _prefetch(self, user_message: str) -> Tuple[Optional[Dict], List[Dict]]:
+        """
+        Fetch RAG context and the tool results the message obviously needs, concurrently.
+        
+        Runs before the first LLM call so the results can go into its
+        prompt; when they cover the question the model answers without
+        asking for tools, saving the second completion.
+        
+        Returns:
+            Tuple of (RAG context as from ``_get_rag_context`` or None,
+            prefetched calls with tool name, arguments and result)
+        """
+        calls = self.router.likely_tool_calls(user_message) if config.Config.PREFETCH_TOOLS else []
+        rag_future = None
+        if self._should_use_rag(user_message):
+            rag_future = self.retrieval_executor.submit(self._get_rag_context, user_message)
+        results = execute_tools(calls, self.tool_executor, config.Config.TIMEOUT_SECONDS) if calls else []
+        packed_context = rag_future.result() if rag_future else None
+        return packed_context, self._prefetched_calls(calls, results)
+    
+    @staticmethod
+    def _prefetched_calls(calls: List[Tuple[str, Dict]], results: List[Dict]) -> List[Dict]:
+        # Failed lookups (e.g. an unknown order) are kept: the model should see them too
+        return [
+            {"tool": tool_name, "arguments": arguments, "result": result}
+            for (tool_name, arguments), result in zip(calls, results)
+        ]
+    
+    def _detect_rag_filters(self, query: str) -> Optional[Dict]:
+        """
+        Restrict retrieval to the knowledge base files that match the query's intent.
+        
+        Only unambiguous queries are filtered: when a query matches several
+        intents, or none, every file is searched.
+        """
+        # Intent -> (keywords, knowledge base files that answer it)
+        intent_sources = {
+            "product": (
+                ["product", "laptop", "smartphone", "phone", "headphone", "clothing",
+                 "apparel", "furniture", "kitchen", "appliance", "accessor",
+                 "pre-order", "personalized", "limited edition", "warranty"],
+                ["products.md", "faqs.md"]
+            ),
+            "policy": (
+                ["policy", "policies", "privacy", "terms", "refund", "return",
+                 "shipping", "payment", "financing", "escalat"],
+                ["policies.md", "faqs.md"]
+            )
+        }
+        query_lower = query.lower()
+        matched = [
+            sources for keywords, sources in intent_sources.values()
+            if any(keyword in query_lower for keyword in keywords)
+        ]
+        if len(matched) != 1:
+            return None
+        return {"source": matched[0]}
     
     def _should_use_rag(self, query: str) -> bool:
         """Determine if RAG should be used for this query."""
@@ -62,6 +197,38 @@ Use these tools when appropriate to provide accurate, actionable information."""
         query_lower = query.lower()
         return any(keyword in query_lower for keyword in rag_keywords)
     
+    def _summarize_history(self, summary: str, messages: List[Dict]) -> str:
+        """
+        Fold older conversation messages into the rolling summary (runs in the background).
+        
+        Args:
+            summary: Summary of the conversation before these messages ("" if none)
+            messages: Messages to add to the summary, oldest first
+        
+        Returns:
+            The updated summary
+        """
+        speakers = {"user": "Customer", "assistant": "Assistant", "tool": "Tool result"}
+        transcript = "\n".join(
+            f"{speakers.get(message['role'], message['role'])}: {message.get('content') or ''}"
+            for message in messages
+        )
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": (
+                    "You maintain a running summary of a customer support conversation. "
+                    "Update the summary with the new messages. Keep order IDs, return IDs, "
+                    "products, amounts, what the customer asked for and what was done or promised. "
+                    "Be brief and factual; write plain sentences."
+                )},
+                {"role": "user", "content": f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"}
+            ],
+            temperature=0,
+            max_tokens=config.Config.HISTORY_SUMMARY_TOKENS
+        )
+        return response.choices[0].message.content or summary
+    
     def _format_tool_result(self, tool_name: str, result: Dict) -> str:
         """Format tool result for LLM context."""
         if result.get("success"):
@@ -78,149 +245,604 @@ Use these tools when appropriate to provide accurate, actionable information."""
         """
         Process a user message and return assistant response.
         
+        Turns of the same conversation are processed one at a time;
+        different conversations run concurrently.
+        
+        Args:
+            user_message: User's message
+            conversation_id: Conversation the message belongs to (a shared
+                default conversation if omitted)
+        
+        Returns:
+            Dictionary with assistant response and metadata
+        """
+        conversation_id = conversation_id or DEFAULT_CONVERSATION_ID
+        with self.conversations.lock(conversation_id):
+            try:
+                turn = self._start_turn(user_message, conversation_id)
+                if turn.result:
+                    return turn.result
+                
+                # Call LLM with function calling
+                response = self.client.chat.completions.create(**self._completion_args(turn.messages, "auto"))
+                self.prompt_cache.record(turn.usage, response.usage)
+                assistant_message = response.choices[0].message
+                
+                # Handle tool calls if any
+                if assistant_message.tool_calls:
+                    tool_calls = self._tool_calls_from_message(assistant_message)
+                    calls = self._add_tool_calls(turn, assistant_message.content or "", tool_calls)
+                    results = execute_tools(calls, self.tool_executor, config.Config.TIMEOUT_SECONDS)
+                    self._record_tool_results(turn, tool_calls, calls, results)
+                    
+                    # Get final response from LLM with tool results
+                    response = self.client.chat.completions.create(**self._completion_args(turn.messages, "none"))
+                    self.prompt_cache.record(turn.usage, response.usage)
+                    assistant_message = response.choices[0].message
+                
+                return self._complete_turn(turn, assistant_message.content or NO_RESPONSE)
+                
+            except Exception as e:
+                return self._error_result(e, conversation_id)
+    
+    def chat_stream(self, user_message: str, conversation_id: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Process a user message, yielding the response as it is generated.
+        
+        Both completions (before and after tool calls) are streamed, so the
+        first words reach the caller as soon as the model produces them.
+        The conversation stays locked until the generator is exhausted or
+        closed.
+        
         Args:
             user_message: User's message
-            conversation_id: Optional conversation ID for tracking
+            conversation_id: Conversation the message belongs to (a shared
+                default conversation if omitted)
+        
+        Yields:
+            Event dictionaries, each with a "type":
+            - "tool_call": a tool is about to run (tool, arguments)
+            - "tool_result": a tool finished (tool, result)
+            - "delta": the next piece of response text (content)
+            - "done": the turn finished; carries the same fields as ``chat``
+            - "error": the turn failed; carries the same fields as ``chat``
+        """
+        conversation_id = conversation_id or DEFAULT_CONVERSATION_ID
+        with self.conversations.lock(conversation_id):
+            try:
+                turn = self._start_turn(user_message, conversation_id)
+                if turn.result:
+                    yield from self._answered_events(turn.result)
+                    return
+                yield from self._tool_events(turn.prefetched)
+                
+                content_parts = []
+                tool_calls = []
+                stream = self.client.chat.completions.create(**self._completion_args(turn.messages, "auto", stream=True))
+                for chunk in stream:
+                    self.prompt_cache.record(turn.usage, chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if delta.content:
+                        content_parts.append(delta.content)
+                        yield {"type": "delta", "content": delta.content}
+                    self._merge_tool_call_fragments(tool_calls, delta.tool_calls)
+                
+                if tool_calls:
+                    calls = self._add_tool_calls(turn, "".join(content_parts), tool_calls)
+                    for tool_name, arguments in calls:
+                        yield {"type": "tool_call", "tool": tool_name, "arguments": arguments}
+                    results = execute_tools(calls, self.tool_executor, config.Config.TIMEOUT_SECONDS)
+                    for made in self._record_tool_results(turn, tool_calls, calls, results):
+                        yield {"type": "tool_result", "tool": made["tool"], "result": made["result"]}
+                    
+                    # Stream the final response with the tool results
+                    content_parts = []
+                    stream = self.client.chat.completions.create(**self._completion_args(turn.messages, "none", stream=True))
+                    for chunk in stream:
+                        self.prompt_cache.record(turn.usage, chunk.usage)
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            content_parts.append(chunk.choices[0].delta.content)
+                            yield {"type": "delta", "content": chunk.choices[0].delta.content}
+                
+                final_response = "".join(content_parts)
+                if not final_response:
+                    final_response = NO_RESPONSE
+                    yield {"type": "delta", "content": final_response}
+                yield {"type": "done", **self._complete_turn(turn, final_response)}
+                
+            except Exception as e:
+                yield {"type": "error", **self._error_result(e, conversation_id)}
+    
+    @asynccontextmanager
+    async def _aconversation_lock(self, conversation_id: str):
+        """
+        Serialize the async turns of one conversation.
+        
+        Only an asyncio lock is held across awaits, so a second turn waits
+        without blocking the event loop. The store's lock is a threading
+        lock and stays out of coroutines: ``_in_thread`` takes it inside the
+        worker thread that runs each blocking stage of the turn, so the
+        stage's history writes are still batched. A ``chat`` turn on the
+        same conversation could still run between two such stages, so the
+        blocking and async entry points should not serve one conversation
+        at once.
+        """
+        lock = self._async_locks.get(conversation_id)
+        if lock is None:
+            lock = self._async_locks[conversation_id] = asyncio.Lock()
+        async with lock:
+            yield
+    
+    async def _in_thread(self, conversation_id: str, func, *args):
+        """
+        Run a blocking stage of an async turn on a worker thread, under the conversation's store lock.
+        
+        Session reads and writes, answer cache lookups, retrieval and
+        history compaction all block, so none of them run on the event loop.
+        """
+        def locked():
+            with self.conversations.lock(conversation_id):
+                return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, locked)
+    
+    async def achat(self, user_message: str, conversation_id: Optional[str] = None) -> Dict:
+        """
+        Async variant of ``chat``.
+        
+        The completions go through ``AsyncOpenAI`` and everything else
+        (session storage, caches, retrieval and tools) runs on worker
+        threads, so a turn waiting on the model holds no thread and one
+        event loop can serve many conversations at once.
+        
+        Args:
+            user_message: User's message
+            conversation_id: Conversation the message belongs to (a shared
+                default conversation if omitted)
         
         Returns:
             Dictionary with assistant response and metadata
         """
+        conversation_id = conversation_id or DEFAULT_CONVERSATION_ID
+        async with self._aconversation_lock(conversation_id):
+            try:
+                turn = await self._in_thread(conversation_id, self._start_turn, user_message, conversation_id)
+                if turn.result:
+                    return turn.result
+                
+                response = await self.async_client.chat.completions.create(**self._completion_args(turn.messages, "auto"))
+                self.prompt_cache.record(turn.usage, response.usage)
+                assistant_message = response.choices[0].message
+                
+                if assistant_message.tool_calls:
+                    tool_calls = self._tool_calls_from_message(assistant_message)
+                    calls = self._add_tool_calls(turn, assistant_message.content or "", tool_calls)
+                    results = await aexecute_tools(calls, self.tool_executor, config.Config.TIMEOUT_SECONDS)
+                    self._record_tool_results(turn, tool_calls, calls, results)
+                    
+                    response = await self.async_client.chat.completions.create(**self._completion_args(turn.messages, "none"))
+                    self.prompt_cache.record(turn.usage, response.usage)
+                    assistant_message = response.choices[0].message
+                
+                return await self._in_thread(
+                    conversation_id, self._complete_turn, turn, assistant_message.content or NO_RESPONSE
+                )
+                
+            except Exception as e:
+                return self._error_result(e, conversation_id)
+    
+    async def achat_stream(self, user_message: str, conversation_id: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Async variant of ``chat_stream``, yielding the same events."""
+        conversation_id = conversation_id or DEFAULT_CONVERSATION_ID
+        async with self._aconversation_lock(conversation_id):
+            try:
+                turn = await self._in_thread(conversation_id, self._start_turn, user_message, conversation_id)
+                if turn.result:
+                    for event in self._answered_events(turn.result):
+                        yield event
+                    return
+                for event in self._tool_events(turn.prefetched):
+                    yield event
+                
+                content_parts = []
+                tool_calls = []
+                stream = await self.async_client.chat.completions.create(**self._completion_args(turn.messages, "auto", stream=True))
+                async for chunk in stream:
+                    self.prompt_cache.record(turn.usage, chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if delta.content:
+                        content_parts.append(delta.content)
+                        yield {"type": "delta", "content": delta.content}
+                    self._merge_tool_call_fragments(tool_calls, delta.tool_calls)
+                
+                if tool_calls:
+                    calls = self._add_tool_calls(turn, "".join(content_parts), tool_calls)
+                    for tool_name, arguments in calls:
+                        yield {"type": "tool_call", "tool": tool_name, "arguments": arguments}
+                    results = await aexecute_tools(calls, self.tool_executor, config.Config.TIMEOUT_SECONDS)
+                    for made in self._record_tool_results(turn, tool_calls, calls, results):
+                        yield {"type": "tool_result", "tool": made["tool"], "result": made["result"]}
+                    
+                    content_parts = []
+                    stream = await self.async_client.chat.completions.create(**self._completion_args(turn.messages, "none", stream=True))
+                    async for chunk in stream:
+                        self.prompt_cache.record(turn.usage, chunk.usage)
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            content_parts.append(chunk.choices[0].delta.content)
+                            yield {"type": "delta", "content": chunk.choices[0].delta.content}
+                
+                final_response = "".join(content_parts)
+                if not final_response:
+                    final_response = NO_RESPONSE
+                    yield {"type": "delta", "content": final_response}
+                yield {"type": "done", **await self._in_thread(conversation_id, self._complete_turn, turn, final_response)}
+                
+            except Exception as e:
+                yield {"type": "error", **self._error_result(e, conversation_id)}
+    
+    def _start_turn(self, user_message: str, conversation_id: str) -> _Turn:
+        """
+        Run a turn up to its first completion (the caller holds the conversation's lock).
+        
+        Answers the turn from the fast path or the answer cache when it can,
+        setting ``turn.result``; otherwise records the user message and
+        builds the LLM messages with RAG context and prefetched tool results.
+        """
+        turn = _Turn(conversation_id)
+        route = self._route(user_message, conversation_id)
+        if route:
+            tool_result = execute_tools(
+                [(route["tool"], route["arguments"])], self.tool_executor, config.Config.TIMEOUT_SECONDS
+            )[0]
+            turn.result = self._fast_path_turn(user_message, conversation_id, route, tool_result)
+            if turn.result:
+                return turn
+        
+        turn.cache_key = self._answer_cache_key(user_message, conversation_id)
+        turn.result = self._cached_turn(user_message, conversation_id, turn.cache_key)
+        if turn.result:
+            return turn
+        
+        packed_context, turn.prefetched = self._prefetch(user_message)
+        turn.messages, turn.rag_context, turn.context_tokens = self._prepare_turn(
+            user_message, conversation_id, packed_context, turn.prefetched
+        )
+        turn.tool_calls_made = list(turn.prefetched)
+        return turn
+    
+    def _complete_turn(self, turn: _Turn, final_response: str) -> Dict:
+        """Record a turn's answer and build its result (the caller holds the conversation's lock)."""
+        result = self._finish_turn(
+            turn.conversation_id, final_response, turn.tool_calls_made, turn.rag_context, turn.context_tokens
+        )
+        result["usage"] = turn.usage
+        self._store_answer(turn.cache_key, result)
+        return result
+    
+    def _route(self, user_message: str, conversation_id: str) -> Optional[Dict]:
+        """Match the message to a lookup the fast path can answer, if enabled."""
+        if not config.Config.INTENT_ROUTER_ENABLED:
+            return None
+        has_history = bool(self.conversations.get_history(conversation_id))
+        return self.router.route(user_message, has_history=has_history)
+    
+    def _fast_path_turn(
+        self,
+        user_message: str,
+        conversation_id: str,
+        route: Dict,
+        tool_result: Dict
+    ) -> Optional[Dict]:
+        """
+        Answer a routed message from its tool result with a template, without the LLM.
+        
+        Returns:
+            The turn's result (as from ``chat``, with ``fast_path`` set), or
+            None if the result does not fit a template
+        """
+        answer = self.router.render(route, tool_result)
+        if answer is None:
+            return None
+        
+        self.conversations.append(conversation_id, {
+            "role": "user",
+            "content": user_message
+        })
+        tool_calls_made = [{"tool": route["tool"], "arguments": route["arguments"], "result": tool_result}]
+        result = self._finish_turn(conversation_id, answer, tool_calls_made, "", 0)
+        result["fast_path"] = True
+        return result
+    
+    @staticmethod
+    def _tool_events(tool_calls_made: List[Dict]) -> Iterator[Dict]:
+        """The ``chat_stream`` events for tool calls that already ran."""
+        for made in tool_calls_made:
+            yield {"type": "tool_call", "tool": made["tool"], "arguments": made["arguments"]}
+            yield {"type": "tool_result", "tool": made["tool"], "result": made["result"]}
+    
+    @classmethod
+    def _answered_events(cls, result: Dict) -> Iterator[Dict]:
+        """The ``chat_stream`` events for a turn answered without the LLM (fast path or answer cache)."""
+        yield from cls._tool_events(result["tool_calls"])
+        yield {"type": "delta", "content": result["response"]}
+        yield {"type": "done", **result}
+    
+    def _answer_cache_key(self, user_message: str, conversation_id: str) -> Optional[Tuple[str, str]]:
+        """
+        Answer cache key for a turn whose answer can depend only on the knowledge base.
+        
+        That is the first turn of a conversation (nothing earlier to refer
+        to) for a message that mentions no order or return to look up;
+        prefetching one of the ``STATIC_TOOLS`` does not disqualify it.
+        
+        Returns:
+            Tuple of (key, knowledge base version), or None if the turn is not cacheable
+        """
+        if self.answer_cache is None:
+            return None
+        if any(tool_name not in STATIC_TOOLS for tool_name, _ in self.router.likely_tool_calls(user_message)):
+            return None
+        if self.conversations.get_history(conversation_id):
+            return None
+        kb_version = self.vector_store.content_version
+        return AnswerCache.make_key(user_message, kb_version, self.model, self.system_prompt), kb_version
+    
+    def _cached_turn(
+        self,
+        user_message: str,
+        conversation_id: str,
+        cache_key: Optional[Tuple[str, str]]
+    ) -> Optional[Dict]:
+        """Answer a turn from the answer cache, or return None on a miss."""
+        if cache_key is None:
+            return None
+        cached = self.answer_cache.get(*cache_key)
+        if cached is None:
+            return None
+        
+        self.conversations.append(conversation_id, {
+            "role": "user",
+            "content": user_message
+        })
+        result = self._finish_turn(conversation_id, cached["response"], [], "", 0)
+        result.update(rag_used=cached["rag_used"], context_tokens=cached["context_tokens"], cached=True)
+        return result
+    
+    def _store_answer(self, cache_key: Optional[Tuple[str, str]], result: Dict):
+        """Cache a turn's answer if the turn was cacheable, succeeded and used only static tools."""
+        if cache_key is None or "error" in result:
+            return
+        if any(made["tool"] not in STATIC_TOOLS for made in result["tool_calls"]):
+            return
+        key, kb_version = cache_key
+        self.answer_cache.put(key, kb_version, {
+            "response": result["response"],
+            "rag_used": result["rag_used"],
+            "context_tokens": result["context_tokens"]
+        })
+    
+    def _prepare_turn(
+        self,
+        user_message: str,
+        conversation_id: str,
+        packed_context: Optional[Dict] = None,
+        prefetched: Optional[List[Dict]] = None
+    ) -> Tuple[List[Dict], str, int]:
+        """
+        Record the user message and build the LLM messages for a turn.
+        
+        Args:
+            user_message: User's message
+            conversation_id: Conversation the message belongs to
+            packed_context: Result of ``_get_rag_context``, or None when
+                the query does not use RAG
+            prefetched: Tool calls already made for this message
+        
+        Returns:
+            Tuple of (messages, RAG context text, RAG context tokens)
+        """
         # Add user message to history
-        self.conversation_history.append({
+        self.conversations.append(conversation_id, {
             "role": "user",
             "content": user_message
         })
         
-        # Get RAG context if needed
-        rag_context = ""
-        if self._should_use_rag(user_message):
-            rag_context = self._get_rag_context(user_message)
+        rag_context = packed_context['text'] if packed_context else ""
+        context_tokens = packed_context['tokens'] if packed_context else 0
         
-        # Prepare messages for LLM
-        messages = [{"role": "system", "content": self.system_prompt}]
+        # Context retrieved for this message only
+        turn_context = []
         
         # Add RAG context if available
         if rag_context:
-            messages.append({
+            turn_context.append({
                 "role": "system",
                 "content": f"Relevant information from knowledge base:\n\n{rag_context}\n\nUse this information to answer the customer's question accurately."
             })
         
-        # Add conversation history
-        messages.extend(self.conversation_history[-10:])  # Last 10 messages for context
-        
-        try:
-            # Call LLM with function calling
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                tools=TOOL_DEFINITIONS,
-                tool_choice="auto",
-                temperature=0.7,
-                max_tokens=1000
-            )
-            
-            assistant_message = response.choices[0].message
-            tool_calls_made = []
-            final_response = ""
-            
-            # Handle tool calls if any
-            if assistant_message.tool_calls:
-                messages.append({
-                    "role": "assistant",
-                    "content": assistant_message.content or "",
-                    "tool_calls": [
-                        {
-                            "id": tc.id,
-                            "type": tc.type,
-                            "function": {
-                                "name": tc.function.name,
-                                "arguments": tc.function.arguments
-                            }
-                        }
-                        for tc in assistant_message.tool_calls
-                    ]
-                })
-                
-                # Execute tool calls
-                for tool_call in assistant_message.tool_calls:
-                    tool_name = tool_call.function.name
-                    try:
-                        arguments = json.loads(tool_call.function.arguments)
-                    except json.JSONDecodeError:
-                        arguments = {}
-                    
-                    # Execute tool
-                    tool_result = execute_tool(tool_name, arguments)
-                    tool_calls_made.append({
-                        "tool": tool_name,
-                        "arguments": arguments,
-                        "result": tool_result
-                    })
-                    
-                    # Add tool result to messages
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "content": self._format_tool_result(tool_name, tool_result)
-                    })
-                
-                # Get final response from LLM with tool results
-                final_response_obj = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=0.7,
-                    max_tokens=1000
-                )
-                final_response = final_response_obj.choices[0].message.content
-            else:
-                final_response = assistant_message.content or "I apologize, but I couldn't generate a response."
-            
-            # Add assistant response to history
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": final_response
+        # Add prefetched tool results, so the model can answer without calling tools
+        if prefetched:
+            results = "\n\n".join(self._format_tool_result(made["tool"], made["result"]) for made in prefetched)
+            turn_context.append({
+                "role": "system",
+                "content": f"Tool results already looked up for the customer's latest message:\n\n{results}\n\nAnswer from these results; only call a tool for information they do not cover."
             })
-            
-            # Determine if escalation is needed
-            escalation_keywords = [
-                "escalate", "human", "agent", "representative", "manager",
-                "complex", "complicated", "cannot help", "unable to"
-            ]
-            needs_escalation = any(
-                keyword in final_response.lower() 
-                for keyword in escalation_keywords
-            )
-            
-            return {
-                "response": final_response,
-                "tool_calls": tool_calls_made,
-                "rag_used": bool(rag_context),
-                "needs_escalation": needs_escalation,
-                "conversation_id": conversation_id
+        
+        # Most stable first, so the provider's prompt cache matches the longest
+        # prefix: system prompt (and tools), earlier turns, then this message's
+        # context right before the message itself
+        history = self.history.compact(conversation_id, self.conversations.get_history(conversation_id))
+        messages = [{"role": "system", "content": self.system_prompt}]
+        messages.extend(history[:-1])
+        messages.extend(turn_context)
+        messages.extend(history[-1:])
+        return messages, rag_context, context_tokens
+    
+    def _completion_args(self, messages: List[Dict], tool_choice: str, stream: bool = False) -> Dict:
+        """
+        Arguments for a chat completion.
+        
+        Every completion sends the same canonical tool schemas, including
+        the one after tool calls (with ``tool_choice="none"``), so all of
+        them share the cached system prompt and tools prefix.
+        
+        Args:
+            messages: Messages built by ``_prepare_turn``
+            tool_choice: "auto" to let the model call tools, "none" to get an answer
+            stream: Whether to stream the completion (the last chunk then carries usage)
+        """
+        args = {
+            "model": self.model,
+            "messages": messages,
+            "tools": self.tools,
+            "tool_choice": tool_choice,
+            "temperature": 0.7,
+            "max_tokens": 1000
+        }
+        if stream:
+            args.update(stream=True, stream_options={"include_usage": True})
+        return args
+    
+    @staticmethod
+    def _tool_calls_from_message(assistant_message) -> List[Dict]:
+        """Convert a completion's tool calls to message format."""
+        return [
+            {
+                "id": tc.id,
+                "type": tc.type,
+                "function": {
+                    "name": tc.function.name,
+                    "arguments": tc.function.arguments
+                }
             }
+            for tc in assistant_message.tool_calls
+        ]
+    
+    def _add_tool_calls(self, turn: _Turn, content: str, tool_calls: List[Dict]) -> List[Tuple[str, Dict]]:
+        """Add the assistant message that makes ``tool_calls`` to the turn and return the parsed calls."""
+        turn.messages.append({
+            "role": "assistant",
+            "content": content,
+            "tool_calls": tool_calls
+        })
+        return self._parse_tool_calls(tool_calls)
+    
+    @staticmethod
+    def _merge_tool_call_fragments(tool_calls: List[Dict], fragments) -> None:
+        """Accumulate streamed tool call fragments, which are keyed by their position."""
+        for fragment in fragments or []:
+            while len(tool_calls) <= fragment.index:
+                tool_calls.append({"id": "", "type": "function", "function": {"name": "", "arguments": ""}})
+            call = tool_calls[fragment.index]
+            if fragment.id:
+                call["id"] = fragment.id
+            if fragment.function and fragment.function.name:
+                call["function"]["name"] += fragment.function.name
+            if fragment.function and fragment.function.arguments:
+                call["function"]["arguments"] += fragment.function.arguments
+    
+    @staticmethod
+    def _parse_tool_calls(tool_calls: List[Dict]) -> List[Tuple[str, Dict]]:
+        """(tool name, parsed arguments) for each tool call; unparseable arguments become {}."""
+        calls = []
+        for tool_call in tool_calls:
+            try:
+                arguments = json.loads(tool_call["function"]["arguments"])
+            except json.JSONDecodeError:
+                arguments = {}
+            calls.append((tool_call["function"]["name"], arguments))
+        return calls
+    
+    def _record_tool_results(
+        self,
+        turn: _Turn,
+        tool_calls: List[Dict],
+        calls: List[Tuple[str, Dict]],
+        results: List[Dict]
+    ) -> List[Dict]:
+        """
+        Add tool results to the turn's messages, in the order the model gave the calls.
+        
+        Returns:
+            List of the calls just executed with tool name, arguments and result
+        """
+        tool_calls_made = []
+        for tool_call, (tool_name, arguments), tool_result in zip(tool_calls, calls, results):
+            tool_calls_made.append({
+                "tool": tool_name,
+                "arguments": arguments,
+                "result": tool_result
+            })
             
-        except Exception as e:
-            import traceback
-            error_trace = traceback.format_exc()
-            print(f"Error in chat: {str(e)}")
-            print(f"Traceback: {error_trace}")
-            error_message = f"I apologize, but I encountered an error: {str(e)}. Please try again or contact our support team."
-            return {
-                "response": error_message,
-                "error": str(e),
-                "error_trace": error_trace,
-                "tool_calls": [],
-                "rag_used": False,
-                "needs_escalation": True,
-                "conversation_id": conversation_id
-            }
+            # Add tool result to messages
+            turn.messages.append({
+                "role": "tool",
+                "tool_call_id": tool_call["id"],
+                "content": self._format_tool_result(tool_name, tool_result)
+            })
+        turn.tool_calls_made += tool_calls_made
+        return tool_calls_made
+    
+    def _finish_turn(
+        self,
+        conversation_id: str,
+        final_response: str,
+        tool_calls_made: List[Dict],
+        rag_context: str,
+        context_tokens: int
+    ) -> Dict:
+        """Record the assistant response and build the turn's result."""
+        # Add assistant response to history
+        self.conversations.append(conversation_id, {
+            "role": "assistant",
+            "content": final_response
+        })
+        
+        # Determine if escalation is needed
+        escalation_keywords = [
+            "escalate", "human", "agent", "representative", "manager",
+            "complex", "complicated", "cannot help", "unable to"
+        ]
+        needs_escalation = any(
+            keyword in final_response.lower() 
+            for keyword in escalation_keywords
+        )
+        
+        return {
+            "response": final_response,
+            "tool_calls": tool_calls_made,
+            "rag_used": bool(rag_context),
+            "context_tokens": context_tokens,
+            "needs_escalation": needs_escalation,
+            "conversation_id": conversation_id
+        }
+    
+    def _error_result(self, error: Exception, conversation_id: str) -> Dict:
+        """Log a failed turn and build the apology result."""
+        import traceback
+        error_trace = traceback.format_exc()
+        print(f"Error in chat: {str(error)}")
+        print(f"Traceback: {error_trace}")
+        error_message = f"I apologize, but I encountered an error: {str(error)}. Please try again or contact our support team."
+        return {
+            "response": error_message,
+            "error": str(error),
+            "error_trace": error_trace,
+            "tool_calls": [],
+            "rag_used": False,
+            "needs_escalation": True,
+            "conversation_id": conversation_id
+        }
     
-    def reset_conversation(self):
-        """Reset conversation history."""
-        self.conversation_history = []
+    def reset_conversation(self, conversation_id: Optional[str] = None):
+        """Reset one conversation's history (the default conversation if omitted)."""
+        self.conversations.reset(conversation_id or DEFAULT_CONVERSATION_ID)
+        self.history.reset(conversation_id or DEFAULT_CONVERSATION_ID)
     
-    def get_conversation_history(self) -> List[Dict]:
-        """Get current conversation history."""
-        return self.conversation_history.copy()
+    def get_conversation_history(self, conversation_id: Optional[str] = None) -> List[Dict]:
+        """Get a conversation's history (the default conversation if omitted)."""
+        return self.conversations.get_history(conversation_id or DEFAULT_CONVERSATION_ID)
 
@@ -0,0 +1,264 @@
+"""Token-budgeted conversation history with a rolling summary of older turns."""
+import json
+import os
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.rag.manifest import content_hash
+from src.rag.retrieval_cache import TTLCache
+from src.rag.tokenizer import count_tokens, truncate_to_tokens
+
+# Tokens the API adds around every message (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# After a fold, the verbatim part is cut down to this share of the budget,
+# so the next fold is needed only after that many tokens of new turns
+FOLD_TARGET_RATIO = 0.5
+
+SUMMARY_PREFIX = "Summary of the earlier conversation with this customer:\n\n"
+
+
+class _Summary:
+    """
+    Rolling summary of a conversation up to (and including) one message.
+
+    The last covered message is anchored by its fingerprint and by its
+    index in the history it was folded from, together with that history's
+    length.
+    """
+
+    __slots__ = ("text", "fingerprint", "index", "length")
+
+    def __init__(self, text: str = "", fingerprint: Optional[str] = None, index: int = -1, length: int = 0):
+        self.text = text
+        self.fingerprint = fingerprint
+        self.index = index
+        self.length = length
+
+
+def _fingerprint(history: List[Dict], index: int) -> str:
+    """Identify a message by itself and the one before it, so repeated short messages rarely collide."""
+    window = history[max(0, index - 1):index + 1]
+    return content_hash(json.dumps(window, sort_keys=True, ensure_ascii=False))
+
+
+def _summary_start(history: List[Dict], summary: _Summary) -> Optional[int]:
+    """
+    Index of the first message a summary does not cover, or None if the summary is stale.
+
+    Histories only grow at the end and lose messages at the front once
+    they reach the store's cap, so the last covered message is at its
+    anchored index or, after trimming, further left; it is never looked for
+    to the right, where a repeated exchange could match its fingerprint. If
+    it was trimmed away, every message left is newer than the summary. A
+    history shorter than the one the summary was folded from was reset
+    meanwhile (e.g. through another worker).
+    """
+    if len(history) < summary.length:
+        return None
+    for index in range(min(summary.index, len(history) - 1), -1, -1):
+        if _fingerprint(history, index) == summary.fingerprint:
+            return index + 1
+    return 0
+
+
+def _turns(messages: List[Dict]) -> List[List[Dict]]:
+    """
+    Split messages into turns, each starting at a user message.
+
+    Assistant tool calls and their tool results always stay in the turn
+    they belong to. Messages before the first user message (left over from
+    a turn whose start was trimmed) are dropped.
+    """
+    turns = []
+    for message in messages:
+        if message.get("role") == "user":
+            turns.append([message])
+        elif turns:
+            turns[-1].append(message)
+    return turns
+
+
+class HistoryManager:
+    """
+    Chooses the history sent to the LLM under a token budget.
+
+    Recent turns are sent verbatim, whole, newest first until the budget
+    is spent; the latest turn is always sent. Older turns are folded into
+    a rolling summary that is sent ahead of them. Folding calls the
+    ``summarizer`` (an LLM call) on a background thread: ``compact`` never
+    waits for it and uses the newest finished summary, so a turn right
+    after the history outgrew the budget may briefly leave out messages the
+    summary does not cover yet. Each fold adds only the messages after the
+    previous fold to the previous summary, and leaves about half the budget
+    verbatim so folds are infrequent.
+
+    Summaries are kept in memory per process; a worker that has none for a
+    conversation sends the turns that fit and builds one in the background.
+    """
+
+    def __init__(
+        self,
+        summarizer: Optional[Callable[[str, List[Dict]], str]],
+        token_budget: int = 2000,
+        summary_tokens: int = 300,
+        model: str = "gpt-4",
+        max_sessions: int = 10000,
+        ttl_seconds: float = 3600,
+        max_workers: int = 2
+    ):
+        """
+        Initialize manager.
+
+        Args:
+            summarizer: Function taking (previous summary, messages to fold)
+                and returning the new summary, or None to only drop old turns
+            token_budget: Maximum tokens of history (summary included) per prompt
+            summary_tokens: Maximum tokens kept of a summary
+            model: Model whose tokenizer is used to count tokens
+            max_sessions: Maximum number of conversation summaries kept
+            ttl_seconds: Summaries unused for longer than this are discarded
+            max_workers: Summaries computed at once
+        """
+        self.summarizer = summarizer
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.model = model
+        self.folds = 0
+        self._summaries = TTLCache(max_size=max_sessions, ttl_seconds=ttl_seconds)
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="history") if summarizer else None
+
+    def message_tokens(self, message: Dict) -> int:
+        """Tokens a message takes in the prompt."""
+        tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(message.get("content") or "", self.model)
+        if message.get("tool_calls"):
+            tokens += count_tokens(json.dumps(message["tool_calls"]), self.model)
+        return tokens
+
+    def _take_recent(self, turns: List[List[Dict]], budget: int) -> int:
+        """Number of trailing turns that fit the budget (at least one)."""
+        used = 0
+        taken = 0
+        for turn in reversed(turns):
+            used += sum(self.message_tokens(message) for message in turn)
+            if taken and used > budget:
+                break
+            taken += 1
+        return taken
+
+    def compact(self, conversation_id: str, history: List[Dict]) -> List[Dict]:
+        """
+        Build the history messages for a prompt.
+
+        Args:
+            conversation_id: Conversation the history belongs to
+            history: The conversation's messages, oldest first (the latest
+                user message included)
+
+        Returns:
+            Messages to send: an optional summary system message followed by
+            the most recent turns, verbatim
+        """
+        summary = self._summaries.get(conversation_id)
+        start = 0
+        if summary is not None and summary.fingerprint:
+            # Messages after the last one the summary covers
+            start = _summary_start(history, summary)
+            if start is None:
+                # Start over, so the next fold replaces the stale summary
+                stale, summary, start = summary, _Summary(), 0
+                with self._lock:
+                    if self._summaries.get(conversation_id) is stale:
+                        self._summaries.put(conversation_id, summary)
+        text = summary.text if summary is not None else ""
+
+        summary_message = []
+        budget = self.token_budget
+        if text:
+            summary_message = [{"role": "system", "content": SUMMARY_PREFIX + text}]
+            budget -= self.message_tokens(summary_message[0])
+
+        turns = _turns(history[start:])
+        taken = self._take_recent(turns, budget)
+        if taken < len(turns):
+            # Fold everything but the turns that fit half the budget
+            keep = self._take_recent(turns, int(budget * FOLD_TARGET_RATIO))
+            end = len(history) - sum(len(turn) for turn in turns[len(turns) - keep:])
+            anchor = (_fingerprint(history, end - 1), end - 1, len(history))
+            self._schedule_fold(conversation_id, summary, history[start:end], anchor)
+
+        recent = [message for turn in turns[len(turns) - taken:] for message in turn]
+        return summary_message + recent
+
+    def _schedule_fold(
+        self,
+        conversation_id: str,
+        previous: Optional[_Summary],
+        messages: List[Dict],
+        anchor: tuple
+    ):
+        """
+        Fold messages into the conversation's summary in the background, once at a time.
+
+        ``anchor`` is the last folded message's (fingerprint, index, history length).
+        """
+        if self._executor is None or not messages:
+            return
+        with self._lock:
+            if conversation_id in self._pending:
+                return
+            try:
+                future = self._executor.submit(self._fold, conversation_id, previous, messages, anchor)
+            except RuntimeError:
+                # Shut down
+                return
+            self._pending[conversation_id] = future
+
+    def _fold(self, conversation_id: str, previous: Optional[_Summary], messages: List[Dict], anchor: tuple):
+        try:
+            text = self.summarizer(previous.text if previous is not None else "", messages)
+            folded = _Summary(truncate_to_tokens(text or "", self.summary_tokens, self.model), *anchor)
+            with self._lock:
+                # Drop the result if the conversation was reset meanwhile
+                if self._summaries.get(conversation_id) is previous:
+                    self._summaries.put(conversation_id, folded)
+                    self.folds += 1
+        except Exception as e:
+            print(f"Error summarizing conversation history: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(conversation_id, None)
+
+    def reset(self, conversation_id: str):
+        """Forget a conversation's summary; a fold still running for it is discarded."""
+        with self._lock:
+            self._summaries.put(conversation_id, _Summary())
+
+    def clear(self):
+        """Forget every summary."""
+        with self._lock:
+            self._summaries.clear()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until the summaries being computed are done."""
+        with self._lock:
+            futures = list(self._pending.values())
+        wait(futures, timeout=timeout)
+
+    def stats(self) -> Dict:
+        """Number of summaries kept, folds done and folds running."""
+        return {"summaries": len(self._summaries), "folds": self.folds, "pending": len(self._pending)}
+
+    def close(self):
+        """Stop the background summarizer threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,212 @@
+"""Rule-based router that answers simple lookups without calling the LLM."""
+import re
+from typing import Dict, List, Optional, Tuple
+
+ORDER_ID_PATTERN = re.compile(r"\bORD-\d{3,}\b", re.IGNORECASE)
+RETURN_ID_PATTERN = re.compile(r"\bRET-\d{3,}\b", re.IGNORECASE)
+
+# Longer messages usually carry more than one request
+MAX_ROUTED_WORDS = 25
+
+ORDER_STATUS_KEYWORDS = [
+    "where", "status", "track", "shipped", "delivered", "deliver", "arrive",
+    "eta", "when will", "update on", "check on", "check my order", "check order"
+]
+REFUND_STATUS_KEYWORDS = ["status", "refund", "where", "check", "update", "when will", "processed"]
+POLICY_PATTERN = re.compile(r"\b(return|refund|returns) polic(y|ies)\b", re.IGNORECASE)
+RETURN_TOPIC_PATTERN = re.compile(r"\b(return|refund)", re.IGNORECASE)
+
+# Words a plain lookup may contain besides its ID. Anything else left over
+# (a date, "not here", a second request) means the customer is saying more
+# than the template answers, so the message goes to the LLM instead
+LOOKUP_FILLER_WORDS = frozenset("""
+    a about an any can could do does for get give hello hey hi i i'd i'm is it it's just know let
+    me my of on please see show tell thank thanks the to what what's whats would you your
+""".split())
+ORDER_STATUS_WORDS = LOOKUP_FILLER_WORDS | frozenset("""
+    arrive arriving been check current currently deliver delivered delivery eta has id its number
+    order out package shipment shipped status track tracking update way when where where's will yet
+""".split())
+REFUND_STATUS_WORDS = LOOKUP_FILLER_WORDS | frozenset("""
+    been check has id processed refund refunds request return returns status update when where
+    where's will yet
+""".split())
+POLICY_WORDS = LOOKUP_FILLER_WORDS | frozenset("are policies policy refund refunds return returns".split())
+
+# Most lookups prefetched for one message
+MAX_PREFETCH_CALLS = 4
+
+# Anything that needs judgment, an action or an apology goes to the LLM
+LLM_ONLY_PATTERN = re.compile(
+    r"\b(cancel|chang|modif|wrong|damage|broke|defect|missing|complain|angry|upset|"
+    r"human|agent|manager|representative|exchange|address|instead|why\b|but\b)",
+    re.IGNORECASE
+)
+
+
+def _words(message: str) -> List[str]:
+    return re.findall(r"[\w'-]+", message.lower())
+
+
+def _has_any(text: str, keywords: List[str]) -> bool:
+    return any(keyword in text for keyword in keywords)
+
+
+def _only_lookup_words(message: str, allowed: frozenset) -> bool:
+    """Whether every word of the message, apart from order and return IDs, is in ``allowed``."""
+    text = RETURN_ID_PATTERN.sub(" ", ORDER_ID_PATTERN.sub(" ", message.lower()))
+    return all(word in allowed for word in re.findall(r"[a-z0-9]+(?:'[a-z]+)?", text))
+
+
+class IntentRouter:
+    """
+    Detects high-confidence lookup intents and renders templated answers.
+
+    A message is routed only if it names exactly one order or return ID
+    (or, for the policy intent, none), asks for a known lookup, is short,
+    contains nothing that calls for judgment (complaints, changes, several
+    requests) and has no words beyond the lookup's own phrasing. Everything
+    else returns None from ``route`` and is left to the LLM, which still
+    gets the lookup's result prefetched.
+    """
+
+    def route(self, message: str, has_history: bool = False) -> Optional[Dict]:
+        """
+        Match a message to a lookup tool.
+
+        Args:
+            message: User's message
+            has_history: Whether the conversation has earlier turns. A bare
+                ID then most likely answers the assistant's question (e.g.
+                which order to return), so only messages that ask for a
+                lookup themselves are routed.
+
+        Returns:
+            Dictionary with intent, tool and arguments, or None when the
+            message should go to the LLM
+        """
+        text = message.lower()
+        if len(_words(message)) > MAX_ROUTED_WORDS:
+            return None
+        if LLM_ONLY_PATTERN.search(text):
+            return None
+        # A question mark is fine at the end; one in the middle means two questions
+        if "?" in text.rstrip(" ?!."):
+            return None
+
+        order_ids = {match.upper() for match in ORDER_ID_PATTERN.findall(message)}
+        return_ids = {match.upper() for match in RETURN_ID_PATTERN.findall(message)}
+
+        if len(order_ids) == 1 and not return_ids:
+            if "return" in text or "refund" in text:
+                return None
+            if not _only_lookup_words(message, ORDER_STATUS_WORDS):
+                return None
+            if _has_any(text, ORDER_STATUS_KEYWORDS) or (not has_history and len(_words(message)) <= 3):
+                return {"intent": "order_status", "tool": "get_order_status",
+                        "arguments": {"order_id": order_ids.pop()}}
+            return None
+
+        if len(return_ids) == 1 and not order_ids:
+            if not _only_lookup_words(message, REFUND_STATUS_WORDS):
+                return None
+            if _has_any(text, REFUND_STATUS_KEYWORDS) or (not has_history and len(_words(message)) <= 3):
+                return {"intent": "refund_status", "tool": "get_refund_status",
+                        "arguments": {"return_id": return_ids.pop()}}
+            return None
+
+        if (not order_ids and not return_ids and POLICY_PATTERN.search(text)
+                and _only_lookup_words(message, POLICY_WORDS)):
+            return {"intent": "refund_policy", "tool": "get_refund_policy", "arguments": {}}
+        return None
+
+    def likely_tool_calls(self, message: str) -> List[Tuple[str, Dict]]:
+        """
+        Read-only lookups a message will almost certainly need.
+
+        Looser than ``route``: every order and return ID mentioned is looked
+        up, and return or refund questions get the policy, whatever else the
+        message asks. Used to prefetch results for the LLM, never to answer
+        on its own; actions such as creating a return are left to the model.
+
+        Args:
+            message: User's message
+
+        Returns:
+            (tool name, arguments) pairs in the order they appear in the message
+        """
+        calls = []
+        seen = set()
+        for match in re.finditer(f"{ORDER_ID_PATTERN.pattern}|{RETURN_ID_PATTERN.pattern}", message, re.IGNORECASE):
+            identifier = match.group(0).upper()
+            if identifier in seen:
+                continue
+            seen.add(identifier)
+            if identifier.startswith("ORD-"):
+                calls.append(("get_order_status", {"order_id": identifier}))
+            else:
+                calls.append(("get_refund_status", {"return_id": identifier}))
+        if RETURN_TOPIC_PATTERN.search(message):
+            calls.append(("get_refund_policy", {}))
+        return calls[:MAX_PREFETCH_CALLS]
+
+    def render(self, route: Dict, result: Dict) -> Optional[str]:
+        """
+        Phrase a tool result as a customer-facing answer.
+
+        Returns:
+            The answer, or None if the result does not fit a template (the
+            caller then falls back to the LLM)
+        """
+        if not result.get("success"):
+            if "not found" not in result.get("error", ""):
+                return None
+            if route["intent"] == "order_status":
+                return (f"I couldn't find an order with the ID {route['arguments']['order_id']}. "
+                        "Please double-check the order ID (it looks like ORD-12345) and try again.")
+            if route["intent"] == "refund_status":
+                return (f"I couldn't find a return with the ID {route['arguments']['return_id']}. "
+                        "Please double-check the return ID (it looks like RET-12345) and try again.")
+            return None
+
+        renderer = getattr(self, f"_render_{route['intent']}", None)
+        return renderer(result) if renderer else None
+
+    @staticmethod
+    def _render_order_status(result: Dict) -> Optional[str]:
+        items = ", ".join(f"{item['quantity']} x {item['name']}" for item in result.get("items", []))
+        status = result["status"]
+        if status == "shipped":
+            answer = (f"Your order {result['order_id']} has shipped (on {result['shipped_date']}) "
+                      f"and is estimated to arrive on {result['estimated_delivery']}. "
+                      f"Tracking number: {result['tracking_number']}.")
+        elif status == "processing":
+            answer = (f"Your order {result['order_id']} is being processed and is expected "
+                      f"to ship on {result['estimated_ship_date']}.")
+        elif status == "delivered":
+            answer = (f"Your order {result['order_id']} was delivered on {result['delivered_date']} "
+                      f"(tracking number {result['tracking_number']}).")
+        else:
+            answer = f"Your order {result['order_id']} is currently {status}."
+        if items:
+            answer += f"\n\nItems: {items} (total ${result['total']:.2f})."
+        return answer + "\n\nIs there anything else I can help you with?"
+
+    @staticmethod
+    def _render_refund_status(result: Dict) -> Optional[str]:
+        return (f"Return {result['return_id']} for order {result['order_id']}: {result['message']} "
+                f"Refund amount: ${result['refund_amount']:.2f}."
+                "\n\nIs there anything else I can help you with?")
+
+    @staticmethod
+    def _render_refund_policy(result: Dict) -> Optional[str]:
+        policy = result["policy"]
+        exceptions = "\n".join(f"- {exception}" for exception in policy.get("exceptions", []))
+        return (f"Our return policy:\n"
+                f"- Return window: {policy['return_window']}\n"
+                f"- Condition: {policy['condition']}\n"
+                f"- Processing time: {policy['processing_time']}\n"
+                f"- Refund method: {policy['refund_method']}\n"
+                f"- Return shipping: {policy['return_shipping']}\n\n"
+                f"Exceptions:\n{exceptions}"
+                "\n\nIs there anything else I can help you with?")
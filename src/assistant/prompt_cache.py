@@ -0,0 +1,62 @@
+"""Stable prompt prefixes and accounting of provider prompt cache hits."""
+import json
+import threading
+from typing import Dict, List
+
+
+def canonical_tools(tools: List[Dict]) -> List[Dict]:
+    """
+    Copy tool schemas with every object's keys in sorted order.
+
+    The provider caches prompts by exact prefix, and the tool schemas are
+    part of it; a canonical copy serializes to the same bytes on every
+    request, whatever order the definitions were written or updated in.
+    """
+    return json.loads(json.dumps(tools, sort_keys=True, ensure_ascii=False))
+
+
+def new_turn_usage() -> Dict:
+    """Empty usage record for one chat turn."""
+    return {"prompt_tokens": 0, "cached_tokens": 0, "requests": []}
+
+
+class PromptCacheStats:
+    """Thread-safe totals of prompt tokens and how many of them the provider served from its cache."""
+
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, turn_usage: Dict, usage) -> None:
+        """
+        Add one completion's usage to a turn's record and to the totals.
+
+        Args:
+            turn_usage: Record from ``new_turn_usage``
+            usage: The ``usage`` of a completion response or final stream chunk
+        """
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", 0) or 0
+
+        turn_usage["prompt_tokens"] += prompt_tokens
+        turn_usage["cached_tokens"] += cached_tokens
+        turn_usage["requests"].append({"prompt_tokens": prompt_tokens, "cached_tokens": cached_tokens})
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+
+    def stats(self) -> Dict:
+        """Totals and the share of prompt tokens served from the cache."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "cache_hit_ratio": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+            }
@@ -0,0 +1,262 @@
+"""Conversation histories in a SQLite (WAL) database shared by worker processes."""
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+# Messages longer than this are stored zlib-compressed
+COMPRESS_MIN_BYTES = 512
+
+
+def encode_message(message: Dict):
+    """Serialize a message to compact JSON, compressing long ones. Returns (blob, compressed)."""
+    data = json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(data) >= COMPRESS_MIN_BYTES:
+        return zlib.compress(data), 1
+    return data, 0
+
+
+def decode_message(data: bytes, compressed: int) -> Dict:
+    """Inverse of encode_message."""
+    return json.loads(zlib.decompress(data) if compressed else data)
+
+
+class SQLiteConversationStore:
+    """
+    Conversation histories in a SQLite database, so every worker process
+    serving the web app sees the same conversations.
+
+    The database runs in WAL mode, so readers in one process do not block
+    a writer in another. Each message is one compact row. Messages appended
+    while a conversation's ``lock`` is held (one chat turn) are buffered and
+    written in a single transaction when the lock is released, which also
+    trims the conversation to ``max_messages`` and refreshes its last-access
+    time. Conversations idle longer than ``ttl_seconds`` are invisible at
+    once and deleted by a periodic purge, which also evicts the least
+    recently used conversations beyond ``max_sessions``.
+
+    ``lock`` serializes the turns of one conversation within a process;
+    different conversations never wait on each other. Turns of one
+    conversation arriving at two workers at the same moment are not
+    serialized, but the writes of each turn still land together.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_sessions: int = 10000,
+        max_messages: int = 50,
+        ttl_seconds: float = 3600,
+        purge_interval: float = 60
+    ):
+        """
+        Open (or create) the session database.
+
+        Args:
+            path: SQLite database file
+            max_sessions: Maximum number of conversations kept
+            max_messages: Maximum messages kept per conversation
+            ttl_seconds: Conversations idle longer than this are discarded
+            purge_interval: Minimum seconds between purges of expired conversations
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval = purge_interval
+        self.evictions = 0
+        self._last_purge = 0.0
+        self._conn = None
+        self._pid = None
+        self._db_lock = threading.Lock()
+        # One lock per conversation with a turn in progress; dropped once no turn holds it
+        self._turn_locks: "weakref.WeakValueDictionary[str, threading.RLock]" = weakref.WeakValueDictionary()
+        self._turn_locks_lock = threading.Lock()
+        self._pending: Dict[str, List[Dict]] = {}
+        self._depth: Dict[str, int] = {}
+        self._pending_lock = threading.Lock()
+
+        with self._db_lock:
+            conn = self._connection()
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    conversation_id TEXT PRIMARY KEY,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions (last_access);
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    conversation_id TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    compressed INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (conversation_id, id);
+                """
+            )
+            conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Return this process's connection (caller holds the database lock).
+
+        A connection inherited through fork is never reused: worker
+        processes forked after the store was created open their own.
+        """
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._pid = os.getpid()
+        return self._conn
+
+    def _turn_lock(self, conversation_id: str) -> threading.RLock:
+        with self._turn_locks_lock:
+            lock = self._turn_locks.get(conversation_id)
+            if lock is None:
+                lock = self._turn_locks[conversation_id] = threading.RLock()
+            return lock
+
+    @contextmanager
+    def lock(self, conversation_id: str) -> Iterator[None]:
+        """Hold a conversation's lock for one turn; its appends are written when it is released."""
+        with self._turn_lock(conversation_id):
+            with self._pending_lock:
+                self._depth[conversation_id] = self._depth.get(conversation_id, 0) + 1
+            try:
+                yield
+            finally:
+                with self._pending_lock:
+                    self._depth[conversation_id] -= 1
+                    outermost = self._depth[conversation_id] == 0
+                    if outermost:
+                        del self._depth[conversation_id]
+                        pending = self._pending.pop(conversation_id, [])
+                if outermost and pending:
+                    self._write(conversation_id, pending)
+
+    def get_history(self, conversation_id: str) -> List[Dict]:
+        """Return a conversation's messages, oldest first, including unwritten ones of the current turn."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._db_lock:
+            rows = self._connection().execute(
+                "SELECT m.data, m.compressed FROM messages m "
+                "JOIN sessions s ON s.conversation_id = m.conversation_id "
+                "WHERE m.conversation_id = ? AND s.last_access >= ? ORDER BY m.id",
+                (conversation_id, cutoff)
+            ).fetchall()
+        history = [decode_message(data, compressed) for data, compressed in rows]
+        with self._pending_lock:
+            history.extend(self._pending.get(conversation_id, []))
+        return history[-self.max_messages:] if self.max_messages else history
+
+    def append(self, conversation_id: str, *messages: Dict):
+        """Add messages to a conversation (buffered until the end of the turn inside ``lock``)."""
+        with self._pending_lock:
+            if self._depth.get(conversation_id):
+                self._pending.setdefault(conversation_id, []).extend(messages)
+                return
+        self._write(conversation_id, list(messages))
+
+    def _write(self, conversation_id: str, messages: List[Dict]):
+        """Write a batch of messages, trim the conversation and touch it, in one transaction."""
+        now = time.time()
+        rows = [(conversation_id, *encode_message(message)) for message in messages]
+        with self._db_lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A conversation that expired but was not purged yet starts over
+                conn.execute(
+                    "DELETE FROM messages WHERE conversation_id = ? AND EXISTS "
+                    "(SELECT 1 FROM sessions WHERE conversation_id = ? AND last_access < ?)",
+                    (conversation_id, conversation_id, now - self.ttl_seconds)
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO sessions (conversation_id, last_access) VALUES (?, ?)",
+                    (conversation_id, now)
+                )
+                conn.executemany(
+                    "INSERT INTO messages (conversation_id, data, compressed) VALUES (?, ?, ?)",
+                    rows
+                )
+                conn.execute(
+                    "DELETE FROM messages WHERE conversation_id = ? AND id NOT IN "
+                    "(SELECT id FROM messages WHERE conversation_id = ? ORDER BY id DESC LIMIT ?)",
+                    (conversation_id, conversation_id, self.max_messages)
+                )
+                if now - self._last_purge >= self.purge_interval:
+                    self._purge(conn, now)
+                    self._last_purge = now
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _purge(self, conn: sqlite3.Connection, now: float):
+        """Delete expired conversations and the least recently used ones beyond the cap."""
+        expired = conn.execute(
+            "DELETE FROM sessions WHERE last_access < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        count = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        evicted = 0
+        if count > self.max_sessions:
+            evicted = conn.execute(
+                "DELETE FROM sessions WHERE conversation_id IN ("
+                "SELECT conversation_id FROM sessions ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_sessions,)
+            ).rowcount
+        if expired or evicted:
+            conn.execute(
+                "DELETE FROM messages WHERE conversation_id NOT IN (SELECT conversation_id FROM sessions)"
+            )
+        self.evictions += expired + evicted
+
+    def reset(self, conversation_id: str):
+        """Forget one conversation."""
+        with self._pending_lock:
+            self._pending.pop(conversation_id, None)
+        with self._db_lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+            conn.execute("DELETE FROM sessions WHERE conversation_id = ?", (conversation_id,))
+            conn.execute("COMMIT")
+
+    def clear(self):
+        """Forget every conversation."""
+        with self._pending_lock:
+            self._pending.clear()
+        with self._db_lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM messages")
+            conn.execute("DELETE FROM sessions")
+            conn.execute("COMMIT")
+
+    def __len__(self) -> int:
+        with self._db_lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM sessions WHERE last_access >= ?",
+                (time.time() - self.ttl_seconds,)
+            ).fetchone()[0]
+
+    def stats(self) -> Dict:
+        """Number of live sessions and how many this process evicted."""
+        return {"sessions": len(self), "evictions": self.evictions}
+
+    def close(self):
+        """Close this process's database connection."""
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
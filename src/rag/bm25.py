@@ -0,0 +1,117 @@
+"""In-memory inverted index with BM25 scoring for keyword retrieval."""
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:['\-][a-z0-9]+)*")
+
+STOPWORDS = frozenset("""
+a about an and any are as at be been but by can could did do does for from get
+had has have how i if in into is it its know like many me much my need of on or
+our please so tell than that the their them then there these they this to up
+us want was we were what when where which who why will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split into word tokens and drop stopwords."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index of chunk texts."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1: Term-frequency saturation parameter
+            b: Document-length normalization parameter
+        """
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.doc_numbers: Dict[str, int] = {}
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.idf: Dict[str, float] = {}
+        self.doc_lengths: List[int] = []
+        self.avg_doc_length = 0.0
+
+    def build(self, ids: List[str], texts: List[str]):
+        """
+        (Re)build the index from scratch.
+
+        Args:
+            ids: Chunk IDs
+            texts: Chunk texts, aligned with ids
+        """
+        postings = defaultdict(list)
+        doc_lengths = []
+        for doc, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                postings[term].append((doc, frequency))
+
+        count = len(texts)
+        self.ids = list(ids)
+        self.doc_numbers = {chunk_id: doc for doc, chunk_id in enumerate(self.ids)}
+        self.postings = dict(postings)
+        self.doc_lengths = doc_lengths
+        self.avg_doc_length = (sum(doc_lengths) / count) if count else 0.0
+        self.idf = {
+            term: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, k: int, ids: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Score chunks against a query.
+
+        Args:
+            query: Free-text query
+            k: Maximum number of hits
+            ids: Only score these chunk IDs (all chunks if None)
+
+        Returns:
+            Hits sorted best first, each with ``id``, ``score`` and
+            ``coverage``: a 0-1 confidence that the chunk matches every
+            query term
+        """
+        query_terms = set(tokenize(query))
+        terms = [term for term in query_terms if term in self.postings]
+        if not terms or not self.ids:
+            return []
+
+        allowed = None if ids is None else {self.doc_numbers[i] for i in ids if i in self.doc_numbers}
+
+        scores: Dict[int, float] = defaultdict(float)
+        for term in terms:
+            idf = self.idf[term]
+            for doc, frequency in self.postings[term]:
+                if allowed is not None and doc not in allowed:
+                    continue
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc] / self.avg_doc_length
+                scores[doc] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+
+        # Reference score: every query term occurring once in an average-length
+        # chunk. Unknown terms count with the highest possible IDF, so a query
+        # about something the knowledge base has never heard of is not confident.
+        unseen_idf = math.log(1 + (len(self.ids) + 0.5) / 0.5)
+        full_match = sum(self.idf.get(term, unseen_idf) for term in query_terms)
+
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [
+            {
+                'id': self.ids[doc],
+                'score': score,
+                'coverage': min(1.0, score / full_match)
+            }
+            for doc, score in best
+        ]
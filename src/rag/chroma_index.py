@@ -0,0 +1,150 @@
+"""ChromaDB index backend."""
+from typing import Dict, Iterable, List, Optional
+
+import chromadb
+import numpy as np
+from chromadb.config import Settings
+
+
+class ChromaIndex:
+    """Persistent ChromaDB collection exposing the same interface as FlatIndex."""
+
+    # Chroma rejects very large single requests, so writes are sent in slices
+    BATCH_SIZE = 1000
+
+    def __init__(self, directory: str, collection_name: str):
+        """
+        Open (or create) a persistent collection.
+
+        Args:
+            directory: Chroma persist directory
+            collection_name: Name of the collection to use
+        """
+        self.directory = directory
+        self.collection_name = collection_name
+        self.client = chromadb.PersistentClient(
+            path=directory,
+            settings=Settings(anonymized_telemetry=False)
+        )
+        self.collection = self.client.get_or_create_collection(collection_name)
+
+    def count(self) -> int:
+        """Number of indexed chunks."""
+        return self.collection.count()
+
+    def get_all(self) -> List[Dict]:
+        """Return every chunk's id, content and metadata."""
+        results = self.collection.get(include=["documents", "metadatas"])
+        return [
+            {'id': chunk_id, 'content': content, 'metadata': metadata}
+            for chunk_id, content, metadata in zip(
+                results["ids"], results["documents"], results["metadatas"]
+            )
+        ]
+
+    def reset(self):
+        """Drop and recreate the collection."""
+        self.client.delete_collection(self.collection_name)
+        self.collection = self.client.get_or_create_collection(self.collection_name)
+
+    def upsert(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict],
+        vectors: List[List[float]]
+    ):
+        """Insert or replace chunks."""
+        for start in range(0, len(ids), self.BATCH_SIZE):
+            end = start + self.BATCH_SIZE
+            self.collection.upsert(
+                ids=ids[start:end],
+                documents=texts[start:end],
+                metadatas=metadatas[start:end],
+                embeddings=vectors[start:end]
+            )
+
+    def delete(self, ids: List[str]):
+        """Delete chunks by ID."""
+        for start in range(0, len(ids), self.BATCH_SIZE):
+            self.collection.delete(ids=ids[start:start + self.BATCH_SIZE])
+
+    def query(self, vector: List[float], k: int, ids: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Find the k nearest chunks to a query embedding.
+
+        Returns:
+            List of hits with id, content, metadata and distance score
+        """
+        return self.query_many([vector], k, ids=ids)[0]
+
+    def query_many(
+        self,
+        vectors: List[List[float]],
+        k: int,
+        ids: Optional[Iterable[str]] = None
+    ) -> List[List[Dict]]:
+        """Find the k nearest chunks for several query embeddings in one request."""
+        if ids is not None:
+            return self._query_subset(vectors, k, list(ids))
+
+        count = self.count()
+        if not count or k <= 0 or not len(vectors):
+            return [[] for _ in vectors]
+
+        results = self.collection.query(
+            query_embeddings=list(vectors),
+            n_results=min(k, count),
+            include=["documents", "metadatas", "distances"]
+        )
+        return [
+            [
+                {
+                    'id': chunk_id,
+                    'content': content,
+                    'metadata': metadata,
+                    'score': distance
+                }
+                for chunk_id, content, metadata, distance in zip(ids, documents, metadatas, distances)
+            ]
+            for ids, documents, metadatas, distances in zip(
+                results["ids"],
+                results["documents"],
+                results["metadatas"],
+                results["distances"]
+            )
+        ]
+
+    def _query_subset(self, vectors: List[List[float]], k: int, ids: List[str]) -> List[List[Dict]]:
+        """
+        Score only the given chunks.
+
+        The allowed chunks are fetched by ID and scored locally, so filtered
+        searches work the same on every Chroma version.
+        """
+        if not ids or k <= 0 or not len(vectors):
+            return [[] for _ in vectors]
+
+        results = self.collection.get(ids=ids, include=["embeddings", "documents", "metadatas"])
+        if not len(results["ids"]):
+            return [[] for _ in vectors]
+        matrix = np.asarray(results["embeddings"], dtype=np.float32)
+        queries = np.asarray(vectors, dtype=np.float32)
+        # Squared L2 distances, the same measure as Chroma's default space
+        distances = (
+            (queries ** 2).sum(axis=1)[:, None]
+            - 2 * queries @ matrix.T
+            + (matrix ** 2).sum(axis=1)[None, :]
+        )
+        return [
+            [
+                {
+                    'id': results["ids"][row],
+                    'content': results["documents"][row],
+                    'metadata': results["metadatas"][row],
+                    'score': float(row_distances[row])
+                }
+                for row in np.argsort(row_distances)[:k]
+            ]
+            for row_distances in distances
+        ]
@@ -0,0 +1,155 @@
+"""Markdown-structure-aware chunking for knowledge base documents."""
+import re
+from typing import Dict, List
+
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+HEADING_SEPARATOR = " > "
+
+
+class MarkdownChunker:
+    """
+    Split markdown on ``#``/``##``/``###`` headings without overlap.
+
+    Every section (a heading plus the text up to the next heading) becomes
+    one chunk, so an FAQ question always stays with its answer. The chunk
+    text starts with the headings leading to it to keep enough context for
+    retrieval, and the heading path is recorded in the metadata. Adjacent
+    small sibling sections are merged up to ``min_chunk_size``; sections
+    longer than ``max_chunk_size`` are split on paragraph, then line,
+    boundaries.
+    """
+
+    def __init__(self, max_chunk_size: int = 1000, min_chunk_size: int = 300, split_level: int = 3):
+        """
+        Initialize chunker.
+
+        Args:
+            max_chunk_size: Maximum characters per chunk
+            min_chunk_size: Sibling sections are merged until a chunk reaches this size
+            split_level: Deepest heading level that starts a new section
+        """
+        self.max_chunk_size = max_chunk_size
+        self.min_chunk_size = min_chunk_size
+        self.split_level = split_level
+
+    @property
+    def signature(self) -> str:
+        """Identifies the chunking settings, so indexes built differently can be detected."""
+        return f"markdown:max={self.max_chunk_size},min={self.min_chunk_size},level={self.split_level}"
+
+    def _sections(self, text: str) -> List[Dict]:
+        """Parse markdown into sections with their heading stack."""
+        sections = []
+        stack = []  # (level, title, heading line)
+        body: List[str] = []
+
+        def flush():
+            if "\n".join(body).strip():
+                sections.append({
+                    'path': [title for _, title, _ in stack],
+                    'heading_lines': [line for _, _, line in stack],
+                    'body': "\n".join(body).strip()
+                })
+
+        for line in text.splitlines():
+            match = HEADING_PATTERN.match(line)
+            if match and len(match.group(1)) <= self.split_level:
+                flush()
+                body = []
+                level = len(match.group(1))
+                while stack and stack[-1][0] >= level:
+                    stack.pop()
+                stack.append((level, match.group(2), line.strip()))
+            else:
+                body.append(line)
+        flush()
+        return sections
+
+    def _split_body(self, body: str, budget: int) -> List[str]:
+        """Split an oversized body on paragraphs, then lines, packing parts up to budget."""
+        if len(body) <= budget:
+            return [body]
+
+        # (piece, separator that joins it to the previous piece)
+        pieces = []
+        for paragraph in re.split(r"\n\s*\n", body):
+            separator = "\n\n"
+            lines = [paragraph] if len(paragraph) <= budget else paragraph.splitlines()
+            for line in lines:
+                while len(line) > budget:
+                    pieces.append((line[:budget], separator))
+                    line, separator = line[budget:], ""
+                pieces.append((line, separator))
+                separator = "\n"
+
+        parts, current = [], ""
+        for piece, separator in pieces:
+            if current and len(current) + len(separator) + len(piece) > budget:
+                parts.append(current)
+                current = piece
+            else:
+                current = f"{current}{separator}{piece}" if current else piece
+        if current.strip():
+            parts.append(current)
+        return parts
+
+    def split_text(self, text: str, source: str) -> List[Dict]:
+        """
+        Chunk a markdown document.
+
+        Args:
+            text: Markdown content
+            source: Source path recorded in chunk metadata
+
+        Returns:
+            List of chunks, each a dict with ``content`` and ``metadata``
+            (``source``, ``heading_path`` and ``headings``)
+        """
+        chunks = []
+        group: List[Dict] = []
+
+        def emit():
+            if not group:
+                return
+            if len(group) == 1:
+                path = group[0]['path']
+                header = "\n".join(group[0]['heading_lines'])
+                body = group[0]['body']
+            else:
+                # Merged siblings share the parent headings; each keeps its own
+                path = group[0]['path'][:-1]
+                header = "\n".join(group[0]['heading_lines'][:-1])
+                body = "\n\n".join(
+                    f"{section['heading_lines'][-1]}\n{section['body']}"
+                    if section['path'] else section['body']
+                    for section in group
+                )
+            metadata = {
+                'source': source,
+                'heading_path': HEADING_SEPARATOR.join(path),
+                'headings': " | ".join(section['path'][-1] for section in group if section['path'])
+            }
+            budget = max(self.max_chunk_size - len(header) - 1, self.max_chunk_size // 2)
+            for part in self._split_body(body, budget):
+                chunks.append({
+                    'content': f"{header}\n{part}" if header else part,
+                    'metadata': dict(metadata)
+                })
+
+        size = 0
+        for section in self._sections(text):
+            section_size = len(section['body']) + len(section['heading_lines'][-1] if section['path'] else "")
+            same_parent = bool(group) and group[0]['path'][:-1] == section['path'][:-1]
+            if group and (
+                not same_parent
+                or size >= self.min_chunk_size
+                or size + section_size > self.max_chunk_size
+            ):
+                emit()
+                group, size = [], 0
+            group.append(section)
+            size += section_size
+        emit()
+
+        return chunks
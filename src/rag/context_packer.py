@@ -0,0 +1,74 @@
+"""Pack retrieved chunks into a deduplicated, token-budgeted context string."""
+from typing import Dict, List
+
+from src.rag.tokenizer import count_tokens, truncate_to_tokens
+
+
+# Don't bother appending a truncated chunk smaller than this
+MIN_PARTIAL_TOKENS = 50
+
+
+def _dedupe_lines(content: str, seen_lines: set) -> str:
+    """Drop non-blank lines that were already packed (shared headings, overlapping text)."""
+    kept = []
+    for line in content.splitlines():
+        key = line.strip()
+        if key and key in seen_lines:
+            continue
+        kept.append(line)
+        if key:
+            seen_lines.add(key)
+    return "\n".join(kept).strip()
+
+
+def pack_context(results: List[Dict], token_budget: int, model: str = "gpt-4") -> Dict:
+    """
+    Build the knowledge base context for the prompt.
+
+    Chunks are taken in relevance order (as returned by search). Lines that
+    already appeared in a higher-ranked chunk are removed, chunks that add
+    nothing new are skipped, and packing stops at the token budget, with the
+    last chunk truncated if enough room is left for it to be useful.
+
+    Args:
+        results: Search results with ``content``
+        token_budget: Maximum tokens for the packed context
+        model: Model whose tokenizer is used for counting
+
+    Returns:
+        Dictionary with the context ``text``, ``tokens`` used,
+        ``chunks_used`` and ``chunks_dropped``
+    """
+    seen_lines: set = set()
+    parts: List[str] = []
+    used_tokens = 0
+    dropped = 0
+
+    for position, result in enumerate(results):
+        content = _dedupe_lines(result['content'], seen_lines)
+        if not content:
+            dropped += 1
+            continue
+
+        part = f"[Document {len(parts) + 1}]\n{content}\n"
+        # Parts are joined with a newline, which costs (at most) one token
+        part_tokens = count_tokens(part, model) + (1 if parts else 0)
+        remaining = token_budget - used_tokens
+
+        if part_tokens > remaining:
+            truncated = remaining >= MIN_PARTIAL_TOKENS
+            if truncated:
+                parts.append(truncate_to_tokens(part, remaining - 1, model))
+            dropped += len(results) - position - (1 if truncated else 0)
+            break
+
+        parts.append(part)
+        used_tokens += part_tokens
+
+    text = "\n".join(parts)
+    return {
+        'text': text,
+        'tokens': count_tokens(text, model),
+        'chunks_used': len(parts),
+        'chunks_dropped': dropped
+    }
@@ -0,0 +1,268 @@
+"""Persistent SQLite-backed cache for text embeddings."""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different inputs share a cache entry."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class EmbeddingCache:
+    """
+    Disk-backed embedding cache keyed by (model, normalized text hash) with LRU eviction.
+
+    Each process opens its own connection on first use, so workers forked
+    after the cache was created never share one. Reads stay off the write
+    path: ``last_used`` updates from hits are buffered and written in
+    batches, and the table is only counted when this process's running
+    estimate says it may be over the limit.
+    """
+
+    # Buffered last_used updates are written once this many are pending or
+    # this many seconds have passed since the last write
+    TOUCH_FLUSH_SIZE = 256
+    TOUCH_FLUSH_SECONDS = 30.0
+
+    def __init__(self, path: str, max_entries: int = 100000):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite database file
+            max_entries: Maximum number of cached vectors before the least
+                recently used ones are evicted
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_entries = max_entries
+        # Eviction trims to this mark, so the next count is thousands of
+        # inserts away instead of on every insert once the cache is full
+        self.low_water = max_entries - max_entries // 10
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._estimated_count = 0
+        self._touched: Dict[Tuple[str, str], float] = {}
+        self._last_flush = time.time()
+        with self._lock:
+            self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Return this process's connection (caller holds the lock).
+
+        A connection inherited through fork is never reused: worker
+        processes forked after the cache was created open their own, and
+        drop the parent's pending touches and row estimate with it.
+        """
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, text_hash)
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+            )
+            self._conn.commit()
+            self._estimated_count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            self._touched = {}
+            self._pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def text_key(text: str) -> str:
+        """Hash of the normalized text used as part of the cache key."""
+        return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+    def _write_touches(self, conn: sqlite3.Connection):
+        """Write buffered last_used updates without committing (caller holds the lock)."""
+        if self._touched:
+            conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                [(used, model, text_hash) for (model, text_hash), used in self._touched.items()]
+            )
+            self._touched = {}
+        self._last_flush = time.time()
+
+    def get_many(self, model: str, texts: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up cached vectors.
+
+        Args:
+            model: Embedding model name
+            texts: Texts to look up
+
+        Returns:
+            Mapping of text hash to vector for every cache hit
+        """
+        keys = list({self.text_key(text) for text in texts})
+        if not keys:
+            return {}
+
+        found: Dict[str, List[float]] = {}
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            # SQLite limits bound parameters, so look keys up in slices
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+            for text_hash in found:
+                self._touched[(model, text_hash)] = now
+            if self._touched and (
+                len(self._touched) >= self.TOUCH_FLUSH_SIZE
+                or now - self._last_flush >= self.TOUCH_FLUSH_SECONDS
+            ):
+                self._write_touches(conn)
+                conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, model: str, items: Dict[str, List[float]]):
+        """
+        Store vectors and evict the least recently used entries over the limit.
+
+        Buffered ``last_used`` updates are written in the same transaction.
+
+        Args:
+            model: Embedding model name
+            items: Mapping of text hash to vector
+        """
+        if not items:
+            return
+
+        now = time.time()
+        rows = [
+            (model, text_hash, array("f", vector).tobytes(), now)
+            for text_hash, vector in items.items()
+        ]
+        with self._lock:
+            conn = self._connection()
+            self._write_touches(conn)
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+            # Replaced rows overcount, which only makes the exact count below come sooner
+            self._estimated_count += len(rows)
+            if self._estimated_count > self.max_entries:
+                count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                if count > self.max_entries:
+                    conn.execute(
+                        "DELETE FROM embeddings WHERE rowid IN ("
+                        "SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                        (count - self.low_water,)
+                    )
+                    count = self.low_water
+                self._estimated_count = count
+            conn.commit()
+
+    def flush(self):
+        """Write buffered last_used updates now."""
+        with self._lock:
+            conn = self._connection()
+            self._write_touches(conn)
+            conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        """Write pending updates and close this process's connection (it is reopened on next use)."""
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._write_touches(self._conn)
+                self._conn.commit()
+                self._conn.close()
+            self._conn = None
+
+
+class CachedEmbeddings:
+    """
+    Embeddings wrapper that serves repeated texts from an EmbeddingCache.
+
+    Exposes the same ``embed_documents`` / ``embed_query`` interface as the
+    LangChain embedding classes so it can be handed to Chroma directly.
+    """
+
+    def __init__(self, embeddings, model_name: str, cache: EmbeddingCache):
+        """
+        Initialize wrapper.
+
+        Args:
+            embeddings: Underlying embeddings object (e.g. OpenAIEmbeddings)
+            model_name: Model identifier used in the cache key
+            cache: Cache to read from and write to
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, only sending cache misses to the underlying model."""
+        keys = [self.cache.text_key(text) for text in texts]
+        vectors = self.cache.get_many(self.model_name, texts)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+
+        if missing:
+            new_vectors = self.embeddings.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), new_vectors))
+            self.cache.put_many(self.model_name, fresh)
+            vectors.update(fresh)
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query, using the cache when possible."""
+        key = self.cache.text_key(text)
+        cached = self.cache.get_many(self.model_name, [text])
+        if key in cached:
+            return cached[key]
+
+        vector = self.embeddings.embed_query(text)
+        self.cache.put_many(self.model_name, {key: vector})
+        return vector
+
+
+def wrap_with_cache(embeddings, model_name: str, path: Optional[str], max_entries: int):
+    """Wrap embeddings with a persistent cache, or return them unchanged if no path is set."""
+    if not path:
+        return embeddings
+    return CachedEmbeddings(embeddings, model_name, EmbeddingCache(path, max_entries))
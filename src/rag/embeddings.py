@@ -0,0 +1,118 @@
+"""Embedding backends for the RAG vector store."""
+import os
+import sys
+import threading
+from typing import Dict, List, Tuple
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from src.rag.embedding_cache import wrap_with_cache
+
+
+# Loaded SentenceTransformer models, shared by every LocalEmbeddings in the process
+_LOCAL_MODELS: Dict[Tuple[str, str], object] = {}
+_LOCAL_MODELS_LOCK = threading.Lock()
+
+
+def _load_local_model(model_name: str, device: str, num_threads: int):
+    """Load a sentence-transformers model once per process."""
+    key = (model_name, device)
+    with _LOCAL_MODELS_LOCK:
+        if key not in _LOCAL_MODELS:
+            # Imported lazily so the OpenAI backend does not pay for torch
+            from sentence_transformers import SentenceTransformer
+
+            if num_threads > 0:
+                import torch
+                torch.set_num_threads(num_threads)
+
+            print(f"Loading local embedding model {model_name} on {device}...")
+            _LOCAL_MODELS[key] = SentenceTransformer(model_name, device=device)
+        return _LOCAL_MODELS[key]
+
+
+class LocalEmbeddings:
+    """Offline embeddings computed with sentence-transformers using batched encoding."""
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 64,
+        num_threads: int = 0,
+        device: str = "cpu"
+    ):
+        """
+        Initialize local embeddings.
+
+        Args:
+            model_name: sentence-transformers model name or local path
+            batch_size: Number of texts encoded per forward pass
+            num_threads: CPU threads used by torch (0 keeps the library default)
+            device: Torch device to run on
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = _load_local_model(model_name, device, num_threads)
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents in batches."""
+        if not texts:
+            return []
+        return self._encode(list(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query."""
+        return self._encode([text])[0]
+
+
+def create_embeddings() -> Tuple[object, str]:
+    """
+    Create the embedding backend selected by ``Config.EMBEDDING_BACKEND``.
+
+    Returns:
+        Tuple of (embeddings object, model identifier). The identifier
+        names the backend and model and is used to key caches and to
+        detect when the index was built with a different model.
+    """
+    backend = config.Config.EMBEDDING_BACKEND.lower()
+
+    if backend == "local":
+        model_id = f"local:{config.Config.LOCAL_EMBEDDING_MODEL}"
+        embeddings = LocalEmbeddings(
+            model_name=config.Config.LOCAL_EMBEDDING_MODEL,
+            batch_size=config.Config.EMBEDDING_BATCH_SIZE,
+            num_threads=config.Config.EMBEDDING_NUM_THREADS,
+            device=config.Config.EMBEDDING_DEVICE
+        )
+    elif backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+
+        model_id = config.Config.EMBEDDING_MODEL
+        embeddings = OpenAIEmbeddings(
+            model=config.Config.EMBEDDING_MODEL,
+            openai_api_key=config.Config.OPENAI_API_KEY
+        )
+    else:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {config.Config.EMBEDDING_BACKEND}")
+
+    embeddings = wrap_with_cache(
+        embeddings,
+        model_name=model_id,
+        path=config.Config.EMBEDDING_CACHE_PATH,
+        max_entries=config.Config.EMBEDDING_CACHE_MAX_ENTRIES
+    )
+    return embeddings, model_id
@@ -0,0 +1,374 @@
+"""Exact in-process vector index backed by a memory-mapped float32 matrix."""
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+PRECISIONS = ("float32", "float16", "int8")
+
+# Quantized rows are widened to float32 in blocks of this many rows while
+# scanning; small blocks stay in the CPU cache, which makes the scan faster.
+# Larger blocks do not help float16: the conversion itself is the cost
+SCAN_BLOCK_ROWS = 256
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row, leaving all-zero rows untouched."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize_rows(vectors: np.ndarray, precision: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Compress float32 vectors for scanning.
+
+    Args:
+        vectors: Float32 matrix, one vector per row
+        precision: "float16", or "int8" with one symmetric scale per row
+
+    Returns:
+        Tuple of (codes, per-row scales or None)
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if precision == "float16":
+        return vectors.astype(np.float16), None
+    if precision == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Unknown index precision: {precision}")
+
+
+class FlatIndex:
+    """
+    Brute-force cosine index over a contiguous, L2-normalized float32 matrix.
+
+    Scores are reported as squared L2 distances between unit vectors
+    (``2 - 2 * cosine``), which is what Chroma's default ``l2`` space returns
+    for normalized embeddings, so ``SIMILARITY_THRESHOLD`` keeps its meaning
+    regardless of the backend.
+
+    With a ``precision`` of "float16" or "int8" queries scan a compressed
+    copy of the matrix and only the best ``k * rerank_factor`` candidates
+    are re-scored against the full-precision vectors, so the float32 file
+    stays mostly on disk.
+    """
+
+    VECTORS_FILE = "vectors.npy"
+    CHUNKS_FILE = "chunks.json"
+    SCALES_FILE = "vector_scales.npy"
+
+    def __init__(
+        self,
+        directory: str,
+        read_only: bool = False,
+        precision: str = "float32",
+        rerank_factor: int = 4
+    ):
+        """
+        Open (or create) a flat index.
+
+        Args:
+            directory: Directory holding the vector matrix and chunk data
+            read_only: Refuse modifications (used when serving snapshots)
+            precision: Scan representation: "float32", "float16" or "int8"
+            rerank_factor: Candidates per result re-ranked at full precision
+                (0 returns the quantized scores as they are)
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown index precision: {precision}")
+        self.directory = directory
+        self.read_only = read_only
+        self.precision = precision
+        self.rerank_factor = rerank_factor
+        self.codes: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict] = []
+        self._row_lookup: Optional[Dict[str, int]] = None
+        self._load()
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.directory, self.VECTORS_FILE)
+
+    @property
+    def chunks_path(self) -> str:
+        return os.path.join(self.directory, self.CHUNKS_FILE)
+
+    @property
+    def codes_path(self) -> str:
+        return os.path.join(self.directory, f"vectors_{self.precision}.npy")
+
+    @property
+    def scales_path(self) -> str:
+        return os.path.join(self.directory, self.SCALES_FILE)
+
+    def _load(self):
+        """Memory-map the vector matrix and load chunk texts and metadata."""
+        if not (os.path.exists(self.vectors_path) and os.path.exists(self.chunks_path)):
+            return
+
+        with open(self.chunks_path, 'r', encoding='utf-8') as f:
+            chunks = json.load(f)
+        if not chunks["ids"]:
+            return
+        vectors = np.load(self.vectors_path, mmap_mode='r')
+
+        if vectors.ndim != 2 or vectors.shape[0] != len(chunks["ids"]):
+            print("Warning: flat index files are inconsistent, ignoring them")
+            return
+
+        self.vectors = vectors
+        self.ids = chunks["ids"]
+        self.texts = chunks["texts"]
+        self.metadatas = chunks["metadatas"]
+        if self.precision != "float32":
+            self._load_codes()
+
+    def _load_codes(self):
+        """Memory-map the quantized matrix, creating it if it is missing or stale."""
+        try:
+            codes = np.load(self.codes_path, mmap_mode='r')
+            scales = np.load(self.scales_path) if self.precision == "int8" else None
+            if codes.shape == self.vectors.shape and (scales is None or len(scales) == len(codes)):
+                self.codes, self.scales = codes, scales
+                return
+        except (OSError, ValueError):
+            pass
+
+        if self.read_only:
+            print(f"Warning: no {self.precision} vectors in {self.directory}, quantizing in memory")
+            self.codes, self.scales = quantize_rows(self.vectors, self.precision)
+        else:
+            self._save_codes()
+
+    def _save_codes(self):
+        """Atomically write the quantized matrix (and scales) and memory-map it."""
+        codes, scales = quantize_rows(self.vectors, self.precision)
+        for path, array in ((self.codes_path, codes), (self.scales_path, scales)):
+            if array is None:
+                continue
+            with open(f"{path}.tmp", 'wb') as f:
+                np.save(f, array)
+            os.replace(f"{path}.tmp", path)
+        self.codes = np.load(self.codes_path, mmap_mode='r')
+        self.scales = scales
+
+    def _save(self):
+        """Atomically persist the index and re-open the matrix memory-mapped."""
+        os.makedirs(self.directory, exist_ok=True)
+
+        tmp_vectors = f"{self.vectors_path}.tmp"
+        with open(tmp_vectors, 'wb') as f:
+            np.save(f, np.ascontiguousarray(self.vectors, dtype=np.float32))
+        tmp_chunks = f"{self.chunks_path}.tmp"
+        with open(tmp_chunks, 'w', encoding='utf-8') as f:
+            json.dump(
+                {"ids": self.ids, "texts": self.texts, "metadatas": self.metadatas},
+                f,
+                ensure_ascii=False
+            )
+
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_chunks, self.chunks_path)
+        if self.count():
+            self.vectors = np.load(self.vectors_path, mmap_mode='r')
+        self._row_lookup = None
+        self.codes, self.scales = None, None
+        if self.count() and self.precision != "float32":
+            self._save_codes()
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("Flat index is opened read-only")
+
+    def count(self) -> int:
+        """Number of indexed chunks."""
+        return len(self.ids)
+
+    def get_all(self) -> List[Dict]:
+        """Return every chunk's id, content and metadata."""
+        return [
+            {'id': chunk_id, 'content': text, 'metadata': metadata}
+            for chunk_id, text, metadata in zip(self.ids, self.texts, self.metadatas)
+        ]
+
+    def reset(self):
+        """Remove every chunk from the index."""
+        self._check_writable()
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.ids, self.texts, self.metadatas = [], [], []
+        self._save()
+
+    def upsert(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict],
+        vectors: List[List[float]]
+    ):
+        """
+        Insert or replace chunks.
+
+        Args:
+            ids: Chunk IDs
+            texts: Chunk texts
+            metadatas: Chunk metadata dictionaries
+            vectors: Embeddings, one per chunk
+        """
+        self._check_writable()
+        if not ids:
+            return
+
+        new_vectors = normalize_rows(np.asarray(vectors, dtype=np.float32))
+        replaced = set(ids)
+        keep = [row for row, chunk_id in enumerate(self.ids) if chunk_id not in replaced]
+
+        if self.count():
+            self.vectors = np.concatenate([self.vectors[keep], new_vectors])
+        else:
+            self.vectors = new_vectors
+        self.ids = [self.ids[row] for row in keep] + list(ids)
+        self.texts = [self.texts[row] for row in keep] + list(texts)
+        self.metadatas = [self.metadatas[row] for row in keep] + list(metadatas)
+        self._save()
+
+    def delete(self, ids: List[str]):
+        """Delete chunks by ID."""
+        self._check_writable()
+        removed = set(ids)
+        keep = [row for row, chunk_id in enumerate(self.ids) if chunk_id not in removed]
+        if len(keep) == self.count():
+            return
+
+        self.vectors = np.asarray(self.vectors)[keep]
+        self.ids = [self.ids[row] for row in keep]
+        self.texts = [self.texts[row] for row in keep]
+        self.metadatas = [self.metadatas[row] for row in keep]
+        self._save()
+
+    def rows_for(self, ids: Iterable[str]) -> np.ndarray:
+        """Sorted row numbers of the given chunk IDs (unknown IDs are ignored)."""
+        if self._row_lookup is None:
+            self._row_lookup = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        rows = [self._row_lookup[chunk_id] for chunk_id in ids if chunk_id in self._row_lookup]
+        return np.array(sorted(rows), dtype=np.int64)
+
+    def _top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """Row indices of the k highest scores, best first."""
+        if k < len(scores):
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(len(scores))
+        return candidates[np.argsort(-scores[candidates])]
+
+    def _hit(self, row: int, similarity: float) -> Dict:
+        return {
+            'id': self.ids[row],
+            'content': self.texts[row],
+            'metadata': self.metadatas[row],
+            'score': float(2.0 - 2.0 * similarity)
+        }
+
+    def _scan(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Similarities of normalized queries to all (or the given) rows.
+
+        Uses the quantized matrix when there is one, widening it to float32
+        one block at a time so the full matrix is never copied.
+
+        Returns:
+            Matrix of shape (number of queries, number of rows)
+        """
+        if self.codes is None:
+            matrix = self.vectors if rows is None else self.vectors[rows]
+            return queries @ matrix.T
+
+        total = self.count() if rows is None else len(rows)
+        scores = np.empty((len(queries), total), dtype=np.float32)
+        for start in range(0, total, SCAN_BLOCK_ROWS):
+            end = start + SCAN_BLOCK_ROWS
+            block_rows = slice(start, end) if rows is None else rows[start:end]
+            block = np.asarray(self.codes[block_rows], dtype=np.float32)
+            scores[:, start:end] = queries @ block.T
+        if self.scales is not None:
+            scores *= self.scales if rows is None else self.scales[rows]
+        return scores
+
+    def _best_hits(
+        self,
+        query: np.ndarray,
+        scores: np.ndarray,
+        k: int,
+        rows: Optional[np.ndarray] = None
+    ) -> List[Dict]:
+        """
+        Turn one query's scan scores into its top-k hits.
+
+        Quantized scores only pick ``k * rerank_factor`` candidates, which
+        are then re-scored against the full-precision vectors.
+
+        Args:
+            query: Normalized query vector
+            scores: Scan scores for the query
+            k: Number of results
+            rows: Row numbers the scores refer to (all rows if None)
+        """
+        rerank = self.codes is not None and self.rerank_factor > 0
+        positions = self._top_k(scores, k * self.rerank_factor if rerank else k)
+        selected = positions if rows is None else rows[positions]
+        if not rerank:
+            return [self._hit(int(row), scores[position]) for row, position in zip(selected, positions)]
+
+        candidates = np.sort(selected)  # sequential reads from the float32 matrix
+        exact = self.vectors[candidates] @ query
+        return [self._hit(int(candidates[i]), exact[i]) for i in self._top_k(exact, k)]
+
+    def query(self, vector: List[float], k: int, ids: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Find the k nearest chunks to a query embedding.
+
+        Args:
+            vector: Query embedding
+            k: Number of results
+            ids: Only score these chunk IDs (all chunks if None)
+
+        Returns:
+            List of hits with id, content, metadata and distance score
+        """
+        return self.query_many([vector], k, ids=ids)[0]
+
+    def query_many(
+        self,
+        vectors: List[List[float]],
+        k: int,
+        ids: Optional[Iterable[str]] = None
+    ) -> List[List[Dict]]:
+        """
+        Find the k nearest chunks for several query embeddings in one pass.
+
+        Args:
+            vectors: Query embeddings
+            k: Number of results per query
+            ids: Only score these chunk IDs (all chunks if None)
+
+        Returns:
+            One hit list per query, shaped like the return value of ``query``
+        """
+        rows = None if ids is None else self.rows_for(ids)
+        if not self.count() or k <= 0 or not len(vectors) or (rows is not None and not len(rows)):
+            return [[] for _ in vectors]
+
+        queries = normalize_rows(np.asarray(vectors, dtype=np.float32))
+        similarities = self._scan(queries, rows)
+        return [
+            self._best_hits(query, scores, k, rows)
+            for query, scores in zip(queries, similarities)
+        ]
@@ -0,0 +1,243 @@
+"""Approximate nearest-neighbor index (IVF) built on top of the flat index."""
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.rag.flat_index import FlatIndex, normalize_rows
+
+
+def assign_to_centroids(vectors: np.ndarray, centroids: np.ndarray, block_size: int = 65536) -> np.ndarray:
+    """Assign each (normalized) vector to its most similar centroid, in blocks to bound memory."""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block_size):
+        block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def train_kmeans(
+    vectors: np.ndarray,
+    nlist: int,
+    iterations: int = 20,
+    sample_size: int = 50000,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Train spherical k-means centroids for an IVF index.
+
+    Args:
+        vectors: L2-normalized vectors (may be memory-mapped)
+        nlist: Number of centroids / inverted lists
+        iterations: Lloyd iterations
+        sample_size: Maximum number of vectors used for training
+        seed: Random seed, so rebuilding the same data gives the same index
+
+    Returns:
+        Normalized centroid matrix of shape (nlist, dim)
+    """
+    rng = np.random.default_rng(seed)
+    count = len(vectors)
+    if count > sample_size:
+        rows = np.sort(rng.choice(count, sample_size, replace=False))
+        data = np.asarray(vectors[rows], dtype=np.float32)
+    else:
+        data = np.asarray(vectors, dtype=np.float32)
+
+    nlist = min(nlist, len(data))
+    centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = assign_to_centroids(data, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, data)
+        counts = np.bincount(assignments, minlength=nlist)
+
+        # Re-seed empty lists with random points so every list stays useful
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+        centroids = normalize_rows(sums)
+
+    return centroids.astype(np.float32)
+
+
+class IVFIndex(FlatIndex):
+    """
+    Inverted-file index: vectors are clustered with k-means and a query only
+    scores the ``nprobe`` clusters whose centroids are closest to it.
+
+    Storage is shared with FlatIndex (the same memory-mapped matrix and
+    chunk data); the index adds centroids and per-row list assignments.
+    Small indexes are searched exactly until they reach ``min_train_size``,
+    and so are searches restricted to a subset of chunk IDs, since probing
+    a few lists could miss every allowed chunk.
+    """
+
+    CENTROIDS_FILE = "ivf_centroids.npy"
+    ASSIGNMENTS_FILE = "ivf_assignments.npy"
+    META_FILE = "ivf.json"
+
+    def __init__(
+        self,
+        directory: str,
+        nlist: int = 0,
+        nprobe: int = 8,
+        train_iterations: int = 20,
+        train_sample_size: int = 50000,
+        min_train_size: int = 1000,
+        read_only: bool = False,
+        precision: str = "float32",
+        rerank_factor: int = 4
+    ):
+        """
+        Open (or create) an IVF index.
+
+        Args:
+            directory: Directory holding the index files
+            nlist: Number of inverted lists (0 picks 4 * sqrt(n) at train time)
+            nprobe: Lists scored per query; higher is slower but more accurate
+            train_iterations: k-means iterations
+            train_sample_size: Maximum vectors used to train centroids
+            min_train_size: Below this many chunks the index searches exactly
+            read_only: Refuse modifications (used when serving snapshots)
+            precision: Scan representation: "float32", "float16" or "int8"
+            rerank_factor: Candidates per result re-ranked at full precision
+        """
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iterations = train_iterations
+        self.train_sample_size = train_sample_size
+        self.min_train_size = min_train_size
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments: Optional[np.ndarray] = None
+        self.trained_size = 0
+        self._list_rows: List[np.ndarray] = []
+        super().__init__(directory, read_only=read_only, precision=precision, rerank_factor=rerank_factor)
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.directory, filename)
+
+    def _load(self):
+        """Load the flat data plus centroids and list assignments."""
+        super()._load()
+        try:
+            with open(self._path(self.META_FILE), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            centroids = np.load(self._path(self.CENTROIDS_FILE))
+            assignments = np.load(self._path(self.ASSIGNMENTS_FILE), mmap_mode='r')
+        except (OSError, ValueError):
+            return
+
+        if len(assignments) != self.count():
+            print("Warning: IVF assignments do not match the index, ignoring them")
+            return
+        self.centroids = centroids
+        self.assignments = assignments
+        self.trained_size = meta.get("trained_size", 0)
+        self._build_lists()
+
+    def _build_lists(self):
+        """Group row numbers by inverted list for fast gathering at query time."""
+        order = np.argsort(self.assignments, kind="stable")
+        bounds = np.searchsorted(
+            np.asarray(self.assignments)[order],
+            np.arange(len(self.centroids) + 1)
+        )
+        self._list_rows = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+
+    def _needs_training(self) -> bool:
+        if self.count() < self.min_train_size:
+            return False
+        # Retrain when the corpus has grown enough that the clusters are stale
+        return self.centroids is None or self.count() > 2 * self.trained_size
+
+    def train(self):
+        """(Re)train centroids on the current vectors."""
+        nlist = self.nlist or max(1, int(4 * np.sqrt(self.count())))
+        self.centroids = train_kmeans(
+            self.vectors,
+            nlist,
+            iterations=self.train_iterations,
+            sample_size=self.train_sample_size
+        )
+        self.trained_size = self.count()
+
+    def _save(self):
+        """Persist vectors and chunks, then refresh centroids and assignments."""
+        super()._save()
+
+        if self.count() < self.min_train_size:
+            self.centroids = None
+            self.assignments = None
+            self._list_rows = []
+            for filename in (self.CENTROIDS_FILE, self.ASSIGNMENTS_FILE, self.META_FILE):
+                if os.path.exists(self._path(filename)):
+                    os.remove(self._path(filename))
+            return
+
+        if self._needs_training():
+            self.train()
+        self.assignments = assign_to_centroids(self.vectors, self.centroids)
+
+        for filename, array in (
+            (self.CENTROIDS_FILE, self.centroids),
+            (self.ASSIGNMENTS_FILE, self.assignments)
+        ):
+            with open(f"{self._path(filename)}.tmp", 'wb') as f:
+                np.save(f, array)
+            os.replace(f"{self._path(filename)}.tmp", self._path(filename))
+        with open(self._path(self.META_FILE), 'w', encoding='utf-8') as f:
+            json.dump({"nlist": len(self.centroids), "trained_size": self.trained_size}, f)
+        self._build_lists()
+
+    def query(
+        self,
+        vector: List[float],
+        k: int,
+        nprobe: Optional[int] = None,
+        ids: Optional[Iterable[str]] = None
+    ) -> List[Dict]:
+        """
+        Find approximately the k nearest chunks to a query embedding.
+
+        Args:
+            vector: Query embedding
+            k: Number of results
+            nprobe: Override the number of lists scored for this query
+            ids: Only score these chunk IDs (searched exactly)
+
+        Returns:
+            List of hits with id, content, metadata and distance score
+        """
+        if self.centroids is None or ids is not None:
+            return super().query_many([vector], k, ids=ids)[0]
+        if not self.count() or k <= 0:
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        probed = self._top_k(self.centroids @ query, nprobe)
+        rows = np.concatenate([self._list_rows[i] for i in probed])
+        if not len(rows):
+            return []
+        rows.sort()  # sequential access into the memory-mapped matrix
+
+        return self._best_hits(query, self._scan(query[None, :], rows)[0], k, rows)
+
+    def query_many(
+        self,
+        vectors: List[List[float]],
+        k: int,
+        nprobe: Optional[int] = None,
+        ids: Optional[Iterable[str]] = None
+    ) -> List[List[Dict]]:
+        """Approximate search for several query embeddings."""
+        if self.centroids is None or ids is not None:
+            return super().query_many(vectors, k, ids=ids)
+        return [self.query(vector, k, nprobe=nprobe) for vector in vectors]
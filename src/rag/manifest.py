@@ -0,0 +1,171 @@
+"""Content-hash manifest used for incremental knowledge base indexing."""
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+MANIFEST_FILENAME = "kb_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def content_hash(text: str) -> str:
+    """Return a stable SHA-256 hex digest for a piece of text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_chunk_ids(source: str, contents: Iterable[str]) -> List[str]:
+    """
+    Derive deterministic chunk IDs from chunk content.
+
+    The ID only depends on the source file and the chunk text, so an
+    unchanged chunk keeps its ID across rebuilds even when the chunks
+    around it change. Repeated identical chunks inside one file get an
+    occurrence suffix to keep IDs unique.
+
+    Args:
+        source: Knowledge base file the chunks come from
+        contents: Chunk texts in document order
+
+    Returns:
+        List of chunk IDs, one per chunk
+    """
+    ids = []
+    seen: Dict[str, int] = {}
+    for content in contents:
+        base = content_hash(f"{source}\0{content}")
+        occurrence = seen.get(base, 0)
+        seen[base] = occurrence + 1
+        ids.append(base if occurrence == 0 else content_hash(f"{base}#{occurrence}"))
+    return ids
+
+
+class IndexManifest:
+    """Tracks per-file and per-chunk content hashes of the indexed knowledge base."""
+
+    def __init__(
+        self,
+        path: str,
+        files: Dict = None,
+        chunks: Dict = None,
+        embedding_model: Optional[str] = None,
+        chunker: Optional[str] = None
+    ):
+        """
+        Initialize manifest.
+
+        Args:
+            path: Location of the manifest JSON file
+            files: Mapping of file path to {"hash", "chunks"}
+            chunks: Mapping of chunk ID to {"source", "hash"}
+            embedding_model: Identifier of the model the chunks were embedded with
+            chunker: Signature of the chunking settings the files were split with
+        """
+        self.path = path
+        self.files: Dict[str, Dict] = files or {}
+        self.chunks: Dict[str, Dict] = chunks or {}
+        self.embedding_model = embedding_model
+        self.chunker = chunker
+
+    @classmethod
+    def load(cls, path: str) -> "IndexManifest":
+        """Load a manifest from disk, returning an empty one if missing or unreadable."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(
+            path,
+            data.get("files", {}),
+            data.get("chunks", {}),
+            data.get("embedding_model"),
+            data.get("chunker")
+        )
+
+    def save(self):
+        """Atomically write the manifest to disk."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "embedding_model": self.embedding_model,
+                    "chunker": self.chunker,
+                    "files": self.files,
+                    "chunks": self.chunks
+                },
+                f,
+                indent=2,
+                sort_keys=True
+            )
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        """Forget all indexed files and chunks."""
+        self.files = {}
+        self.chunks = {}
+
+    def is_file_current(self, source: str, file_hash: str) -> bool:
+        """Check whether a file was indexed with exactly this content."""
+        entry = self.files.get(source)
+        return entry is not None and entry["hash"] == file_hash
+
+    def update_file(
+        self,
+        source: str,
+        file_hash: str,
+        chunk_ids: List[str],
+        chunk_contents: List[str]
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Record the new chunking of a file and compute what changed.
+
+        Args:
+            source: Knowledge base file path
+            file_hash: Content hash of the whole file
+            chunk_ids: IDs of the file's current chunks
+            chunk_contents: Texts of the file's current chunks
+
+        Returns:
+            Tuple of (chunk IDs to add, chunk IDs to delete)
+        """
+        old_ids = self.files.get(source, {}).get("chunks", [])
+        new_id_set = set(chunk_ids)
+        old_id_set = set(old_ids)
+
+        added = [chunk_id for chunk_id in chunk_ids if chunk_id not in old_id_set]
+        removed = [chunk_id for chunk_id in old_ids if chunk_id not in new_id_set]
+
+        for chunk_id in removed:
+            self.chunks.pop(chunk_id, None)
+        for chunk_id, content in zip(chunk_ids, chunk_contents):
+            self.chunks[chunk_id] = {"source": source, "hash": content_hash(content)}
+        self.files[source] = {"hash": file_hash, "chunks": list(chunk_ids)}
+
+        return added, removed
+
+    def remove_file(self, source: str) -> List[str]:
+        """
+        Drop a file that no longer exists.
+
+        Returns:
+            Chunk IDs that belonged to the file and must be deleted
+        """
+        entry = self.files.pop(source, None)
+        if not entry:
+            return []
+        for chunk_id in entry["chunks"]:
+            self.chunks.pop(chunk_id, None)
+        return list(entry["chunks"])
+
+    @property
+    def chunk_count(self) -> int:
+        """Number of chunks recorded in the manifest."""
+        return len(self.chunks)
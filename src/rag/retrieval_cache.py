@@ -0,0 +1,180 @@
+"""In-memory caches for retrieval results: exact (normalized text) and semantic (embedding)."""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+
+
+CONTRACTIONS = {
+    "what's": "what is", "where's": "where is", "how's": "how is", "when's": "when is",
+    "who's": "who is", "it's": "it is", "that's": "that is", "there's": "there is",
+    "i'm": "i am", "i've": "i have", "i'd": "i would", "i'll": "i will",
+    "you're": "you are", "we're": "we are", "they're": "they are",
+    "don't": "do not", "doesn't": "does not", "didn't": "did not", "can't": "cannot",
+    "won't": "will not", "isn't": "is not", "aren't": "are not", "haven't": "have not",
+}
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, expand contractions, drop punctuation and collapse whitespace."""
+    text = query.lower().replace("’", "'")
+    text = re.sub(r"[a-z]+'[a-z]+", lambda match: CONTRACTIONS.get(match.group(0), match.group(0)), text)
+    text = re.sub(r"[^\w\s-]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry time-to-live and hit/miss counters."""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600):
+        """
+        Initialize cache.
+
+        Args:
+            max_size: Maximum number of entries before the least recently used is evicted
+            ttl_seconds: Entries older than this are treated as missing
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[1] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+class SemanticCache:
+    """
+    Reuses results for queries whose embedding is within a cosine threshold
+    of a previously answered query. LRU and TTL eviction like TTLCache.
+    """
+
+    def __init__(self, max_size: int = 512, ttl_seconds: float = 3600, threshold: float = 0.95):
+        """
+        Initialize cache.
+
+        Args:
+            max_size: Maximum number of cached queries
+            ttl_seconds: Entries older than this are ignored and evicted
+            threshold: Minimum cosine similarity for a query to reuse results
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # id -> (vector, namespace, value, time)
+        self._next_id = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[int] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if now - entry[3] > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def get(self, vector, namespace: Hashable = None) -> Optional[Any]:
+        """
+        Find a cached value for a similar query.
+
+        Args:
+            vector: Query embedding
+            namespace: Only entries stored with the same namespace match
+                (e.g. the requested number of results)
+
+        Returns:
+            The cached value of the most similar query above the threshold, or None
+        """
+        with self._lock:
+            self._expire()
+            if not self._entries:
+                self.misses += 1
+                return None
+            if self._matrix is None:
+                self._matrix_ids = list(self._entries)
+                self._matrix = np.stack([self._entries[key][0] for key in self._matrix_ids])
+
+            similarities = self._matrix @ self._normalize(vector)
+            for row in np.argsort(-similarities):
+                if similarities[row] < self.threshold:
+                    break
+                key = self._matrix_ids[row]
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] == namespace:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+
+            self.misses += 1
+            return None
+
+    def put(self, vector, value: Any, namespace: Hashable = None):
+        """Store a value under a query embedding."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[self._next_id] = (self._normalize(vector), namespace, value, time.monotonic())
+            self._next_id += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
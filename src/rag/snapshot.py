@@ -0,0 +1,112 @@
+"""Versioned on-disk index layout: generation directories plus a CURRENT pointer."""
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+CURRENT_FILE = "CURRENT"
+SNAPSHOT_INFO_FILE = "snapshot.json"
+
+# Snapshots are served memory-mapped, so only the NumPy backends qualify
+SNAPSHOT_BACKENDS = ("flat", "ivf")
+
+
+def new_version_name(prefix: str = "gen") -> str:
+    """Return a unique, chronologically sortable directory name."""
+    return f"{prefix}-{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+
+
+def read_current(base_directory: str) -> Optional[str]:
+    """
+    Return the version named by ``<base_directory>/CURRENT``.
+
+    Returns:
+        The version name, or None if there is no pointer or it names a
+        directory that does not exist
+    """
+    try:
+        with open(os.path.join(base_directory, CURRENT_FILE), 'r', encoding='utf-8') as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    if version and os.path.isdir(os.path.join(base_directory, version)):
+        return version
+    return None
+
+
+def write_current(base_directory: str, version: str):
+    """Atomically point ``<base_directory>/CURRENT`` at a version."""
+    path = os.path.join(base_directory, CURRENT_FILE)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(f"{path}.tmp", path)
+
+
+def version_time(base_directory: str, version: str) -> float:
+    """When a version was created: the time in its name, or the directory's mtime for other names."""
+    try:
+        return datetime.strptime(version.split("-")[-2], "%Y%m%d%H%M%S%f").timestamp()
+    except (IndexError, ValueError):
+        return os.path.getmtime(os.path.join(base_directory, version))
+
+
+def list_versions(base_directory: str, prefix: str = "") -> List[str]:
+    """Version directories under a base directory (optionally only names with a prefix), oldest first."""
+    if not os.path.isdir(base_directory):
+        return []
+    return sorted(
+        name for name in os.listdir(base_directory)
+        if name.startswith(prefix) and os.path.isdir(os.path.join(base_directory, name))
+    )
+
+
+def write_snapshot_info(directory: str, info: Dict):
+    """Write the snapshot description (backend, model, counts) into a snapshot directory."""
+    path = os.path.join(directory, SNAPSHOT_INFO_FILE)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(info, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def load_snapshot_info(directory: str) -> Optional[Dict]:
+    """Read a snapshot description, or None if the directory is not a complete snapshot."""
+    try:
+        with open(os.path.join(directory, SNAPSHOT_INFO_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def prune_versions(base_directory: str, keep: int, grace_seconds: float = 0, prefix: str = "") -> List[str]:
+    """
+    Delete all but the ``keep`` newest versions, never the current one.
+
+    Processes that still serve a deleted snapshot keep working: its vector
+    files stay mapped until they are closed.
+
+    Args:
+        base_directory: Directory holding the versions
+        keep: Number of newest versions to keep
+        grace_seconds: Keep a version until the next newer one has existed
+            this long, so processes that have not switched yet are not cut off
+        prefix: Only consider versions whose names start with this
+
+    Returns:
+        Names of the deleted versions
+    """
+    current = read_current(base_directory)
+    versions = list_versions(base_directory, prefix)
+    now = time.time()
+    removed = []
+    for position, version in enumerate(versions[:max(len(versions) - keep, 0)]):
+        if version == current:
+            continue
+        if grace_seconds > 0 and now - version_time(base_directory, versions[position + 1]) < grace_seconds:
+            continue
+        shutil.rmtree(os.path.join(base_directory, version), ignore_errors=True)
+        removed.append(version)
+    return removed
@@ -0,0 +1,61 @@
+"""Token counting for prompt budgeting."""
+import threading
+from functools import lru_cache
+
+
+# Rough characters-per-token ratio used when tiktoken is not installed
+_FALLBACK_CHARS_PER_TOKEN = 4
+
+_encoding_lock = threading.Lock()
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    """Load the tiktoken encoding for a model once, or None if tiktoken is unavailable."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    with _encoding_lock:
+        try:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # tiktoken downloads encodings on first use; estimate when offline
+            print(f"Warning: could not load tokenizer for {model}, estimating token counts: {e}")
+            return None
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    """
+    Count the tokens a model would see for a piece of text.
+
+    Args:
+        text: Text to count
+        model: Model whose tokenizer should be used
+
+    Returns:
+        Number of tokens (estimated from length if tiktoken is missing)
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return max(1, len(text) // _FALLBACK_CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4") -> str:
+    """Cut text down to at most max_tokens tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * _FALLBACK_CHARS_PER_TOKEN]
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
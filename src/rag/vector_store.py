@@ -1,11 +1,11 @@
-"""Vector store implementation using ChromaDB for RAG."""
+"""Vector store implementation for RAG (ChromaDB or in-process NumPy index)."""
+import asyncio
+import functools
 import os
+import shutil
 import sys
-import chromadb
-from chromadb.config import Settings
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import threading
+import time
 from langchain_community.document_loaders import DirectoryLoader, TextLoader
 
 # Add project root to path
@@ -14,135 +14,861 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 import config
+from src.rag.bm25 import BM25Index
+from src.rag.chunker import HEADING_SEPARATOR, MarkdownChunker
+from src.rag.context_packer import pack_context
+from src.rag.embeddings import create_embeddings
+from src.rag.retrieval_cache import SemanticCache, TTLCache, normalize_query
+from src.rag.snapshot import (
+    SNAPSHOT_BACKENDS,
+    load_snapshot_info,
+    new_version_name,
+    prune_versions,
+    read_current,
+    write_current,
+    write_snapshot_info,
+)
+from src.rag.manifest import (
+    IndexManifest,
+    MANIFEST_FILENAME,
+    content_hash,
+    make_chunk_ids,
+)
+
+
+# Metadata a search can be restricted to (see VectorStore.search)
+FILTER_KEYS = ("source", "heading_path", "category")
+
+
+class _IndexState:
+    """
+    Everything a search reads: the index plus the lookups derived from it.
+    
+    A state is never modified after construction. Reloads build a new state
+    and swap the reference, so in-flight searches finish on the state they
+    started with.
+    """
+    
+    def __init__(self, index, directory: str, version: str):
+        """
+        Build keyword and section lookups over an opened index.
+        
+        Args:
+            index: Opened index backend
+            directory: Generation directory the index lives in
+            version: Generation name, used to namespace cache entries
+        """
+        self.index = index
+        self.directory = directory
+        self.version = version
+        
+        chunks = index.get_all()
+        self.chunks = {chunk['id']: chunk for chunk in chunks}
+        # Chunk IDs hash chunk contents, so this changes exactly when the content does
+        self.content_version = content_hash("\n".join(sorted(self.chunks)))[:16]
+        self.keyword_index = BM25Index()
+        self.keyword_index.build(
+            [chunk['id'] for chunk in chunks],
+            [chunk['content'] for chunk in chunks]
+        )
+        
+        # Every heading path prefix (and every merged sub-heading) maps to its chunks
+        self.section_index = {}
+        for chunk in chunks:
+            path = chunk['metadata'].get('heading_path', '')
+            parts = path.split(HEADING_SEPARATOR) if path else []
+            keys = {HEADING_SEPARATOR.join(parts[:depth]) for depth in range(1, len(parts) + 1)}
+            for heading in filter(None, chunk['metadata'].get('headings', '').split(" | ")):
+                if not parts or parts[-1] != heading:
+                    keys.add(HEADING_SEPARATOR.join(parts + [heading]))
+            for key in keys:
+                self.section_index.setdefault(key, []).append(chunk['id'])
+        
+        # Filter value -> chunk IDs, so filtered searches never scan metadata.
+        # Sources match by file name with or without extension; categories
+        # are the headings below the document title (product categories in
+        # products.md), case-insensitively.
+        self.metadata_index = {'source': {}, 'category': {}}
+        for chunk in chunks:
+            metadata = chunk['metadata']
+            name = os.path.basename(metadata.get('source', '')).lower()
+            for key in {name, os.path.splitext(name)[0]}:
+                self.metadata_index['source'].setdefault(key, set()).add(chunk['id'])
+            
+            path = metadata.get('heading_path', '')
+            categories = path.split(HEADING_SEPARATOR)[1:] if path else []
+            categories += metadata.get('headings', '').split(" | ")
+            for category in filter(None, categories):
+                self.metadata_index['category'].setdefault(category.lower(), set()).add(chunk['id'])
 
 
 class VectorStore:
     """Manages vector store for RAG retrieval."""
     
-    def __init__(self):
-        """Initialize vector store with embeddings."""
-        self.embeddings = OpenAIEmbeddings(
-            model=config.Config.EMBEDDING_MODEL,
-            openai_api_key=config.Config.OPENAI_API_KEY
-        )
-        self.persist_directory = config.Config.CHROMA_PERSIST_DIR
+    def __init__(self, load_index: bool = True):
+        """
+        Initialize vector store with embeddings.
+        
+        When ``Config.INDEX_SNAPSHOT_DIR`` is set the prebuilt snapshot is
+        opened read-only and nothing is embedded at startup. Otherwise the
+        index under the backend's directory is built or updated in place.
+        
+        Args:
+            load_index: Open the index for serving; the offline builder
+                passes False and only calls ``build_snapshot``
+        """
+        self.embeddings, self.embedding_model_id = create_embeddings()
+        self.backend = config.Config.INDEX_BACKEND.lower()
+        self.snapshot_dir = config.Config.INDEX_SNAPSHOT_DIR or None
+        if self.snapshot_dir:
+            self.base_directory = self.snapshot_dir
+        elif self.backend == "chroma":
+            self.base_directory = config.Config.CHROMA_PERSIST_DIR
+        else:
+            self.base_directory = config.Config.FLAT_INDEX_DIR
         self.collection_name = config.Config.COLLECTION_NAME
         
-        # Ensure persist directory exists
-        os.makedirs(self.persist_directory, exist_ok=True)
+        self.chunker = MarkdownChunker(
+            max_chunk_size=config.Config.CHUNK_MAX_SIZE,
+            min_chunk_size=config.Config.CHUNK_MIN_SIZE
+        )
         
-        self.vectorstore = None
-        self._initialize_store()
+        # Exact (normalized text) and semantic (embedding) retrieval caches
+        self.query_cache = TTLCache(
+            max_size=config.Config.RETRIEVAL_CACHE_SIZE,
+            ttl_seconds=config.Config.RETRIEVAL_CACHE_TTL
+        )
+        self.semantic_cache = SemanticCache(
+            max_size=config.Config.SEMANTIC_CACHE_SIZE,
+            ttl_seconds=config.Config.RETRIEVAL_CACHE_TTL,
+            threshold=config.Config.SEMANTIC_CACHE_THRESHOLD
+        )
+        
+        self._state = None
+        self._reload_lock = threading.Lock()
+        self._watcher_stop = threading.Event()
+        self.last_reload = None
+        self.last_reload_error = None
+        if load_index:
+            self._initialize_store()
+    
+    # The current state's parts, for callers that only need a quick look
+    @property
+    def index(self):
+        return self._state.index
+    
+    @property
+    def chunks(self) -> dict:
+        return self._state.chunks
+    
+    @property
+    def keyword_index(self) -> BM25Index:
+        return self._state.keyword_index
+    
+    @property
+    def section_index(self) -> dict:
+        return self._state.section_index
+    
+    @property
+    def persist_directory(self) -> str:
+        return self._state.directory
+    
+    @property
+    def version(self) -> str:
+        """Name of the index generation currently served."""
+        return self._state.version
+    
+    @property
+    def content_version(self) -> str:
+        """Hash of the served knowledge base content; stable across rebuilds of unchanged content."""
+        return self._state.content_version
+    
+    def _create_index(self, directory: str, backend: str = None, read_only: bool = False):
+        """
+        Open an index backend (``Config.INDEX_BACKEND`` unless given).
+        
+        Args:
+            directory: Directory holding the index files
+            backend: "chroma", "flat" or "ivf"
+            read_only: Open a NumPy index without allowing modifications
+        """
+        backend = backend or self.backend
+        if backend == "chroma":
+            # Imported lazily so the NumPy backend does not pay for chromadb
+            from src.rag.chroma_index import ChromaIndex
+            return ChromaIndex(directory, self.collection_name)
+        if backend == "flat":
+            from src.rag.flat_index import FlatIndex
+            return FlatIndex(
+                directory,
+                read_only=read_only,
+                precision=config.Config.INDEX_PRECISION,
+                rerank_factor=config.Config.INDEX_RERANK_FACTOR
+            )
+        if backend == "ivf":
+            from src.rag.ivf_index import IVFIndex
+            return IVFIndex(
+                directory,
+                nlist=config.Config.IVF_NLIST,
+                nprobe=config.Config.IVF_NPROBE,
+                train_iterations=config.Config.IVF_TRAIN_ITERATIONS,
+                train_sample_size=config.Config.IVF_TRAIN_SAMPLE_SIZE,
+                min_train_size=config.Config.IVF_MIN_TRAIN_SIZE,
+                read_only=read_only,
+                precision=config.Config.INDEX_PRECISION,
+                rerank_factor=config.Config.INDEX_RERANK_FACTOR
+            )
+        raise ValueError(f"Unknown index backend: {backend}")
     
     def _initialize_store(self):
-        """Initialize or load existing vector store."""
-        try:
-            # Try to load existing vector store
-            self.vectorstore = Chroma(
-                persist_directory=self.persist_directory,
-                embedding_function=self.embeddings,
-                collection_name=self.collection_name
+        """Initialize or load existing vector store and bring it up to date."""
+        if self.snapshot_dir:
+            self._state = self._open_snapshot()
+            self.invalidate_caches()
+            return
+        
+        os.makedirs(self.base_directory, exist_ok=True)
+        generation = read_current(self.base_directory) or new_version_name()
+        directory = os.path.join(self.base_directory, generation)
+        
+        # Nothing is being served yet, so the generation is updated in place
+        index = self._create_index(directory)
+        self._build_knowledge_base(index, directory)
+        self._state = _IndexState(index, directory, generation)
+        write_current(self.base_directory, generation)
+        self.invalidate_caches()
+        self._remove_old_generations()
+    
+    def _open_snapshot(self) -> _IndexState:
+        """Open the snapshot named by the snapshot directory's CURRENT file read-only."""
+        version = read_current(self.snapshot_dir)
+        if version is None:
+            raise RuntimeError(
+                f"No index snapshot found in {self.snapshot_dir}; "
+                "build one with: python build_index.py"
+            )
+        directory = os.path.join(self.snapshot_dir, version)
+        info = load_snapshot_info(directory)
+        if info is None:
+            raise RuntimeError(f"Index snapshot {version} is incomplete")
+        if info["embedding_model"] != self.embedding_model_id:
+            raise RuntimeError(
+                f"Index snapshot {version} was embedded with {info['embedding_model']}, "
+                f"but the configured embedding model is {self.embedding_model_id}"
             )
-            # Check if collection has documents
-            if self.vectorstore._collection.count() == 0:
-                self._build_knowledge_base()
+        
+        index = self._create_index(directory, backend=info["backend"], read_only=True)
+        print(f"Loaded index snapshot {version} ({index.count()} chunks)")
+        return _IndexState(index, directory, version)
+    
+    def build_snapshot(self, output_dir: str, backend: str = "flat") -> str:
+        """
+        Build a versioned, read-only index snapshot for servers to open.
+        
+        The newest snapshot of the same backend is copied and updated
+        incrementally, so only changed chunks are embedded. ``CURRENT`` is
+        switched to the new version only once it is complete.
+        
+        Args:
+            output_dir: Directory holding the snapshot versions
+            backend: "flat" or "ivf"
+        
+        Returns:
+            Name of the new snapshot version
+        """
+        if backend not in SNAPSHOT_BACKENDS:
+            raise ValueError(f"Snapshots support {', '.join(SNAPSHOT_BACKENDS)}, not {backend}")
+        os.makedirs(output_dir, exist_ok=True)
+        
+        version = new_version_name("snap")
+        directory = os.path.join(output_dir, version)
+        previous = read_current(output_dir)
+        previous_info = load_snapshot_info(os.path.join(output_dir, previous)) if previous else None
+        try:
+            if previous_info and previous_info["backend"] == backend:
+                shutil.copytree(os.path.join(output_dir, previous), directory)
+            index = self._create_index(directory, backend=backend)
+            self._build_knowledge_base(index, directory)
+            
+            dimension = index.vectors.shape[1] if index.count() else 0
+            write_snapshot_info(directory, {
+                "version": version,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "backend": backend,
+                "embedding_model": self.embedding_model_id,
+                "chunker": self.chunker.signature,
+                "precision": index.precision,
+                "chunk_count": index.count(),
+                "dimension": int(dimension)
+            })
+        except Exception:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+        
+        write_current(output_dir, version)
+        return version
+    
+    def reload(self, force: bool = False) -> bool:
+        """
+        Rebuild the index from the knowledge base and swap it in atomically.
+        
+        The current generation is copied to a new directory and updated
+        incrementally there while searches keep using the live index. The
+        new state then replaces the old one with a single reference swap.
+        When serving a snapshot nothing is built: the snapshot that
+        ``CURRENT`` points to is opened instead.
+        
+        Args:
+            force: Rebuild even if no knowledge base file changed
+        
+        Returns:
+            True if a new index generation was swapped in
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            print("Knowledge base reload already in progress")
+            return False
+        
+        directory = None
+        try:
+            current = self._state
+            if self.snapshot_dir:
+                return self._reload_snapshot(current, force)
+            if not force and not self._knowledge_base_changed(current.directory):
+                # The served index matches the files, so an earlier failure no longer applies
+                self.last_reload_error = None
+                return False
+            
+            generation = new_version_name()
+            directory = os.path.join(self.base_directory, generation)
+            shutil.copytree(current.directory, directory)
+            
+            index = self._create_index(directory)
+            self._build_knowledge_base(index, directory)
+            state = _IndexState(index, directory, generation)
+            
+            self._state = state
+            write_current(self.base_directory, generation)
+            self.invalidate_caches()
+            
+            self._remove_old_generations()
+            self.last_reload = time.time()
+            self.last_reload_error = None
+            print(f"Knowledge base reloaded as {generation} ({index.count()} chunks)")
+            return True
         except Exception as e:
-            print(f"Initializing new vector store: {e}")
-            self._build_knowledge_base()
+            print(f"Error reloading knowledge base: {e}")
+            self.last_reload_error = str(e)
+            if directory and (self._state is None or self._state.directory != directory):
+                shutil.rmtree(directory, ignore_errors=True)
+            return False
+        finally:
+            self._reload_lock.release()
+    
+    def _reload_snapshot(self, current: _IndexState, force: bool) -> bool:
+        """Swap in the snapshot CURRENT points to, if it is not the one being served."""
+        if not force and read_current(self.snapshot_dir) == current.version:
+            return False
+        self._state = self._open_snapshot()
+        self.invalidate_caches()
+        self.last_reload = time.time()
+        self.last_reload_error = None
+        return True
     
-    def _build_knowledge_base(self):
-        """Build knowledge base from markdown files."""
-        print("Building knowledge base from documents...")
+    def reload_in_background(self, force: bool = False) -> bool:
+        """
+        Start ``reload`` on a background thread.
         
-        # Load documents from knowledge base directory
-        loader = DirectoryLoader(
-            config.Config.KNOWLEDGE_BASE_DIR,
-            glob="**/*.md",
-            loader_cls=TextLoader,
-            loader_kwargs={'encoding': 'utf-8'}
+        Returns:
+            False if a reload is already running
+        """
+        if self._reload_lock.locked():
+            return False
+        threading.Thread(target=self.reload, args=(force,), daemon=True).start()
+        return True
+    
+    def reload_status(self) -> dict:
+        """Current generation and the outcome of the last reload."""
+        return {
+            'version': self.version,
+            'reloading': self._reload_lock.locked(),
+            'last_reload': self.last_reload,
+            'last_error': self.last_reload_error
+        }
+    
+    def _remove_old_generations(self):
+        """
+        Delete generations older than the current one and its predecessor.
+        
+        This covers generations left by earlier runs as well as this
+        process's own reloads. A generation is only deleted once the next
+        newer one has existed for ``Config.INDEX_GENERATION_GRACE_SECONDS``,
+        so other workers still serving it have time to switch. Searches that
+        are still running on an older state keep their own reference to it.
+        """
+        removed = prune_versions(
+            self.base_directory,
+            keep=2,
+            grace_seconds=config.Config.INDEX_GENERATION_GRACE_SECONDS,
+            prefix="gen-"
         )
-        documents = loader.load()
+        if removed:
+            print(f"Removed old index generations: {', '.join(removed)}")
+    
+    def _knowledge_base_snapshot(self) -> dict:
+        """
+        Cheap fingerprint (mtime, size) of every knowledge base file.
         
+        When serving a snapshot the snapshot pointer is watched instead.
+        """
+        if self.snapshot_dir:
+            return {'current': read_current(self.snapshot_dir)}
+        snapshot = {}
+        for root, _, files in os.walk(config.Config.KNOWLEDGE_BASE_DIR):
+            for name in files:
+                if name.endswith(".md"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+    
+    def _knowledge_base_changed(self, directory: str) -> bool:
+        """Whether any knowledge base file differs from what the generation indexed."""
+        manifest = IndexManifest.load(os.path.join(directory, MANIFEST_FILENAME))
+        documents = self._load_documents()
+        sources = {document.metadata["source"] for document in documents}
+        if sources != set(manifest.files):
+            return True
+        return any(
+            not manifest.is_file_current(document.metadata["source"], content_hash(document.page_content))
+            for document in documents
+        )
+    
+    def start_watcher(self, interval: float):
+        """
+        Poll the knowledge base directory and reload in the background on changes.
+        
+        Args:
+            interval: Seconds between polls
+        """
+        def watch():
+            snapshot = self._knowledge_base_snapshot()
+            while not self._watcher_stop.wait(interval):
+                current = self._knowledge_base_snapshot()
+                if current != snapshot:
+                    print("Knowledge base change detected, reloading...")
+                    if self.reload():
+                        snapshot = current
+                    elif not self._reload_lock.locked() and self.last_reload_error is None:
+                        # Nothing to index (e.g. only mtimes changed)
+                        snapshot = current
+                    # Otherwise the reload failed or another one is running: retry on the next poll
+        
+        self._watcher_stop.clear()
+        threading.Thread(target=watch, name="kb-watcher", daemon=True).start()
+    
+    def stop_watcher(self):
+        """Stop the knowledge base watcher thread."""
+        self._watcher_stop.set()
+    
+    def invalidate_caches(self):
+        """Drop cached retrieval results; must be called whenever the index changes."""
+        self.query_cache.clear()
+        self.semantic_cache.clear()
+    
+    def cache_stats(self) -> dict:
+        """Hit/miss counters and sizes of the retrieval caches."""
+        return {
+            'query_cache': self.query_cache.stats(),
+            'semantic_cache': self.semantic_cache.stats()
+        }
+    
+    def _build_knowledge_base(self, index, directory: str):
+        """
+        Incrementally index the markdown files of the knowledge base.
+        
+        Files whose content hash matches the manifest are skipped entirely.
+        Changed files are re-chunked and only chunks that are new are
+        embedded; chunks that disappeared are deleted from the collection.
+        
+        Args:
+            index: Index backend to update
+            directory: Directory holding the index and its manifest
+        """
+        manifest = IndexManifest.load(
+            os.path.join(directory, MANIFEST_FILENAME)
+        )
+        
+        # A manifest that disagrees with the collection (e.g. the collection
+        # was wiped, the manifest is stale or the embedding model or chunking
+        # settings changed) cannot be trusted: start over.
+        if (manifest.chunk_count != index.count()
+                or manifest.embedding_model not in (None, self.embedding_model_id)
+                or manifest.chunker not in (None, self.chunker.signature)):
+            print("Knowledge base manifest out of sync, rebuilding from scratch...")
+            if index.count() > 0:
+                index.reset()
+            manifest.reset()
+        manifest.embedding_model = self.embedding_model_id
+        manifest.chunker = self.chunker.signature
+        
+        documents = self._load_documents()
         if not documents:
             print("Warning: No documents found in knowledge base directory")
-            return
         
-        # Split documents into chunks
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-        )
-        chunks = text_splitter.split_documents(documents)
+        chunks_to_add = []
+        ids_to_add = []
+        ids_to_delete = []
+        current_sources = set()
+        
+        for document in documents:
+            source = document.metadata["source"]
+            current_sources.add(source)
+            file_hash = content_hash(document.page_content)
+            if manifest.is_file_current(source, file_hash):
+                continue
+            
+            chunks = self.chunker.split_text(document.page_content, source)
+            contents = [chunk['content'] for chunk in chunks]
+            chunk_ids = make_chunk_ids(source, contents)
+            added, removed = manifest.update_file(source, file_hash, chunk_ids, contents)
+            
+            added_set = set(added)
+            for chunk, chunk_id in zip(chunks, chunk_ids):
+                if chunk_id in added_set:
+                    chunks_to_add.append(chunk)
+                    ids_to_add.append(chunk_id)
+            ids_to_delete.extend(removed)
+        
+        for source in list(manifest.files):
+            if source not in current_sources:
+                ids_to_delete.extend(manifest.remove_file(source))
+        
+        if not chunks_to_add and not ids_to_delete:
+            print(f"Knowledge base up to date ({manifest.chunk_count} chunks)")
+            return
         
-        print(f"Created {len(chunks)} document chunks")
+        if ids_to_delete:
+            index.delete(ids_to_delete)
+        if chunks_to_add:
+            texts = [chunk['content'] for chunk in chunks_to_add]
+            index.upsert(
+                ids=ids_to_add,
+                texts=texts,
+                metadatas=[chunk['metadata'] for chunk in chunks_to_add],
+                vectors=self.embeddings.embed_documents(texts)
+            )
+        manifest.save()
         
-        # Create vector store from chunks
-        self.vectorstore = Chroma.from_documents(
-            documents=chunks,
-            embedding=self.embeddings,
-            persist_directory=self.persist_directory,
-            collection_name=self.collection_name
+        print(
+            f"Knowledge base updated: {len(chunks_to_add)} chunks embedded, "
+            f"{len(ids_to_delete)} removed, {manifest.chunk_count} total"
+        )
+    
+    def _load_documents(self) -> list:
+        """Load every markdown file of the knowledge base directory."""
+        loader = DirectoryLoader(
+            config.Config.KNOWLEDGE_BASE_DIR,
+            glob="**/*.md",
+            loader_cls=TextLoader,
+            loader_kwargs={'encoding': 'utf-8'}
         )
+        return loader.load()
+    
+    def get_section(self, heading_path: str) -> list:
+        """
+        Get the chunks under a heading.
         
-        print(f"Knowledge base built with {len(chunks)} chunks")
+        Args:
+            heading_path: Headings joined with " > ", starting at the document
+                title (e.g. "Product Information > Electronics")
+        
+        Returns:
+            List of chunks with content and metadata, in index order
+        """
+        state = self._state
+        return [
+            {
+                'content': state.chunks[chunk_id]['content'],
+                'metadata': state.chunks[chunk_id]['metadata']
+            }
+            for chunk_id in state.section_index.get(heading_path, [])
+        ]
     
-    def search(self, query: str, k: int = None) -> list:
+    def search(self, query: str, k: int = None, filters: dict = None) -> list:
         """
         Search for relevant documents.
         
         Args:
             query: Search query
             k: Number of results to return (defaults to config value)
+            filters: Optional metadata filters, e.g.
+                ``{"source": "products.md", "category": "laptops"}``.
+                Keys are ``source`` (file name), ``heading_path`` (a heading
+                path or any prefix of one) and ``category`` (a heading below
+                the document title); values are a string or a list of
+                alternatives. Different keys must all match.
+        
+        Returns:
+            List of relevant document chunks with metadata. ``score`` is the
+            vector distance (lower is better), or None for chunks that were
+            only matched by keyword search.
+        """
+        return self.search_many([query], k, filters)[0]
+    
+    def search_many(self, queries: list, k: int = None, filters: dict = None) -> list:
+        """
+        Search for several queries at once.
+        
+        Queries that miss the caches and the keyword fast path are embedded
+        in a single batched call and scored against the index in one pass.
+        
+        Args:
+            queries: Search queries
+            k: Number of results per query (defaults to config value)
+            filters: Metadata filters applied to every query, as in ``search``
         
         Returns:
-            List of relevant document chunks with metadata
+            One result list per query, in the same order, each shaped like
+            the return value of ``search``
         """
         if k is None:
             k = config.Config.TOP_K_RESULTS
+        filters = self._normalize_filters(filters)
         
         try:
-            # Perform similarity search
-            results = self.vectorstore.similarity_search_with_score(
-                query, k=k
-            )
-            
-            # Filter by similarity threshold
-            filtered_results = [
-                {
-                    'content': doc.page_content,
-                    'metadata': doc.metadata,
-                    'score': score
-                }
-                for doc, score in results
-                if score <= (1 - config.Config.SIMILARITY_THRESHOLD)
-            ]
-            
-            return filtered_results
+            results = self._search_batch(queries, k, filters)
         except Exception as e:
             print(f"Error during search: {e}")
-            return []
+            return [[] for _ in queries]
+        
+        # Callers get their own copies so cached entries cannot be modified
+        return [[dict(result) for result in query_results] for query_results in results]
+    
+    async def asearch(self, query: str, k: int = None, filters: dict = None) -> list:
+        """Async variant of ``search`` that runs off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.search, query, k, filters))
+    
+    async def asearch_many(self, queries: list, k: int = None, filters: dict = None) -> list:
+        """Async variant of ``search_many`` that runs off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.search_many, queries, k, filters))
     
-    def get_relevant_context(self, query: str) -> str:
+    async def abuild_context(self, query: str, filters: dict = None) -> dict:
+        """Async variant of ``build_context`` that runs off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.build_context, query, filters))
+    
+    @staticmethod
+    def _normalize_filters(filters: dict) -> tuple:
+        """Validate filters and turn them into a hashable, order-independent key."""
+        if not filters:
+            return ()
+        normalized = []
+        for key, values in filters.items():
+            if key not in FILTER_KEYS:
+                raise ValueError(f"Unknown search filter: {key}")
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            normalized.append((key, tuple(sorted(set(values)))))
+        return tuple(sorted(normalized))
+    
+    def _allowed_chunk_ids(self, state: _IndexState, filters: tuple):
         """
-        Get formatted context string from search results.
+        Resolve normalized filters to the set of chunk IDs they allow.
+        
+        Returns:
+            A frozenset of chunk IDs, or None when nothing is filtered
+        """
+        allowed = None
+        for key, values in filters:
+            matched = set()
+            for value in values:
+                if key == "heading_path":
+                    matched.update(state.section_index.get(value, []))
+                else:
+                    matched.update(state.metadata_index[key].get(value.lower(), ()))
+            allowed = matched if allowed is None else allowed & matched
+        return None if allowed is None else frozenset(allowed)
+    
+    def _search_batch(self, queries: list, k: int, filters: tuple = ()) -> list:
+        """Run cache lookups, the keyword fast path and batched vector search."""
+        # Read the state once so a concurrent reload cannot mix two indexes
+        state = self._state
+        hybrid = config.Config.HYBRID_SEARCH
+        candidates = max(k, config.Config.HYBRID_CANDIDATES) if hybrid else k
+        namespace = ("hybrid" if hybrid else "vector", k, state.version, filters)
+        
+        # Filtering happens before scoring: both rankings only see allowed chunks
+        allowed = self._allowed_chunk_ids(state, filters)
+        if allowed is not None and not allowed:
+            return [[] for _ in queries]
+        
+        # Identical (normalized) queries in one batch are only searched once
+        positions = {}
+        for position, query in enumerate(queries):
+            cache_key = (normalize_query(query), k, state.version, filters)
+            positions.setdefault(cache_key, []).append(position)
+        
+        resolved = {}
+        pending = []  # (cache key, query, keyword hits)
+        for cache_key, query_positions in positions.items():
+            query = queries[query_positions[0]]
+            cached = self.query_cache.get(cache_key)
+            if cached is not None:
+                resolved[cache_key] = cached
+                continue
+            
+            keyword_hits = state.keyword_index.search(query, candidates, ids=allowed) if hybrid else []
+            # Fast path: exact product names, IDs and rare terms need no embedding
+            if hybrid and self._is_confident_keyword_hit(keyword_hits):
+                resolved[cache_key] = self._keyword_results(state, keyword_hits, k)
+                self.query_cache.put(cache_key, resolved[cache_key])
+                continue
+            pending.append((cache_key, query, keyword_hits))
+        
+        if pending:
+            if len(pending) == 1:
+                query_vectors = [self.embeddings.embed_query(pending[0][1])]
+            else:
+                query_vectors = self.embeddings.embed_documents([query for _, query, _ in pending])
+            
+            to_score = []
+            for (cache_key, _, keyword_hits), query_vector in zip(pending, query_vectors):
+                cached = self.semantic_cache.get(query_vector, namespace=namespace)
+                if cached is not None:
+                    resolved[cache_key] = cached
+                    self.query_cache.put(cache_key, cached)
+                else:
+                    to_score.append((cache_key, keyword_hits, query_vector))
+            
+            if to_score:
+                all_vector_hits = state.index.query_many(
+                    [query_vector for _, _, query_vector in to_score], candidates, ids=allowed
+                )
+                for (cache_key, keyword_hits, query_vector), vector_hits in zip(to_score, all_vector_hits):
+                    if hybrid:
+                        query_results = self._fuse(state, vector_hits, keyword_hits, k)
+                    else:
+                        query_results = self._filter_by_threshold(vector_hits)
+                    resolved[cache_key] = query_results
+                    self.semantic_cache.put(query_vector, query_results, namespace=namespace)
+                    self.query_cache.put(cache_key, query_results)
+        
+        results = [None] * len(queries)
+        for cache_key, query_positions in positions.items():
+            for position in query_positions:
+                results[position] = resolved[cache_key]
+        return results
+    
+    def _filter_by_threshold(self, vector_hits: list) -> list:
+        """Dense-only results filtered by the similarity threshold."""
+        return [
+            {
+                'content': hit['content'],
+                'metadata': hit['metadata'],
+                'score': hit['score']
+            }
+            for hit in vector_hits
+            if hit['score'] <= (1 - config.Config.SIMILARITY_THRESHOLD)
+        ]
+    
+    def _is_confident_keyword_hit(self, keyword_hits: list) -> bool:
+        """Whether the best BM25 hit is strong and clear enough to skip embedding."""
+        if not keyword_hits or keyword_hits[0]['coverage'] < config.Config.BM25_FAST_PATH_MIN_COVERAGE:
+            return False
+        if len(keyword_hits) == 1:
+            return True
+        return keyword_hits[0]['score'] >= config.Config.BM25_FAST_PATH_MARGIN * keyword_hits[1]['score']
+    
+    def _keyword_results(self, state: _IndexState, keyword_hits: list, k: int) -> list:
+        """Results for the keyword fast path, without vector scores."""
+        return [
+            {
+                'content': state.chunks[hit['id']]['content'],
+                'metadata': state.chunks[hit['id']]['metadata'],
+                'score': None
+            }
+            for hit in keyword_hits[:k]
+            if hit['coverage'] >= config.Config.BM25_MIN_COVERAGE
+        ]
+    
+    def _fuse(self, state: _IndexState, vector_hits: list, keyword_hits: list, k: int) -> list:
+        """
+        Fuse BM25 and vector rankings with reciprocal rank fusion.
+        
+        A chunk is returned if it passes the vector similarity threshold or
+        matches the query terms well enough on its own.
+        """
+        fused = {}
+        for ranking in (vector_hits, keyword_hits):
+            for rank, hit in enumerate(ranking):
+                fused[hit['id']] = fused.get(hit['id'], 0.0) + 1.0 / (config.Config.RRF_K + rank + 1)
+        
+        distances = {hit['id']: hit['score'] for hit in vector_hits}
+        coverages = {hit['id']: hit['coverage'] for hit in keyword_hits}
+        max_distance = 1 - config.Config.SIMILARITY_THRESHOLD
+        
+        results = []
+        for chunk_id in sorted(fused, key=fused.get, reverse=True):
+            distance = distances.get(chunk_id)
+            relevant = (
+                (distance is not None and distance <= max_distance)
+                or coverages.get(chunk_id, 0.0) >= config.Config.BM25_MIN_COVERAGE
+            )
+            if not relevant or chunk_id not in state.chunks:
+                continue
+            results.append({
+                'content': state.chunks[chunk_id]['content'],
+                'metadata': state.chunks[chunk_id]['metadata'],
+                'score': distance
+            })
+            if len(results) == k:
+                break
+        return results
+    
+    def build_context(self, query: str, filters: dict = None) -> dict:
+        """
+        Retrieve and pack context for a query within the token budget.
         
         Args:
             query: Search query
+            filters: Optional metadata filters, as in ``search``
         
         Returns:
-            Formatted context string
+            Dictionary with the context ``text``, ``tokens`` used,
+            ``chunks_used`` and ``chunks_dropped``
         """
-        results = self.search(query)
+        results = self.search(query, filters=filters)
         
         if not results:
-            return "No relevant information found in knowledge base."
+            return {
+                'text': "No relevant information found in knowledge base.",
+                'tokens': 0,
+                'chunks_used': 0,
+                'chunks_dropped': 0
+            }
         
-        context_parts = []
-        for i, result in enumerate(results, 1):
-            context_parts.append(
-                f"[Document {i}]\n{result['content']}\n"
-            )
+        return pack_context(
+            results,
+            token_budget=config.Config.CONTEXT_TOKEN_BUDGET,
+            model=config.Config.LLM_MODEL
+        )
+    
+    def get_relevant_context(self, query: str, filters: dict = None) -> str:
+        """
+        Get formatted context string from search results.
         
-        return "\n".join(context_parts)
-
+        Args:
+            query: Search query
+            filters: Optional metadata filters, as in ``search``
+        
+        Returns:
+            Formatted context string
+        """
+        return self.build_context(query, filters)['text']
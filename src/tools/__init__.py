@@ -1,2 +1,2 @@
-"""Mock backend tools for order management, returns, and refunds."""
+"""Mock backend tools for order management, returns, refunds, and product lookup."""
 
@@ -1,8 +1,14 @@
 """Mock API functions for order status, returns, and refunds."""
+import asyncio
 import json
 import random
+import threading
+import time
+from concurrent.futures import Executor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List, Tuple
+
+from src.tools.product_catalog import search_products
 
 
 # Mock database for orders
@@ -311,10 +317,57 @@ TOOL_DEFINITIONS = [
                 "required": ["return_id"]
             }
         }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_products",
+            "description": "Look up products in the catalog by category, price, warranty or return window. Use this for questions like 'laptops under $1500' or 'which headphones have a 14-day return window' instead of reading prices from the knowledge base.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "category": {
+                        "type": "string",
+                        "description": "Product category or subcategory (e.g., 'Electronics', 'Laptops', 'Headphones')"
+                    },
+                    "min_price": {
+                        "type": "number",
+                        "description": "Lowest acceptable price in USD"
+                    },
+                    "max_price": {
+                        "type": "number",
+                        "description": "Highest acceptable price in USD"
+                    },
+                    "min_warranty_months": {
+                        "type": "number",
+                        "description": "Minimum warranty length in months"
+                    },
+                    "return_window_days": {
+                        "type": "integer",
+                        "description": "Exact return window in days (e.g., 14)"
+                    },
+                    "name": {
+                        "type": "string",
+                        "description": "Part of the product name"
+                    }
+                },
+                "required": []
+            }
+        }
     }
 ]
 
 
+# Tool name -> implementation
+TOOL_FUNCTIONS = {
+    "get_order_status": get_order_status,
+    "create_return_request": create_return_request,
+    "get_refund_policy": get_refund_policy,
+    "get_refund_status": get_refund_status,
+    "search_products": search_products
+}
+
+
 def execute_tool(tool_name: str, arguments: Dict) -> Dict:
     """
     Execute a tool function by name.
@@ -326,21 +379,14 @@ def execute_tool(tool_name: str, arguments: Dict) -> Dict:
     Returns:
         Result from tool execution
     """
-    tool_map = {
-        "get_order_status": get_order_status,
-        "create_return_request": create_return_request,
-        "get_refund_policy": get_refund_policy,
-        "get_refund_status": get_refund_status
-    }
-    
-    if tool_name not in tool_map:
+    if tool_name not in TOOL_FUNCTIONS:
         return {
             "success": False,
             "error": f"Unknown tool: {tool_name}"
         }
     
     try:
-        func = tool_map[tool_name]
+        func = TOOL_FUNCTIONS[tool_name]
         result = func(**arguments)
         return result
     except Exception as e:
@@ -349,3 +395,95 @@ def execute_tool(tool_name: str, arguments: Dict) -> Dict:
             "error": f"Error executing {tool_name}: {str(e)}"
         }
 
+
+class _TimedCall:
+    """
+    A tool call whose timeout starts when a worker begins running it.
+    
+    On a busy pool a call can wait behind other conversations' calls; that
+    wait does not count against its timeout.
+    """
+    
+    def __init__(self, tool_name: str, arguments: Dict, on_start: Optional[Callable[[], None]] = None):
+        self.tool_name = tool_name
+        self.arguments = arguments
+        self.on_start = on_start
+        self.started = threading.Event()
+        self.started_at = 0.0
+    
+    def __call__(self) -> Dict:
+        self.started_at = time.monotonic()
+        self.started.set()
+        if self.on_start:
+            self.on_start()
+        return execute_tool(self.tool_name, self.arguments)
+    
+    def remaining(self, timeout: float) -> float:
+        """Seconds left of ``timeout`` since the call started (0 if it never did)."""
+        if not self.started.is_set():
+            return 0.0
+        return max(self.started_at + timeout - time.monotonic(), 0)
+    
+    def timed_out(self, timeout: float) -> Dict:
+        """Error result for a call that ran longer than ``timeout``."""
+        return {
+            "success": False,
+            "error": f"{self.tool_name} timed out after {timeout:g} seconds"
+        }
+
+
+def execute_tools(calls: List[Tuple[str, Dict]], executor: Executor, timeout: float) -> List[Dict]:
+    """
+    Execute several tool calls concurrently.
+    
+    Every call is submitted to the executor at once, so the batch takes as
+    long as its slowest call. A call that has not finished ``timeout``
+    seconds after a worker started it gets an error result (time spent
+    queued for a worker does not count); its thread is not interrupted,
+    so tools should also bound their own I/O.
+    
+    Args:
+        calls: (tool name, arguments) pairs
+        executor: Bounded pool the calls run on
+        timeout: Seconds each call may run
+    
+    Returns:
+        Results in the order of ``calls``
+    """
+    timed_calls = [_TimedCall(tool_name, arguments) for tool_name, arguments in calls]
+    futures = [executor.submit(call) for call in timed_calls]
+    
+    results = []
+    for call, future in zip(timed_calls, futures):
+        # Wait for a worker to pick the call up before its clock starts
+        while not call.started.wait(0.05) and not future.done():
+            pass
+        try:
+            results.append(future.result(timeout=call.remaining(timeout)))
+        except FutureTimeoutError:
+            future.cancel()
+            results.append(call.timed_out(timeout))
+    return results
+
+
+async def aexecute_tools(calls: List[Tuple[str, Dict]], executor: Executor, timeout: float) -> List[Dict]:
+    """
+    Async variant of ``execute_tools``: the calls run on the executor while
+    the event loop waits for them, and results keep the order of ``calls``.
+    """
+    loop = asyncio.get_running_loop()
+    
+    async def run(tool_name: str, arguments: Dict) -> Dict:
+        started = asyncio.Event()
+        call = _TimedCall(tool_name, arguments, lambda: loop.call_soon_threadsafe(started.set))
+        future = loop.run_in_executor(executor, call)
+        # Wait for a worker to pick the call up before its clock starts
+        waiter = asyncio.ensure_future(started.wait())
+        await asyncio.wait([waiter, future], return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        try:
+            return await asyncio.wait_for(future, call.remaining(timeout))
+        except asyncio.TimeoutError:
+            return call.timed_out(timeout)
+    
+    return list(await asyncio.gather(*(run(tool_name, arguments) for tool_name, arguments in calls)))
@@ -0,0 +1,389 @@
+"""Structured product catalog with category and price indexes."""
+import csv
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+
+
+# Return windows from the store policies, used when a product lists none
+DEFAULT_RETURN_WINDOW_DAYS = 30
+CATEGORY_RETURN_WINDOW_DAYS = {"electronics": 14}
+
+PRODUCT_PATTERN = re.compile(r"^\s*[-*]\s+\*\*(.+?)\*\*:\s*(.+)$")
+HEADING_PATTERN = re.compile(r"^(#{2,3})\s+(.+?)\s*$")
+PRICE_PATTERN = re.compile(r"Price:\s*\$([\d,]+(?:\.\d+)?)(?:\s*-\s*\$([\d,]+(?:\.\d+)?))?", re.IGNORECASE)
+DURATION_PATTERN = re.compile(r"(\d+)[- ](year|month|day)s?\b", re.IGNORECASE)
+RETURN_WINDOW_PATTERN = re.compile(r"return window:?\s*(\d+)[- ]days?", re.IGNORECASE)
+
+
+def catalog_files() -> List[str]:
+    """Catalog files from ``Config.CATALOG_FILES``, relative names resolved against the knowledge base directory."""
+    return [
+        os.path.join(config.Config.KNOWLEDGE_BASE_DIR, name.strip())
+        for name in config.Config.CATALOG_FILES.split(",")
+        if name.strip()
+    ]
+
+
+def _singular(word: str) -> str:
+    """English singular of a plural noun ("accessories" -> "accessory", "watches" -> "watch")."""
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "ches", "shes", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is", "'s")):
+        return word[:-1]
+    return word
+
+
+def normalize_category(name: str) -> str:
+    """
+    Lowercase a category and make its last word singular.
+
+    Catalog headings and queries go through the same rule, so "Laptops",
+    "laptop", "Accessories" and "accessory" all find their category.
+    """
+    key = re.sub(r"[^a-z0-9&' ]+", " ", name.lower()).strip()
+    words = key.split()
+    if words:
+        words[-1] = _singular(words[-1])
+    return " ".join(words)
+
+
+def _parse_price(text: str):
+    match = PRICE_PATTERN.search(text)
+    if not match:
+        return None, None
+    low = float(match.group(1).replace(",", ""))
+    high = float(match.group(2).replace(",", "")) if match.group(2) else low
+    return low, high
+
+
+def _parse_warranty_months(text: str) -> Optional[float]:
+    for sentence in re.split(r"(?<=\.)\s+", text):
+        if "warrant" in sentence.lower():
+            match = DURATION_PATTERN.search(sentence)
+            if match:
+                amount, unit = int(match.group(1)), match.group(2).lower()
+                return float(amount * 12 if unit == "year" else amount)
+    return None
+
+
+def parse_markdown_catalog(text: str) -> List[Dict]:
+    """
+    Extract products from catalog markdown.
+
+    Products are bullet lines of the form ``- **Name**: description`` under
+    a ``##`` category and ``###`` subcategory heading. Prices, warranties
+    and return windows are read from the description.
+
+    Args:
+        text: Markdown content
+
+    Returns:
+        List of product records
+    """
+    products = []
+    category = subcategory = ""
+    for line in text.splitlines():
+        heading = HEADING_PATTERN.match(line)
+        if heading:
+            if len(heading.group(1)) == 2:
+                category, subcategory = heading.group(2), ""
+            else:
+                subcategory = heading.group(2)
+            continue
+
+        match = PRODUCT_PATTERN.match(line)
+        if not match:
+            continue
+        name, description = match.group(1).strip(), match.group(2).strip()
+        price_min, price_max = _parse_price(description)
+        return_window = RETURN_WINDOW_PATTERN.search(description)
+        products.append({
+            "name": name,
+            "category": category,
+            "subcategory": subcategory,
+            "price_min": price_min,
+            "price_max": price_max,
+            "warranty_months": _parse_warranty_months(description),
+            "return_window_days": int(return_window.group(1)) if return_window else None,
+            "description": description
+        })
+    return products
+
+
+def parse_csv_catalog(path: str) -> List[Dict]:
+    """
+    Read products from a CSV file.
+
+    Expected columns: name, category, subcategory, price_min, price_max,
+    warranty_months, return_window_days and description (all but name and
+    category may be empty).
+    """
+    def number(value):
+        return float(value) if value not in (None, "") else None
+
+    products = []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            price_min = number(row.get("price_min"))
+            return_window = number(row.get("return_window_days"))
+            products.append({
+                "name": row["name"].strip(),
+                "category": row["category"].strip(),
+                "subcategory": (row.get("subcategory") or "").strip(),
+                "price_min": price_min,
+                "price_max": number(row.get("price_max")) or price_min,
+                "warranty_months": number(row.get("warranty_months")),
+                "return_window_days": int(return_window) if return_window is not None else None,
+                "description": (row.get("description") or "").strip()
+            })
+    return products
+
+
+class ProductCatalog:
+    """
+    Column-oriented, in-memory product table.
+
+    Every attribute is stored as one column (a NumPy array for numeric
+    attributes, with NaN for unknown values). A category index maps each
+    normalized category and subcategory to its rows, and a price index keeps
+    the rows sorted by lowest price, so category and price-range lookups
+    touch only matching rows.
+    """
+
+    def __init__(self, products: List[Dict]):
+        """
+        Build the columns and indexes.
+
+        Args:
+            products: Product records as returned by the parsers
+        """
+        self.names = [product["name"] for product in products]
+        self.categories = [product["category"] for product in products]
+        self.subcategories = [product["subcategory"] for product in products]
+        self.descriptions = [product["description"] for product in products]
+
+        def column(key):
+            return np.array(
+                [np.nan if product[key] is None else product[key] for product in products],
+                dtype=np.float64
+            )
+
+        self.price_min = column("price_min")
+        self.price_max = column("price_max")
+        self.warranty_months = column("warranty_months")
+        category_windows = {
+            normalize_category(name): days for name, days in CATEGORY_RETURN_WINDOW_DAYS.items()
+        }
+        self.return_window_days = np.array([
+            product["return_window_days"] if product["return_window_days"] is not None
+            else category_windows.get(normalize_category(product["category"]), DEFAULT_RETURN_WINDOW_DAYS)
+            for product in products
+        ], dtype=np.float64)
+
+        self.category_index: Dict[str, np.ndarray] = {}
+        rows_by_category: Dict[str, List[int]] = {}
+        for row, (category, subcategory) in enumerate(zip(self.categories, self.subcategories)):
+            for name in filter(None, {category, subcategory}):
+                rows_by_category.setdefault(normalize_category(name), []).append(row)
+        for key, rows in rows_by_category.items():
+            self.category_index[key] = np.array(rows, dtype=np.int64)
+
+        # Rows with a known price, sorted by lowest price
+        priced = np.flatnonzero(~np.isnan(self.price_min))
+        self._price_order = priced[np.argsort(self.price_min[priced], kind="stable")]
+        self._sorted_prices = self.price_min[self._price_order]
+
+    @classmethod
+    def load(cls, paths: List[str] = None) -> "ProductCatalog":
+        """Load and merge catalog files (markdown or CSV)."""
+        products = []
+        for path in paths or catalog_files():
+            if path.lower().endswith(".csv"):
+                products.extend(parse_csv_catalog(path))
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    products.extend(parse_markdown_catalog(f.read()))
+        return cls(products)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def category_names(self) -> List[str]:
+        """Distinct categories and subcategories, as written in the catalog."""
+        return sorted(set(filter(None, self.categories + self.subcategories)))
+
+    def _rows_for_category(self, category: str) -> np.ndarray:
+        key = normalize_category(category)
+        if key in self.category_index:
+            return self.category_index[key]
+        # Partial names ("kitchen" for "Kitchen Appliances")
+        matches = [rows for name, rows in self.category_index.items() if key and key in name]
+        return np.unique(np.concatenate(matches)) if matches else np.array([], dtype=np.int64)
+
+    def _rows_for_price(self, max_price: Optional[float]) -> np.ndarray:
+        """Rows whose lowest price is at most max_price, from the sorted price index."""
+        end = np.searchsorted(self._sorted_prices, max_price, side="right")
+        return np.sort(self._price_order[:end])
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_warranty_months: Optional[float] = None,
+        return_window_days: Optional[int] = None,
+        name: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Dict]:
+        """
+        Find products matching every given condition, cheapest first.
+
+        A product with a price range matches a price condition if any price
+        in its range does.
+
+        Args:
+            category: Category or subcategory name (e.g. "Laptops", "electronics")
+            min_price: Lowest acceptable price
+            max_price: Highest acceptable price
+            min_warranty_months: Minimum warranty length
+            return_window_days: Exact return window in days
+            name: Case-insensitive substring of the product name
+            limit: Maximum number of products
+
+        Returns:
+            List of product records
+        """
+        rows = np.arange(len(self), dtype=np.int64)
+        if category:
+            rows = self._rows_for_category(category)
+        if max_price is not None:
+            rows = np.intersect1d(rows, self._rows_for_price(max_price), assume_unique=True)
+
+        mask = np.ones(len(rows), dtype=bool)
+        if min_price is not None:
+            mask &= self.price_max[rows] >= min_price
+        if min_warranty_months is not None:
+            mask &= self.warranty_months[rows] >= min_warranty_months
+        if return_window_days is not None:
+            mask &= self.return_window_days[rows] == return_window_days
+        if name:
+            needle = name.lower()
+            mask &= np.array([needle in self.names[row].lower() for row in rows], dtype=bool)
+        rows = rows[mask]
+
+        rows = rows[np.argsort(np.nan_to_num(self.price_min[rows], nan=np.inf), kind="stable")]
+        return [self._record(int(row)) for row in rows[:limit]]
+
+    def _record(self, row: int) -> Dict:
+        def value(array):
+            return None if np.isnan(array[row]) else float(array[row])
+
+        return {
+            "name": self.names[row],
+            "category": self.categories[row],
+            "subcategory": self.subcategories[row],
+            "price_min": value(self.price_min),
+            "price_max": value(self.price_max),
+            "warranty_months": value(self.warranty_months),
+            "return_window_days": int(self.return_window_days[row]),
+            "description": self.descriptions[row]
+        }
+
+
+_catalog: Optional[ProductCatalog] = None
+_catalog_signature: Optional[tuple] = None
+
+
+def _files_signature(paths: List[str]) -> tuple:
+    """Cheap fingerprint (mtime, size) of the catalog files."""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            signature.append((path, None))
+            continue
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def get_catalog() -> ProductCatalog:
+    """
+    Return the shared catalog, loading it on first use.
+
+    It is reloaded whenever a catalog file changed, so edits picked up by
+    a knowledge base hot reload reach the product search as well. If the
+    reload fails (e.g. a file is being replaced) the previous catalog is
+    kept and the reload is retried on the next call.
+    """
+    global _catalog, _catalog_signature
+    signature = _files_signature(catalog_files())
+    if _catalog is None or signature != _catalog_signature:
+        try:
+            catalog = ProductCatalog.load()
+        except OSError as e:
+            if _catalog is None:
+                raise
+            print(f"Error reloading product catalog: {e}")
+            return _catalog
+        _catalog, _catalog_signature = catalog, signature
+    return _catalog
+
+
+def search_products(
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_warranty_months: Optional[float] = None,
+    return_window_days: Optional[int] = None,
+    name: Optional[str] = None
+) -> Dict:
+    """
+    Look up products by category, price, warranty and return window.
+
+    Args:
+        category: Category or subcategory name
+        min_price: Lowest acceptable price in USD
+        max_price: Highest acceptable price in USD
+        min_warranty_months: Minimum warranty length in months
+        return_window_days: Exact return window in days
+        name: Part of the product name
+
+    Returns:
+        Dictionary with the matching products
+    """
+    catalog = get_catalog()
+    products = catalog.query(
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        min_warranty_months=min_warranty_months,
+        return_window_days=return_window_days,
+        name=name
+    )
+    if not products:
+        return {
+            "success": True,
+            "count": 0,
+            "products": [],
+            "message": "No products match these criteria.",
+            "available_categories": catalog.category_names()
+        }
+    return {
+        "success": True,
+        "count": len(products),
+        "products": products
+    }
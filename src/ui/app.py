@@ -1,8 +1,10 @@
 """Flask web application for customer support assistant."""
 import sys
 import os
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, render_template, request, jsonify, session, stream_with_context
 from flask_cors import CORS
+import hmac
+import json
 import uuid
 
 # Add project root to path
@@ -15,11 +17,18 @@ import config
 
 app = Flask(__name__)
 app.secret_key = config.Config.FLASK_SECRET_KEY or os.urandom(24).hex()
+if config.Config.SESSION_BACKEND == "sqlite" and not config.Config.FLASK_SECRET_KEY:
+    print("Warning: FLASK_SECRET_KEY is not set; each worker signs session cookies "
+          "with its own random key, so conversations will not follow users across workers")
 CORS(app)
 
 # Initialize assistant
 assistant = CustomerSupportAssistant()
 
+# Rebuild the knowledge base index in the background when its files change
+if config.Config.KB_WATCH_INTERVAL > 0:
+    assistant.vector_store.start_watcher(config.Config.KB_WATCH_INTERVAL)
+
 
 @app.route('/')
 def index():
@@ -27,7 +36,6 @@ def index():
     # Initialize session if needed
     if 'conversation_id' not in session:
         session['conversation_id'] = str(uuid.uuid4())
-        assistant.reset_conversation()
     
     return render_template('index.html')
 
@@ -65,11 +73,61 @@ def chat():
         }), 500
 
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Handle a chat message, streaming the response as Server-Sent Events.
+    
+    Each event is named after the assistant's event type ("delta",
+    "tool_call", "tool_result", "done" or "error") and carries it as JSON.
+    """
+    data = request.json or {}
+    user_message = data.get('message', '').strip()
+    
+    if not user_message:
+        return jsonify({
+            'error': 'Message cannot be empty'
+        }), 400
+    
+    # The session cookie is sent with the response headers, before streaming starts
+    conversation_id = session.get('conversation_id', str(uuid.uuid4()))
+    session['conversation_id'] = conversation_id
+    
+    def events():
+        try:
+            for event in assistant.chat_stream(user_message, conversation_id):
+                if event['type'] == 'error':
+                    # Keep the traceback in the server log
+                    event.pop('error_trace', None)
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            # The status line is already sent, so the failure is reported as an event
+            print(f"Error in chat stream: {str(e)}")
+            event = {
+                'type': 'error',
+                'response': f"I apologize, but I encountered an error: {str(e)}. Please try again or contact our support team.",
+                'error': str(e),
+                'needs_escalation': True,
+                'conversation_id': conversation_id
+            }
+            yield f"event: error\ndata: {json.dumps(event)}\n\n"
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # disable proxy buffering (nginx)
+        }
+    )
+
+
 @app.route('/api/reset', methods=['POST'])
 def reset():
-    """Reset conversation."""
-    assistant.reset_conversation()
-    session.pop('conversation_id', None)
+    """Reset the current session's conversation."""
+    conversation_id = session.pop('conversation_id', None)
+    if conversation_id:
+        assistant.reset_conversation(conversation_id)
     return jsonify({'success': True})
 
 
@@ -78,10 +136,45 @@ def health():
     """Health check endpoint."""
     return jsonify({
         'status': 'healthy',
-        'model': config.Config.LLM_MODEL
+        'model': config.Config.LLM_MODEL,
+        'prompt_cache': assistant.prompt_cache.stats()
     })
 
 
+def _check_admin_token():
+    """Return an error response unless the request carries the admin token."""
+    if not config.Config.ADMIN_TOKEN:
+        return jsonify({'error': 'Admin endpoints are disabled'}), 404
+    token = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(token.encode(), config.Config.ADMIN_TOKEN.encode()):
+        return jsonify({'error': 'Unauthorized'}), 401
+    return None
+
+
+@app.route('/api/admin/reload', methods=['POST'])
+def reload_knowledge_base():
+    """Rebuild the knowledge base index in the background and swap it in."""
+    error = _check_admin_token()
+    if error:
+        return error
+    
+    force = request.args.get('force', '').lower() == 'true'
+    started = assistant.vector_store.reload_in_background(force=force)
+    return jsonify({
+        'started': started,
+        **assistant.vector_store.reload_status()
+    }), 202
+
+
+@app.route('/api/admin/reload', methods=['GET'])
+def reload_status():
+    """Report the served index generation and the last reload outcome."""
+    error = _check_admin_token()
+    if error:
+        return error
+    return jsonify(assistant.vector_store.reload_status())
+
+
 if __name__ == '__main__':
     app.run(debug=config.Config.DEBUG, port=config.Config.PORT, host='0.0.0.0')
 
@@ -0,0 +1,279 @@
+"""ASGI application for the customer support assistant, built on the async assistant pipeline.
+
+Serves the same chat interface and API as the Flask app, but every chat
+turn is a coroutine (``CustomerSupportAssistant.achat``), so a single
+process can hold many conversations that are waiting on the model. Run it
+with any ASGI server, e.g. ``uvicorn src.ui.asgi:app``.
+"""
+import hmac
+import json
+import mimetypes
+import os
+import sys
+import uuid
+from http.cookies import SimpleCookie
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.assistant.customer_assistant import CustomerSupportAssistant
+import config
+
+UI_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(UI_DIR, "static")
+CONVERSATION_COOKIE = "conversation_id"
+
+templates = Environment(
+    loader=FileSystemLoader(os.path.join(UI_DIR, "templates")),
+    autoescape=select_autoescape(["html"])
+)
+# The templates are shared with the Flask app, which provides url_for
+templates.globals["url_for"] = lambda endpoint, filename: f"/static/{filename}"
+
+# Initialize assistant
+assistant = CustomerSupportAssistant()
+
+
+class Request:
+    """The parts of an ASGI HTTP request the handlers need."""
+
+    def __init__(self, scope: Dict, body: bytes):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.query = parse_qs(scope.get("query_string", b"").decode())
+        self.headers = {name.decode().lower(): value.decode() for name, value in scope["headers"]}
+        self.body = body
+        cookies = SimpleCookie(self.headers.get("cookie", ""))
+        self.cookies = {name: morsel.value for name, morsel in cookies.items()}
+
+    def json(self) -> Dict:
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _send(send, status: int, body: bytes, content_type: str, headers: List[Tuple[bytes, bytes]] = ()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type.encode()), *headers]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_event(send, event: Dict):
+    """Send one Server-Sent Event named after the event's type."""
+    data = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    await send({"type": "http.response.body", "body": data.encode(), "more_body": True})
+
+
+async def _send_json(send, payload: Dict, status: int = 200, headers: List[Tuple[bytes, bytes]] = ()):
+    await _send(send, status, json.dumps(payload).encode(), "application/json", headers)
+
+
+def _conversation(request: Request) -> Tuple[str, List[Tuple[bytes, bytes]]]:
+    """Return the request's conversation ID, plus a Set-Cookie header if it is new."""
+    conversation_id = request.cookies.get(CONVERSATION_COOKIE)
+    if conversation_id:
+        return conversation_id, []
+    conversation_id = str(uuid.uuid4())
+    cookie = f"{CONVERSATION_COOKIE}={conversation_id}; Path=/; HttpOnly; SameSite=Lax"
+    return conversation_id, [(b"set-cookie", cookie.encode())]
+
+
+async def index(request: Request, send):
+    """Render the main chat interface."""
+    _, headers = _conversation(request)
+    html = templates.get_template("index.html").render()
+    await _send(send, 200, html.encode(), "text/html; charset=utf-8", headers)
+
+
+async def static(request: Request, send):
+    """Serve a file from the static directory."""
+    path = os.path.realpath(os.path.join(STATIC_DIR, request.path[len("/static/"):]))
+    if not path.startswith(STATIC_DIR + os.sep) or not os.path.isfile(path):
+        await _send_json(send, {"error": "Not found"}, 404)
+        return
+    with open(path, "rb") as f:
+        body = f.read()
+    await _send(send, 200, body, mimetypes.guess_type(path)[0] or "application/octet-stream")
+
+
+async def chat(request: Request, send):
+    """Handle chat messages."""
+    user_message = str(request.json().get("message", "")).strip()
+    if not user_message:
+        await _send_json(send, {"error": "Message cannot be empty"}, 400)
+        return
+
+    conversation_id, headers = _conversation(request)
+    result = await assistant.achat(user_message, conversation_id)
+    await _send_json(send, {
+        "response": result["response"],
+        "tool_calls": result.get("tool_calls", []),
+        "rag_used": result.get("rag_used", False),
+        "needs_escalation": result.get("needs_escalation", False),
+        "conversation_id": conversation_id
+    }, headers=headers)
+
+
+async def chat_stream(request: Request, send):
+    """Handle a chat message, streaming the response as Server-Sent Events."""
+    user_message = str(request.json().get("message", "")).strip()
+    if not user_message:
+        await _send_json(send, {"error": "Message cannot be empty"}, 400)
+        return
+
+    conversation_id, headers = _conversation(request)
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"text/event-stream"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+            *headers
+        ]
+    })
+    try:
+        async for event in assistant.achat_stream(user_message, conversation_id):
+            if event["type"] == "error":
+                # Keep the traceback in the server log
+                event.pop("error_trace", None)
+            await _send_event(send, event)
+    except Exception as e:
+        # The status line is already sent, so the failure is reported as an event
+        print(f"Error in chat stream: {str(e)}")
+        await _send_event(send, {
+            "type": "error",
+            "response": f"I apologize, but I encountered an error: {str(e)}. Please try again or contact our support team.",
+            "error": str(e),
+            "needs_escalation": True,
+            "conversation_id": conversation_id
+        })
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def reset(request: Request, send):
+    """Reset the current conversation."""
+    conversation_id = request.cookies.get(CONVERSATION_COOKIE)
+    if conversation_id:
+        assistant.reset_conversation(conversation_id)
+    expired = f"{CONVERSATION_COOKIE}=; Path=/; Max-Age=0"
+    await _send_json(send, {"success": True}, headers=[(b"set-cookie", expired.encode())])
+
+
+async def health(request: Request, send):
+    """Health check endpoint."""
+    await _send_json(send, {
+        "status": "healthy",
+        "model": config.Config.LLM_MODEL,
+        "prompt_cache": assistant.prompt_cache.stats()
+    })
+
+
+def _check_admin_token(request: Request) -> Optional[Tuple[Dict, int]]:
+    """Return an error payload and status unless the request carries the admin token."""
+    if not config.Config.ADMIN_TOKEN:
+        return {"error": "Admin endpoints are disabled"}, 404
+    token = request.headers.get("x-admin-token", "")
+    if not hmac.compare_digest(token.encode(), config.Config.ADMIN_TOKEN.encode()):
+        return {"error": "Unauthorized"}, 401
+    return None
+
+
+async def reload_knowledge_base(request: Request, send):
+    """Rebuild the knowledge base index in the background and swap it in (POST), or report status (GET)."""
+    error = _check_admin_token(request)
+    if error:
+        await _send_json(send, *error)
+        return
+    if request.method == "GET":
+        await _send_json(send, assistant.vector_store.reload_status())
+        return
+    force = request.query.get("force", [""])[0].lower() == "true"
+    started = assistant.vector_store.reload_in_background(force=force)
+    await _send_json(send, {"started": started, **assistant.vector_store.reload_status()}, 202)
+
+
+ROUTES = {
+    ("GET", "/"): index,
+    ("POST", "/api/chat"): chat,
+    ("POST", "/api/chat/stream"): chat_stream,
+    ("POST", "/api/reset"): reset,
+    ("GET", "/api/health"): health,
+    ("GET", "/api/admin/reload"): reload_knowledge_base,
+    ("POST", "/api/admin/reload"): reload_knowledge_base,
+}
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Rebuild the knowledge base index in the background when its files change
+            if config.Config.KB_WATCH_INTERVAL > 0:
+                assistant.vector_store.start_watcher(config.Config.KB_WATCH_INTERVAL)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            assistant.vector_store.stop_watcher()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    request = Request(scope, await _read_body(receive))
+    if request.method == "GET" and request.path.startswith("/static/"):
+        await static(request, send)
+        return
+
+    handler = ROUTES.get((request.method, request.path))
+    if handler is None:
+        await _send_json(send, {"error": "Not found"}, 404)
+        return
+    
+    # How far the response got: None, "started" (headers sent) or "finished"
+    progress = None
+    
+    async def tracked_send(message):
+        nonlocal progress
+        if message["type"] == "http.response.start":
+            progress = "started"
+        elif not message.get("more_body"):
+            progress = "finished"
+        await send(message)
+    
+    try:
+        await handler(request, tracked_send)
+    except Exception as e:
+        if progress is None:
+            await _send_json(send, {"error": f"An error occurred: {str(e)}"}, 500)
+            return
+        # Too late for an error status: end the response that is under way
+        print(f"Error after response start: {str(e)}")
+        if progress == "started":
+            await send({"type": "http.response.body", "body": b""})
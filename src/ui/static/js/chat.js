@@ -30,8 +30,12 @@ async function sendMessage() {
     setInputEnabled(false);
     statusIndicator.innerHTML = '<span class="loading"></span> Processing...';
 
+    // Created when the first words arrive
+    let responseText = null;
+    let responseContent = null;
+
     try {
-        const response = await fetch('/api/chat', {
+        const response = await fetch('/api/chat/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -39,29 +43,43 @@ async function sendMessage() {
             body: JSON.stringify({ message: message })
         });
 
-        const data = await response.json();
-
-        if (response.ok) {
-            // Add assistant response
-            let responseText = data.response;
-            
-            // Add tool call indicators if any
-            if (data.tool_calls && data.tool_calls.length > 0) {
-                const toolsUsed = data.tool_calls.map(tc => tc.tool).join(', ');
-                responseText += `<div class="tool-call-indicator">🔧 Used tools: ${toolsUsed}</div>`;
-            }
-            
-            // Add escalation notice if needed
-            if (data.needs_escalation) {
-                responseText += '<div class="escalation-notice">⚠️ This conversation may need human assistance. Would you like me to connect you with a support agent?</div>';
-            }
-            
-            addMessage(responseText, 'assistant');
-            statusIndicator.textContent = 'Ready';
-        } else {
+        if (!response.ok) {
+            const data = await response.json();
             addMessage(`Error: ${data.error || 'An error occurred'}`, 'assistant');
             statusIndicator.textContent = 'Error';
+            return;
         }
+
+        await readEvents(response, (type, data) => {
+            if (type === 'delta') {
+                if (!responseContent) {
+                    responseContent = addMessage('', 'assistant');
+                    responseText = document.createElement('span');
+                    responseContent.appendChild(responseText);
+                    statusIndicator.innerHTML = '<span class="loading"></span> Responding...';
+                }
+                responseText.textContent += data.content;
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            } else if (type === 'tool_call') {
+                statusIndicator.innerHTML = `<span class="loading"></span> Using ${data.tool}...`;
+            } else if (type === 'done') {
+                // Add tool call indicators if any
+                if (data.tool_calls && data.tool_calls.length > 0) {
+                    const toolsUsed = data.tool_calls.map(tc => tc.tool).join(', ');
+                    responseContent.insertAdjacentHTML('beforeend', `<div class="tool-call-indicator">🔧 Used tools: ${toolsUsed}</div>`);
+                }
+                
+                // Add escalation notice if needed
+                if (data.needs_escalation) {
+                    responseContent.insertAdjacentHTML('beforeend', '<div class="escalation-notice">⚠️ This conversation may need human assistance. Would you like me to connect you with a support agent?</div>');
+                }
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+                statusIndicator.textContent = 'Ready';
+            } else if (type === 'error') {
+                addMessage(data.response, 'assistant');
+                statusIndicator.textContent = 'Error';
+            }
+        });
     } catch (error) {
         console.error('Error:', error);
         addMessage('Sorry, I encountered an error. Please try again.', 'assistant');
@@ -72,6 +90,34 @@ async function sendMessage() {
     }
 }
 
+// Read a Server-Sent Events response, calling onEvent(type, data) per event
+async function readEvents(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let type = 'message';
+            let data = '';
+            for (const line of block.split('\n')) {
+                if (line.startsWith('event: ')) type = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            }
+            if (data) onEvent(type, JSON.parse(data));
+        }
+    }
+}
+
 // Add message to chat
 function addMessage(content, role) {
     const messageDiv = document.createElement('div');
@@ -86,6 +132,7 @@ function addMessage(content, role) {
     
     // Scroll to bottom
     chatMessages.scrollTop = chatMessages.scrollHeight;
+    return contentDiv;
 }
 
 // Set input enabled/disabled
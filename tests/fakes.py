@@ -0,0 +1,132 @@
+"""Stand-ins for the OpenAI client and the vector store, shared by the assistant tests."""
+import asyncio
+import json
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest import mock
+
+import config
+from src.assistant.customer_assistant import CustomerSupportAssistant
+
+
+def reply(content):
+    """Scripted completion that answers with text."""
+    return {"content": content}
+
+
+def tool_call(name, arguments, call_id="call_1"):
+    """Scripted completion that calls one tool."""
+    return {"tool_calls": [(call_id, name, json.dumps(arguments))]}
+
+
+def _usage(prompt_tokens=1500, cached_tokens=1024):
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens)
+    )
+
+
+def _response(item):
+    tool_calls = [
+        SimpleNamespace(id=call_id, type="function", function=SimpleNamespace(name=name, arguments=arguments))
+        for call_id, name, arguments in item.get("tool_calls", [])
+    ] or None
+    message = SimpleNamespace(content=item.get("content"), tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=_usage())
+
+
+def _chunk(content=None, tool_calls=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+
+
+def _chunks(item):
+    """Stream chunks for a scripted completion: text in two pieces, tool call arguments in fragments."""
+    chunks = []
+    content = item.get("content")
+    if content:
+        middle = len(content) // 2
+        chunks += [_chunk(content[:middle]), _chunk(content[middle:])]
+    for index, (call_id, name, arguments) in enumerate(item.get("tool_calls", [])):
+        middle = len(arguments) // 2
+        chunks.append(_chunk(tool_calls=[SimpleNamespace(
+            index=index, id=call_id, function=SimpleNamespace(name=name, arguments=arguments[:middle]))]))
+        chunks.append(_chunk(tool_calls=[SimpleNamespace(
+            index=index, id=None, function=SimpleNamespace(name=None, arguments=arguments[middle:]))]))
+    chunks.append(SimpleNamespace(choices=[], usage=_usage()))
+    return chunks
+
+
+class FakeCompletions:
+    """``chat.completions`` that plays back scripted completions and records every request."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        item = self.script.pop(0)
+        if kwargs.get("stream"):
+            return iter(_chunks(item))
+        return _response(item)
+
+
+class AsyncFakeCompletions:
+    """Async ``chat.completions`` sharing a FakeCompletions script, with optional model latency."""
+
+    def __init__(self, completions, delay=0.0):
+        self.completions = completions
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+
+    async def create(self, **kwargs):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        result = self.completions.create(**kwargs)
+        if not kwargs.get("stream"):
+            return result
+
+        async def stream():
+            for chunk in result:
+                yield chunk
+        return stream()
+
+
+class FakeVectorStore:
+    """Vector store that returns a fixed context."""
+
+    content_version = "v1"
+
+    def build_context(self, query, filters=None):
+        return {"text": "Standard shipping takes 5-7 business days.", "tokens": 10}
+
+    async def abuild_context(self, query, filters=None):
+        return self.build_context(query, filters)
+
+
+@contextmanager
+def assistant_environment():
+    """Settings under which an assistant can be built offline (also for importing the web apps)."""
+    with mock.patch.object(config.Config, "OPENAI_API_KEY", "test-key"), \
+            mock.patch.object(config.Config, "SESSION_BACKEND", "memory"), \
+            mock.patch.object(config.Config, "ANSWER_CACHE_ENABLED", False), \
+            mock.patch.object(config.Config, "HISTORY_SUMMARY_ENABLED", False), \
+            mock.patch.object(config.Config, "KB_WATCH_INTERVAL", 0), \
+            mock.patch("src.assistant.customer_assistant.VectorStore", FakeVectorStore):
+        yield
+
+
+def make_assistant(script=()):
+    """Build an assistant whose OpenAI clients play back ``script``; returns (assistant, completions)."""
+    with assistant_environment():
+        assistant = CustomerSupportAssistant()
+    completions = FakeCompletions(script)
+    assistant.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    assistant.async_client = SimpleNamespace(chat=SimpleNamespace(completions=AsyncFakeCompletions(completions)))
+    return assistant, completions
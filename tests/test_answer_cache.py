@@ -0,0 +1,94 @@
+"""Unit tests for the answer cache."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.assistant.answer_cache import AnswerCache
+
+ANSWER = {"response": "We accept all major cards.", "rag_used": True, "context_tokens": 120}
+
+
+def _key(question, kb_version="v1"):
+    return AnswerCache.make_key(question, kb_version, "model", "system prompt")
+
+
+class TestAnswerCache(unittest.TestCase):
+    """Test cases for keys, versions and the disk tier."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "answers.sqlite3")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_key_normalizes_question(self):
+        """Test that questions differing only in case, spacing and punctuation share a key."""
+        self.assertEqual(_key("What payment methods do you accept?"), _key("  what payment methods do you ACCEPT"))
+        self.assertNotEqual(_key("What payment methods do you accept?"), _key("How long does shipping take?"))
+
+    def test_key_depends_on_version_model_and_prompt(self):
+        """Test that the key changes with the KB version, the model and the system prompt."""
+        key = _key("question")
+        self.assertNotEqual(key, _key("question", kb_version="v2"))
+        self.assertNotEqual(key, AnswerCache.make_key("question", "v1", "other-model", "system prompt"))
+        self.assertNotEqual(key, AnswerCache.make_key("question", "v1", "model", "new prompt"))
+
+    def test_get_and_put(self):
+        """Test that a stored answer is returned for its key."""
+        cache = AnswerCache()
+        self.assertIsNone(cache.get(_key("q"), "v1"))
+        cache.put(_key("q"), "v1", ANSWER)
+        self.assertEqual(cache.get(_key("q"), "v1"), ANSWER)
+
+    def test_new_version_drops_old_answers(self):
+        """Test that answers of an older KB version are dropped."""
+        cache = AnswerCache(path=self.path)
+        cache.put(_key("q"), "v1", ANSWER)
+        self.assertIsNone(cache.get(_key("q", "v2"), "v2"))
+        self.assertEqual(len(cache.memory), 0)
+        cache.close()
+
+        # The old version's rows are gone from disk too
+        reopened = AnswerCache(path=self.path)
+        self.assertIsNone(reopened.get(_key("q"), "v1"))
+        reopened.close()
+
+    def test_disk_tier_survives_restart(self):
+        """Test that answers on disk are served by a new cache instance."""
+        cache = AnswerCache(path=self.path)
+        cache.put(_key("q"), "v1", ANSWER)
+        cache.close()
+
+        reopened = AnswerCache(path=self.path)
+        self.assertEqual(reopened.get(_key("q"), "v1"), ANSWER)
+        self.assertEqual(reopened.stats()["disk_hits"], 1)
+        reopened.close()
+
+    def test_disk_entries_expire(self):
+        """Test that disk entries older than the TTL are not served."""
+        cache = AnswerCache(path=self.path, ttl_seconds=60)
+        with mock.patch("src.assistant.answer_cache.time.time", return_value=1000.0):
+            cache.put(_key("q"), "v1", ANSWER)
+        cache.memory.clear()
+        with mock.patch("src.assistant.answer_cache.time.time", return_value=1100.0):
+            self.assertIsNone(cache.get(_key("q"), "v1"))
+        cache.close()
+
+    def test_forked_worker_opens_its_own_connection(self):
+        """Test that a process other than the one that created the cache never uses its connection."""
+        cache = AnswerCache(path=self.path)
+        cache.put(_key("q"), "v1", ANSWER)
+        parent_connection = cache._conn
+        cache.memory.clear()
+
+        with mock.patch("src.assistant.answer_cache.os.getpid", return_value=os.getpid() + 1):
+            self.assertEqual(cache.get(_key("q"), "v1"), ANSWER)
+            self.assertIsNot(cache._conn, parent_connection)
+            cache.close()
+        parent_connection.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""Unit tests for the Flask web app's chat endpoints, with a scripted OpenAI client."""
+import json
+import unittest
+from unittest import mock
+
+import config
+from fakes import assistant_environment, make_assistant, reply, tool_call
+
+with assistant_environment():
+    from src.ui import app as web_app
+
+
+def _parse_events(body):
+    """Split a Server-Sent Events body into (event name, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestChatStreamEndpoint(unittest.TestCase):
+    """Test cases for POST /api/chat/stream."""
+
+    def setUp(self):
+        for name in ("INTENT_ROUTER_ENABLED", "PREFETCH_TOOLS"):
+            patcher = mock.patch.object(config.Config, name, False)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.assistant, self.completions = make_assistant([
+            tool_call("get_order_status", {"order_id": "ORD-12345"}),
+            reply("Your order has shipped."),
+        ])
+        patcher = mock.patch.object(web_app, "assistant", self.assistant)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = web_app.app.test_client()
+
+    def test_streams_events(self):
+        """Test that the turn's events arrive as named SSE events, ending with done."""
+        response = self.client.post("/api/chat/stream", json={"message": "Is ORD-12345 late?"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "text/event-stream")
+
+        events = _parse_events(response.get_data(as_text=True))
+        self.assertEqual([name for name, _ in events], ["tool_call", "tool_result", "delta", "delta", "done"])
+        self.assertTrue(all(name == data["type"] for name, data in events))
+        done = events[-1][1]
+        self.assertEqual(done["response"], "Your order has shipped.")
+        self.assertEqual(done["usage"]["cached_tokens"], 2048)
+
+        with self.client.session_transaction() as session:
+            conversation_id = session["conversation_id"]
+        self.assertEqual(len(self.assistant.get_conversation_history(conversation_id)), 2)
+
+    def test_error_event_hides_traceback(self):
+        """Test that a failed turn is reported as an error event without the traceback."""
+        self.completions.script.clear()
+        response = self.client.post("/api/chat/stream", json={"message": "Is ORD-12345 late?"})
+        name, data = _parse_events(response.get_data(as_text=True))[-1]
+        self.assertEqual(name, "error")
+        self.assertNotIn("error_trace", data)
+
+    def test_exception_from_the_stream_becomes_an_error_event(self):
+        """Test that an exception escaping the assistant's stream still ends the response with an error event."""
+        def failing_stream(message, conversation_id):
+            yield {"type": "delta", "content": "Let me"}
+            raise RuntimeError("store unavailable")
+
+        with mock.patch.object(self.assistant, "chat_stream", failing_stream):
+            response = self.client.post("/api/chat/stream", json={"message": "Is ORD-12345 late?"})
+        events = _parse_events(response.get_data(as_text=True))
+        self.assertEqual([name for name, _ in events], ["delta", "error"])
+        self.assertEqual(events[-1][1]["error"], "store unavailable")
+        self.assertTrue(events[-1][1]["needs_escalation"])
+
+    def test_empty_message(self):
+        """Test that an empty message is rejected before streaming starts."""
+        response = self.client.post("/api/chat/stream", json={"message": "  "})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
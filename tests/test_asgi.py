@@ -0,0 +1,85 @@
+"""Unit tests for the ASGI app's chat endpoints, with a scripted OpenAI client."""
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+import httpx
+
+import config
+from fakes import assistant_environment, make_assistant, reply, tool_call
+
+with assistant_environment():
+    from src.ui import asgi
+
+
+def _parse_events(body):
+    """Split a Server-Sent Events body into (event name, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+async def _post(path, payload):
+    transport = httpx.ASGITransport(app=asgi.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post(path, json=payload)
+
+
+class TestASGIChat(unittest.TestCase):
+    """Test cases for /api/chat and /api/chat/stream on the ASGI app."""
+
+    def setUp(self):
+        for name in ("INTENT_ROUTER_ENABLED", "PREFETCH_TOOLS"):
+            patcher = mock.patch.object(config.Config, name, False)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.assistant, self.completions = make_assistant([
+            tool_call("get_order_status", {"order_id": "ORD-12345"}),
+            reply("Your order has shipped."),
+        ])
+        patcher = mock.patch.object(asgi, "assistant", self.assistant)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_chat(self):
+        """Test a blocking chat turn and the conversation cookie."""
+        response = asyncio.run(_post("/api/chat", {"message": "Is ORD-12345 late?"}))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["response"], "Your order has shipped.")
+        self.assertEqual([made["tool"] for made in data["tool_calls"]], ["get_order_status"])
+        self.assertEqual(response.cookies[asgi.CONVERSATION_COOKIE], data["conversation_id"])
+
+    def test_chat_stream(self):
+        """Test that a streamed turn arrives as named SSE events, ending with done."""
+        response = asyncio.run(_post("/api/chat/stream", {"message": "Is ORD-12345 late?"}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "text/event-stream")
+        events = _parse_events(response.text)
+        self.assertEqual([name for name, _ in events], ["tool_call", "tool_result", "delta", "delta", "done"])
+        self.assertEqual(events[-1][1]["usage"]["prompt_tokens"], 3000)
+
+    def test_failure_mid_stream_becomes_error_event(self):
+        """Test that an exception after the headers were sent ends the stream with an error event."""
+        async def failing_stream(user_message, conversation_id):
+            yield {"type": "delta", "content": "Let me"}
+            raise RuntimeError("connection reset")
+
+        with mock.patch.object(self.assistant, "achat_stream", failing_stream):
+            response = asyncio.run(_post("/api/chat/stream", {"message": "Is ORD-12345 late?"}))
+        self.assertEqual(response.status_code, 200)
+        events = _parse_events(response.text)
+        self.assertEqual([name for name, _ in events], ["delta", "error"])
+        self.assertEqual(events[-1][1]["error"], "connection reset")
+
+    def test_empty_message(self):
+        """Test that an empty message is rejected."""
+        response = asyncio.run(_post("/api/chat", {"message": ""}))
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
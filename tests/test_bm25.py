@@ -0,0 +1,49 @@
+"""Unit tests for BM25 keyword retrieval."""
+import unittest
+from src.rag.bm25 import BM25Index, tokenize
+
+
+class TestBM25Index(unittest.TestCase):
+    """Test cases for the inverted index and BM25 scoring."""
+
+    def setUp(self):
+        self.index = BM25Index()
+        self.index.build(
+            ["laptop", "wallet", "shipping"],
+            [
+                "ProBook 15: professional laptop with 16GB RAM. Price: $1299.",
+                "Leather Wallet: genuine leather, RFID blocking. Price: $49.99.",
+                "Standard shipping takes 5-7 business days. Express shipping takes 2-3 days."
+            ]
+        )
+
+    def test_tokenize_drops_stopwords(self):
+        """Test tokenization and stopword removal."""
+        self.assertEqual(tokenize("How much is the ProBook 15?"), ["probook", "15"])
+
+    def test_exact_token_ranks_first(self):
+        """Test that rare exact tokens find their chunk."""
+        hits = self.index.search("Does the wallet have RFID?", k=3)
+        self.assertEqual(hits[0]['id'], "wallet")
+        self.assertEqual(len(hits), 1)
+        self.assertGreaterEqual(hits[0]['coverage'], 0.8)
+
+    def test_unknown_terms_lower_coverage(self):
+        """Test that terms missing from the corpus reduce confidence."""
+        known = self.index.search("ProBook price", k=1)[0]['coverage']
+        unknown = self.index.search("ProBook warranty extension", k=1)[0]['coverage']
+        self.assertLess(unknown, known)
+
+    def test_search_restricted_to_ids(self):
+        """Test that chunks outside the allowed IDs are never scored."""
+        hits = self.index.search("leather wallet price", k=3, ids={"laptop", "shipping"})
+        self.assertEqual([hit['id'] for hit in hits], ["laptop"])
+        self.assertEqual(self.index.search("wallet", k=3, ids=set()), [])
+
+    def test_no_match(self):
+        """Test that queries without known terms return nothing."""
+        self.assertEqual(self.index.search("the a of", k=3), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""Unit tests for the markdown-structure-aware chunker."""
+import unittest
+from src.rag.chunker import MarkdownChunker
+
+
+FAQ = """# FAQs
+
+## Orders
+
+### How can I track my order?
+Use the tracking number from your confirmation email.
+
+### How long does shipping take?
+Standard shipping takes 5-7 business days.
+
+## Payments
+
+### What payment methods do you accept?
+Visa, Mastercard and PayPal.
+"""
+
+
+class TestMarkdownChunker(unittest.TestCase):
+    """Test cases for heading-based chunking."""
+
+    def test_questions_stay_with_answers(self):
+        """Test that each FAQ answer lands in the chunk of its question."""
+        chunks = MarkdownChunker(min_chunk_size=0).split_text(FAQ, "faqs.md")
+        self.assertEqual(len(chunks), 3)
+        self.assertIn("### How long does shipping take?\nStandard shipping", chunks[1]['content'])
+        self.assertEqual(
+            chunks[1]['metadata']['heading_path'],
+            "FAQs > Orders > How long does shipping take?"
+        )
+        self.assertTrue(chunks[2]['content'].startswith("# FAQs\n## Payments\n"))
+
+    def test_small_siblings_are_merged(self):
+        """Test that short sibling sections merge without crossing parents."""
+        chunks = MarkdownChunker(min_chunk_size=300).split_text(FAQ, "faqs.md")
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(chunks[0]['metadata']['heading_path'], "FAQs > Orders")
+        self.assertEqual(
+            chunks[0]['metadata']['headings'],
+            "How can I track my order? | How long does shipping take?"
+        )
+
+    def test_long_sections_split_without_overlap(self):
+        """Test that oversized sections are split on line boundaries."""
+        body = "\n".join(f"- Line {i} of a long policy section" for i in range(40))
+        chunks = MarkdownChunker(max_chunk_size=300).split_text(f"## Policy\n{body}", "p.md")
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk['content']), 300)
+            self.assertTrue(chunk['content'].startswith("## Policy\n"))
+        lines = [line for chunk in chunks for line in chunk['content'].splitlines()[1:]]
+        self.assertEqual(lines, body.splitlines())
+
+
+if __name__ == '__main__':
+    unittest.main()
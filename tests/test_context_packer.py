@@ -0,0 +1,40 @@
+"""Unit tests for token-budgeted context packing."""
+import unittest
+from src.rag.context_packer import pack_context
+from src.rag.tokenizer import count_tokens
+
+
+class TestContextPacker(unittest.TestCase):
+    """Test cases for deduplication and budget trimming."""
+
+    def test_shared_lines_are_sent_once(self):
+        """Test that headings and text repeated across chunks are removed."""
+        results = [
+            {'content': "# FAQs\n## Orders\nTrack orders in My Orders."},
+            {'content': "# FAQs\n## Payments\nWe accept Visa."},
+            {'content': "# FAQs\n## Orders\nTrack orders in My Orders."},
+        ]
+        packed = pack_context(results, token_budget=1000)
+        self.assertEqual(packed['text'].count("# FAQs"), 1)
+        self.assertEqual(packed['text'].count("Track orders"), 1)
+        self.assertEqual(packed['chunks_used'], 2)
+        self.assertEqual(packed['chunks_dropped'], 1)
+        self.assertEqual(packed['tokens'], count_tokens(packed['text']))
+
+    def test_budget_is_respected(self):
+        """Test that packing stops at the token budget."""
+        results = [{'content': f"Paragraph {i}: " + "refund policy details " * 40} for i in range(5)]
+        packed = pack_context(results, token_budget=300)
+        self.assertLessEqual(packed['tokens'], 300)
+        self.assertGreater(packed['chunks_dropped'], 0)
+        self.assertTrue(packed['text'].startswith("[Document 1]\nParagraph 0"))
+
+    def test_empty_results(self):
+        """Test packing nothing."""
+        packed = pack_context([], token_budget=100)
+        self.assertEqual(packed['text'], "")
+        self.assertEqual(packed['tokens'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
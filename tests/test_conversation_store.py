@@ -0,0 +1,96 @@
+"""Unit tests for the per-conversation history store."""
+import threading
+import unittest
+from unittest import mock
+
+from src.assistant.conversation_store import ConversationStore
+
+
+def _message(i):
+    return {"role": "user", "content": f"message {i}"}
+
+
+class TestConversationStore(unittest.TestCase):
+    """Test cases for isolation, caps and expiry."""
+
+    def test_conversations_are_isolated(self):
+        """Test that each conversation keeps its own messages."""
+        store = ConversationStore()
+        store.append("a", _message(1))
+        store.append("b", _message(2))
+
+        self.assertEqual(store.get_history("a"), [_message(1)])
+        self.assertEqual(store.get_history("b"), [_message(2)])
+        self.assertEqual(store.get_history("missing"), [])
+
+    def test_history_is_a_copy(self):
+        """Test that changing a returned history leaves the store alone."""
+        store = ConversationStore()
+        store.append("a", _message(1))
+        store.get_history("a").append(_message(2))
+        self.assertEqual(len(store.get_history("a")), 1)
+
+    def test_message_cap_drops_oldest(self):
+        """Test that the oldest messages are dropped beyond the cap."""
+        store = ConversationStore(max_messages=3)
+        for i in range(5):
+            store.append("a", _message(i))
+        self.assertEqual(store.get_history("a"), [_message(2), _message(3), _message(4)])
+
+    def test_least_recently_used_session_is_evicted(self):
+        """Test that the least recently used conversation goes first when full."""
+        store = ConversationStore(max_sessions=2)
+        store.append("a", _message(1))
+        store.append("b", _message(2))
+        store.get_history("a")  # "b" is now least recently used
+        store.append("c", _message(3))
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.get_history("b"), [])
+        self.assertEqual(store.get_history("a"), [_message(1)])
+        self.assertEqual(store.stats()["evictions"], 1)
+
+    def test_idle_sessions_expire(self):
+        """Test that conversations idle longer than the TTL are discarded."""
+        store = ConversationStore(ttl_seconds=60)
+        with mock.patch("src.assistant.conversation_store.time.monotonic", return_value=1000.0):
+            store.append("a", _message(1))
+        with mock.patch("src.assistant.conversation_store.time.monotonic", return_value=1030.0):
+            store.append("b", _message(2))
+        with mock.patch("src.assistant.conversation_store.time.monotonic", return_value=1070.0):
+            self.assertEqual(store.get_history("a"), [])
+            self.assertEqual(store.get_history("b"), [_message(2)])
+
+    def test_reset_only_affects_one_conversation(self):
+        """Test that resetting a conversation leaves the others alone."""
+        store = ConversationStore()
+        store.append("a", _message(1))
+        store.append("b", _message(2))
+        store.reset("a")
+
+        self.assertEqual(store.get_history("a"), [])
+        self.assertEqual(store.get_history("b"), [_message(2)])
+
+    def test_concurrent_turns_keep_their_messages_together(self):
+        """Test that turns holding the lock are never interleaved."""
+        store = ConversationStore()
+
+        def turn(i):
+            with store.lock("a"):
+                store.append("a", {"role": "user", "content": str(i)})
+                store.append("a", {"role": "assistant", "content": str(i)})
+
+        threads = [threading.Thread(target=turn, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        history = store.get_history("a")
+        self.assertEqual(len(history), 40)
+        for user, assistant in zip(history[::2], history[1::2]):
+            self.assertEqual(user["content"], assistant["content"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,277 @@
+"""Unit tests for the assistant's chat turns, with a scripted OpenAI client."""
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+import config
+from fakes import make_assistant, reply, tool_call
+from src.assistant.answer_cache import AnswerCache
+
+
+class TestChat(unittest.TestCase):
+    """Test cases for the blocking chat turn."""
+
+    def test_bare_order_id_continues_the_return_flow(self):
+        """Test that an order ID given in reply to the assistant goes to the LLM, not the fast path."""
+        assistant, completions = make_assistant([
+            reply("Sure, which order is the sweater from?"),
+            tool_call("create_return", {"order_id": "ORD-12345", "reason": "doesn't fit"}),
+            reply("I've started the return for order ORD-12345."),
+        ])
+        with mock.patch.object(config.Config, "INTENT_ROUTER_ENABLED", True):
+            assistant.chat("I'd like to start a return for a sweater that doesn't fit", "c")
+            result = assistant.chat("ORD-12345", "c")
+
+        self.assertEqual(len(completions.requests), 3)
+        self.assertNotIn("fast_path", result)
+        self.assertEqual([made["tool"] for made in result["tool_calls"]][-1], "create_return")
+        self.assertEqual(result["response"], "I've started the return for order ORD-12345.")
+
+    def test_bare_order_id_first_message_takes_fast_path(self):
+        """Test that a bare order ID opening a conversation is still answered without the LLM."""
+        assistant, completions = make_assistant()
+        with mock.patch.object(config.Config, "INTENT_ROUTER_ENABLED", True):
+            result = assistant.chat("ORD-12345", "c")
+        self.assertEqual(completions.requests, [])
+        self.assertTrue(result["fast_path"])
+
+    def test_return_question_is_answered_from_the_cache(self):
+        """Test that a returns FAQ with the refund policy prefetched is cached, unlike an order lookup."""
+        assistant, completions = make_assistant([
+            reply("You can return items within 30 days."),
+            reply("Your order has shipped."),
+            reply("Your order has shipped."),
+        ])
+        assistant.answer_cache = AnswerCache()
+        with mock.patch.object(config.Config, "INTENT_ROUTER_ENABLED", False), \
+                mock.patch.object(config.Config, "PREFETCH_TOOLS", True):
+            first = assistant.chat("How do I return an item?", "a")
+            second = assistant.chat("How do I return an item?", "b")
+            for conversation_id in ("c", "d"):
+                assistant.chat("Where is order ORD-12345?", conversation_id)
+
+        self.assertEqual([made["tool"] for made in first["tool_calls"]], ["get_refund_policy"])
+        self.assertTrue(second["cached"])
+        self.assertEqual(second["response"], first["response"])
+        self.assertEqual(len(completions.requests), 3)
+
+    def test_retrieval_runs_outside_the_tool_pool(self):
+        """Test that prefetched RAG context is built on the retrieval pool, not a tool worker."""
+        assistant, _ = make_assistant([reply("You can return items within 30 days.")])
+        threads = []
+        build_context = assistant.vector_store.build_context
+
+        def recording(query, filters=None):
+            threads.append(threading.current_thread().name)
+            return build_context(query, filters)
+
+        with mock.patch.object(assistant.vector_store, "build_context", recording), \
+                mock.patch.object(config.Config, "INTENT_ROUTER_ENABLED", False), \
+                mock.patch.object(config.Config, "PREFETCH_TOOLS", True):
+            result = assistant.chat("How do I return an item?", "c")
+
+        self.assertTrue(result["rag_used"])
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith("retrieval"))
+
+    def test_retrieval_failure_returns_apology(self):
+        """Test that a failure before the first completion still ends in the apology result."""
+        assistant, completions = make_assistant([reply("unused")])
+        with mock.patch.object(assistant.vector_store, "build_context", side_effect=RuntimeError("index unavailable")):
+            result = assistant.chat("How long does shipping take?", "c")
+        self.assertEqual(result["error"], "index unavailable")
+        self.assertTrue(result["needs_escalation"])
+        self.assertEqual(completions.requests, [])
+
+
+
+class TestChatStream(unittest.TestCase):
+    """Test cases for the streamed chat turn."""
+
+    def setUp(self):
+        for name in ("INTENT_ROUTER_ENABLED", "PREFETCH_TOOLS"):
+            patcher = mock.patch.object(config.Config, name, False)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_events_with_tool_call(self):
+        """Test the event order, merged tool call fragments, usage and history of a streamed turn."""
+        assistant, completions = make_assistant([
+            tool_call("get_order_status", {"order_id": "ORD-12345"}),
+            reply("Your order has shipped."),
+        ])
+        message = "Is order ORD-12345 going to be late?"
+        events = list(assistant.chat_stream(message, "c"))
+
+        self.assertEqual([event["type"] for event in events], ["tool_call", "tool_result", "delta", "delta", "done"])
+        self.assertEqual(events[0]["arguments"], {"order_id": "ORD-12345"})
+        self.assertTrue(events[1]["result"]["success"])
+        self.assertEqual("".join(event["content"] for event in events[2:4]), "Your order has shipped.")
+
+        done = events[-1]
+        self.assertEqual(done["response"], "Your order has shipped.")
+        self.assertEqual([made["tool"] for made in done["tool_calls"]], ["get_order_status"])
+        self.assertEqual(done["usage"]["prompt_tokens"], 3000)
+        self.assertEqual(done["usage"]["cached_tokens"], 2048)
+        self.assertEqual(len(done["usage"]["requests"]), 2)
+
+        # The fragments were merged into one call for the second completion
+        assistant_message = completions.requests[1]["messages"][-2]
+        self.assertEqual(assistant_message["tool_calls"][0]["function"]["arguments"], '{"order_id": "ORD-12345"}')
+        self.assertEqual(completions.requests[1]["messages"][-1]["role"], "tool")
+
+        # The turn is recorded once: the message and the final answer
+        self.assertEqual(assistant.get_conversation_history("c"), [
+            {"role": "user", "content": message},
+            {"role": "assistant", "content": "Your order has shipped."},
+        ])
+
+    def test_text_only_turn(self):
+        """Test that a turn without tools streams deltas and then done."""
+        assistant, completions = make_assistant([reply("We ship worldwide.")])
+        events = list(assistant.chat_stream("Do you ship abroad?", "c"))
+
+        self.assertEqual([event["type"] for event in events], ["delta", "delta", "done"])
+        self.assertEqual(events[-1]["usage"]["prompt_tokens"], 1500)
+        self.assertEqual(len(assistant.get_conversation_history("c")), 2)
+
+    def test_error_event(self):
+        """Test that a failing completion ends the stream with an error event."""
+        assistant, completions = make_assistant([])
+        events = list(assistant.chat_stream("Do you ship abroad?", "c"))
+        self.assertEqual(events[-1]["type"], "error")
+        self.assertTrue(events[-1]["needs_escalation"])
+
+    def test_retrieval_failure_ends_with_error_event(self):
+        """Test that a failure before the first completion is reported as an error event."""
+        assistant, _ = make_assistant([reply("unused")])
+        with mock.patch.object(assistant.vector_store, "build_context", side_effect=RuntimeError("index unavailable")):
+            events = list(assistant.chat_stream("How long does shipping take?", "c"))
+        self.assertEqual([event["type"] for event in events], ["error"])
+        self.assertEqual(events[0]["error"], "index unavailable")
+
+        async def collect():
+            return [event async for event in assistant.achat_stream("How long does shipping take?", "d")]
+
+        with mock.patch.object(assistant.vector_store, "build_context", side_effect=RuntimeError("index unavailable")):
+            self.assertEqual([event["type"] for event in asyncio.run(collect())], ["error"])
+            self.assertEqual(asyncio.run(assistant.achat("How long does shipping take?", "e"))["error"], "index unavailable")
+
+
+
+class TestAsyncChat(unittest.TestCase):
+    """Test cases for the async chat turns."""
+
+    def setUp(self):
+        for name in ("INTENT_ROUTER_ENABLED", "PREFETCH_TOOLS"):
+            patcher = mock.patch.object(config.Config, name, False)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_achat_with_tool_call(self):
+        """Test that an async turn runs the tool and answers from its result."""
+        assistant, completions = make_assistant([
+            tool_call("get_order_status", {"order_id": "ORD-12345"}),
+            reply("Your order has shipped."),
+        ])
+        result = asyncio.run(assistant.achat("Is order ORD-12345 going to be late?", "c"))
+
+        self.assertEqual(result["response"], "Your order has shipped.")
+        self.assertEqual([made["tool"] for made in result["tool_calls"]], ["get_order_status"])
+        self.assertEqual(len(result["usage"]["requests"]), 2)
+        self.assertEqual(len(assistant.get_conversation_history("c")), 2)
+
+    def test_achat_stream_events(self):
+        """Test that the async stream yields the same events as chat_stream."""
+        script = [tool_call("get_order_status", {"order_id": "ORD-12345"}), reply("Your order has shipped.")]
+        assistant, _ = make_assistant(script)
+        sync_events = list(assistant.chat_stream("Is ORD-12345 late?", "sync"))
+        assistant, _ = make_assistant(script)
+
+        async def collect():
+            return [event async for event in assistant.achat_stream("Is ORD-12345 late?", "async")]
+
+        async_events = asyncio.run(collect())
+        self.assertEqual([event["type"] for event in async_events], [event["type"] for event in sync_events])
+        self.assertEqual(async_events[-1]["response"], sync_events[-1]["response"])
+        self.assertEqual(async_events[-1]["usage"], sync_events[-1]["usage"])
+
+    def test_concurrent_turns_of_one_conversation_are_serialized(self):
+        """Test that two coroutines on one conversation run one after the other, each seeing the last."""
+        assistant, completions = make_assistant([reply("First answer."), reply("Second answer.")])
+        assistant.async_client.chat.completions.delay = 0.05
+
+        async def both():
+            return await asyncio.gather(
+                assistant.achat("First question", "c"),
+                assistant.achat("Second question", "c")
+            )
+
+        asyncio.run(both())
+        self.assertEqual(assistant.async_client.chat.completions.max_active, 1)
+        # The second turn's prompt contains the whole first turn
+        contents = [message["content"] for message in completions.requests[1]["messages"]]
+        self.assertIn("First answer.", contents)
+        self.assertEqual(
+            [message["content"] for message in assistant.get_conversation_history("c")],
+            ["First question", "First answer.", "Second question", "Second answer."]
+        )
+
+    def test_different_conversations_overlap(self):
+        """Test that async turns of different conversations wait on the model together."""
+        assistant, _ = make_assistant([reply("One."), reply("Two.")])
+        assistant.async_client.chat.completions.delay = 0.05
+
+        async def both():
+            return await asyncio.gather(assistant.achat("Hello", "a"), assistant.achat("Hello", "b"))
+
+        asyncio.run(both())
+        self.assertEqual(assistant.async_client.chat.completions.max_active, 2)
+
+    def test_session_io_runs_off_the_event_loop(self):
+        """Test that history reads and writes happen on worker threads, not the loop thread."""
+        assistant, _ = make_assistant([reply("Hello there.")])
+        store = assistant.conversations
+        threads = []
+        for name in ("get_history", "append"):
+            method = getattr(store, name)
+
+            def recording(*args, _method=method, **kwargs):
+                threads.append(threading.get_ident())
+                return _method(*args, **kwargs)
+            setattr(store, name, recording)
+
+        async def turn():
+            return threading.get_ident(), await assistant.achat("Hello", "c")
+
+        loop_thread, result = asyncio.run(turn())
+        self.assertEqual(result["response"], "Hello there.")
+        self.assertTrue(threads)
+        self.assertNotIn(loop_thread, threads)
+
+    def test_store_lock_is_free_while_waiting_on_the_model(self):
+        """Test that no thread holds the conversation's store lock across the completion await."""
+        assistant, _ = make_assistant([reply("Hello there.")])
+        assistant.async_client.chat.completions.delay = 0.2
+        acquired = []
+
+        def other_thread():
+            with assistant.conversations.lock("c"):
+                acquired.append(True)
+
+        async def turn():
+            task = asyncio.ensure_future(assistant.achat("Hello", "c"))
+            while not assistant.async_client.chat.completions.active:
+                await asyncio.sleep(0.005)
+            thread = threading.Thread(target=other_thread)
+            thread.start()
+            await asyncio.get_running_loop().run_in_executor(None, thread.join, 0.1)
+            self.assertEqual(acquired, [True])
+            return await task
+
+        asyncio.run(turn())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Unit tests for the persistent embedding cache."""
+import itertools
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src.rag.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class FakeEmbeddings:
+    """Embeddings stub that records which texts reach the 'API'."""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        self.calls.append(text)
+        return [float(len(text)), 1.0]
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Test cases for cached embeddings."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = EmbeddingCache(os.path.join(self.tmpdir.name, "cache.sqlite3"), max_entries=3)
+        self.fake = FakeEmbeddings()
+        self.embeddings = CachedEmbeddings(self.fake, "test-model", self.cache)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+    def test_repeated_query_hits_cache(self):
+        """Test that a repeated query is not re-embedded."""
+        first = self.embeddings.embed_query("How long does shipping take?")
+        second = self.embeddings.embed_query("  How long  does shipping take? ")
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.fake.calls), 1)
+
+    def test_documents_only_embed_misses(self):
+        """Test that only uncached documents reach the model."""
+        self.embeddings.embed_documents(["a", "bb"])
+        vectors = self.embeddings.embed_documents(["bb", "ccc", "ccc"])
+        self.assertEqual(self.fake.calls, ["a", "bb", "ccc"])
+        self.assertEqual(vectors[0], [2.0, 1.0])
+        self.assertEqual(vectors[1], vectors[2])
+
+    def test_model_is_part_of_key(self):
+        """Test that different models do not share entries."""
+        self.embeddings.embed_query("hello")
+        other = CachedEmbeddings(self.fake, "other-model", self.cache)
+        other.embed_query("hello")
+        self.assertEqual(len(self.fake.calls), 2)
+
+    def test_size_bounded_eviction(self):
+        """Test that the cache never grows beyond max_entries."""
+        self.embeddings.embed_documents(["a", "bb", "ccc", "dddd", "eeeee"])
+        self.assertEqual(len(self.cache), 3)
+
+    def test_hits_defer_last_used_updates(self):
+        """Test that cache hits are written in a batch with the next put, not one commit per read."""
+        self.embeddings.embed_query("hello")
+        key = self.cache.text_key("hello")
+        conn = self.cache._connection()
+        stored = conn.execute("SELECT last_used FROM embeddings").fetchone()[0]
+
+        statements = []
+        conn.set_trace_callback(statements.append)
+        with mock.patch("src.rag.embedding_cache.time.time", return_value=stored + 1):
+            self.embeddings.embed_query("hello")
+        self.assertFalse([sql for sql in statements if not sql.startswith("SELECT")])
+        self.assertEqual(self.cache._touched, {("test-model", key): stored + 1})
+
+        self.embeddings.embed_query("world")
+        conn.set_trace_callback(None)
+        used = conn.execute("SELECT last_used FROM embeddings WHERE text_hash = ?", (key,)).fetchone()[0]
+        self.assertEqual(used, stored + 1)
+        self.assertEqual(self.cache._touched, {})
+
+    def test_eviction_counts_rows_only_near_the_limit(self):
+        """Test that puts below the limit never count the table, and eviction trims to the low-water mark."""
+        cache = EmbeddingCache(os.path.join(self.tmpdir.name, "large.sqlite3"), max_entries=20)
+        self.addCleanup(cache.close)
+        statements = []
+        cache._connection().set_trace_callback(statements.append)
+
+        clock = itertools.count(1000.0)
+        with mock.patch("src.rag.embedding_cache.time.time", side_effect=lambda: next(clock)):
+            for i in range(20):
+                cache.put_many("m", {f"key-{i}": [float(i)]})
+            self.assertFalse([sql for sql in statements if "COUNT" in sql])
+
+            cache.put_many("m", {"key-20": [20.0]})
+        self.assertEqual(len([sql for sql in statements if "COUNT" in sql]), 1)
+        self.assertEqual(len(cache), cache.low_water)
+        self.assertEqual(cache.low_water, 18)
+        kept = {row[0] for row in cache._connection().execute("SELECT text_hash FROM embeddings")}
+        self.assertIn("key-20", kept)
+        self.assertNotIn("key-0", kept)
+
+    def test_forked_worker_opens_its_own_connection(self):
+        """Test that a process with a different pid does not reuse the inherited connection."""
+        parent = self.cache._connection()
+        self.embeddings.embed_query("hello")
+        with mock.patch("src.rag.embedding_cache.os.getpid", return_value=os.getpid() + 1):
+            child = self.cache._connection()
+            self.assertIsNot(child, parent)
+            self.assertEqual(self.cache._estimated_count, 1)
+            self.embeddings.embed_query("hello")
+        self.assertEqual(len(self.fake.calls), 1)
+        child.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
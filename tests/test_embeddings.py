@@ -0,0 +1,136 @@
+"""Unit tests for the local embedding backend, with a stubbed sentence-transformers model."""
+import hashlib
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import config
+from src.rag import embeddings
+from src.rag.embeddings import LocalEmbeddings, create_embeddings
+from src.rag.manifest import IndexManifest, MANIFEST_FILENAME
+from src.rag.vector_store import VectorStore
+
+KNOWLEDGE_BASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "knowledge_base")
+
+# Each stub model embeds into a space of its own size, so mixed vectors could not even be stacked
+DIMENSIONS = {"model-a": 8, "model-b": 16}
+
+
+class FakeSentenceTransformer:
+    """Stand-in for sentence_transformers.SentenceTransformer that records loads and encode calls."""
+
+    loads = []
+
+    def __init__(self, model_name, device="cpu"):
+        FakeSentenceTransformer.loads.append((model_name, device))
+        self.dimension = DIMENSIONS.get(model_name, 8)
+        self.encode_calls = []
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, convert_to_numpy=True, show_progress_bar=False):
+        self.encode_calls.append({"count": len(texts), "batch_size": batch_size})
+        vectors = np.array([
+            [int(hashlib.md5(f"{text}:{i}".encode()).hexdigest(), 16) % 1000 + 1 for i in range(self.dimension)]
+            for text in texts
+        ], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class LocalEmbeddingsTestCase(unittest.TestCase):
+    """Installs the stub model and an empty model registry."""
+
+    def setUp(self):
+        FakeSentenceTransformer.loads = []
+        module = types.ModuleType("sentence_transformers")
+        module.SentenceTransformer = FakeSentenceTransformer
+        for patcher in (
+            mock.patch.dict(sys.modules, {"sentence_transformers": module}),
+            mock.patch.dict(embeddings._LOCAL_MODELS, clear=True),
+            mock.patch.object(config.Config, "EMBEDDING_BACKEND", "local"),
+            mock.patch.object(config.Config, "EMBEDDING_CACHE_PATH", ""),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class TestLocalEmbeddings(LocalEmbeddingsTestCase):
+    """Test cases for model loading and batching."""
+
+    def test_model_loads_once_per_process(self):
+        """Test that every LocalEmbeddings of one model shares a single loaded model."""
+        first = LocalEmbeddings("model-a")
+        second = LocalEmbeddings("model-a", batch_size=8)
+        self.assertIs(first.model, second.model)
+        self.assertEqual(FakeSentenceTransformer.loads, [("model-a", "cpu")])
+
+        LocalEmbeddings("model-b")
+        self.assertEqual(len(FakeSentenceTransformer.loads), 2)
+
+    def test_configured_batch_size_is_passed_through(self):
+        """Test that create_embeddings encodes with Config.EMBEDDING_BATCH_SIZE."""
+        with mock.patch.object(config.Config, "LOCAL_EMBEDDING_MODEL", "model-a"), \
+                mock.patch.object(config.Config, "EMBEDDING_BATCH_SIZE", 16):
+            local, model_id = create_embeddings()
+        self.assertEqual(model_id, "local:model-a")
+
+        vectors = local.embed_documents([f"text {i}" for i in range(40)])
+        self.assertEqual(len(vectors), 40)
+        self.assertEqual(local.model.encode_calls, [{"count": 40, "batch_size": 16}])
+        self.assertEqual(local.embed_documents([]), [])
+        self.assertAlmostEqual(float(np.linalg.norm(local.embed_query("hello"))), 1.0, places=5)
+
+
+class TestModelChange(LocalEmbeddingsTestCase):
+    """Test cases for switching the local model under an existing index."""
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.index_dir = os.path.join(self.tmpdir.name, "flat")
+        for name, value in {
+            "KNOWLEDGE_BASE_DIR": KNOWLEDGE_BASE,
+            "INDEX_BACKEND": "flat",
+            "FLAT_INDEX_DIR": self.index_dir,
+            "INDEX_SNAPSHOT_DIR": "",
+            "INDEX_PRECISION": "float32",
+            "INDEX_GENERATION_GRACE_SECONDS": 0,
+        }.items():
+            patcher = mock.patch.object(config.Config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _store(self, model_name):
+        with mock.patch.object(config.Config, "LOCAL_EMBEDDING_MODEL", model_name):
+            return VectorStore()
+
+    def test_new_model_rebuilds_index(self):
+        """Test that a different model id re-embeds every chunk instead of mixing vector spaces."""
+        first = self._store("model-a")
+        chunk_count = first.index.count()
+        self.assertEqual(first.index.vectors.shape[1], DIMENSIONS["model-a"])
+
+        second = self._store("model-b")
+        model = embeddings._LOCAL_MODELS[("model-b", "cpu")]
+        self.assertEqual(sum(call["count"] for call in model.encode_calls), chunk_count)
+        self.assertEqual(second.index.count(), chunk_count)
+        self.assertEqual(second.index.vectors.shape[1], DIMENSIONS["model-b"])
+
+        manifest = IndexManifest.load(os.path.join(second.persist_directory, MANIFEST_FILENAME))
+        self.assertEqual(manifest.embedding_model, "local:model-b")
+
+    def test_same_model_embeds_nothing_on_restart(self):
+        """Test that restarting with the same model reuses every stored vector."""
+        self._store("model-a")
+        model = embeddings._LOCAL_MODELS[("model-a", "cpu")]
+        model.encode_calls.clear()
+        self._store("model-a")
+        self.assertEqual(model.encode_calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""Unit tests for the NumPy flat and IVF vector indexes."""
+import tempfile
+import unittest
+import numpy as np
+from src.rag.flat_index import FlatIndex, quantize_rows
+from src.rag.ivf_index import IVFIndex
+
+
+class TestFlatIndex(unittest.TestCase):
+    """Test cases for exact flat index search and persistence."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.index = FlatIndex(self.tmpdir.name)
+        self.index.upsert(
+            ids=["a", "b", "c"],
+            texts=["alpha", "beta", "gamma"],
+            metadatas=[{"source": "a.md"}, {"source": "b.md"}, {"source": "c.md"}],
+            vectors=[[1.0, 0.0], [0.0, 2.0], [1.0, 1.0]]
+        )
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_query_orders_by_distance(self):
+        """Test that hits come back nearest first with Chroma-style L2 scores."""
+        hits = self.index.query([1.0, 0.0], k=2)
+        self.assertEqual([hit['id'] for hit in hits], ["a", "c"])
+        self.assertAlmostEqual(hits[0]['score'], 0.0, places=5)
+        self.assertAlmostEqual(hits[1]['score'], 2.0 - 2.0 ** 0.5, places=5)
+        self.assertEqual(hits[0]['metadata'], {"source": "a.md"})
+
+    def test_query_many_matches_single_queries(self):
+        """Test that batched scoring returns the same hits as one-by-one queries."""
+        queries = [[1.0, 0.0], [0.0, 1.0], [0.6, 0.8]]
+        batched = self.index.query_many(queries, k=2)
+        self.assertEqual(batched, [self.index.query(query, k=2) for query in queries])
+
+    def test_query_restricted_to_ids(self):
+        """Test that filtered queries only score the allowed chunks."""
+        hits = self.index.query([1.0, 0.0], k=3, ids=["b", "c", "missing"])
+        self.assertEqual([hit['id'] for hit in hits], ["c", "b"])
+        self.assertEqual(self.index.query([1.0, 0.0], k=3, ids=[]), [])
+
+    def test_upsert_replaces_and_delete_removes(self):
+        """Test replacing and deleting chunks by ID."""
+        self.index.upsert(["a"], ["alpha2"], [{}], [[0.0, 1.0]])
+        self.index.delete(["b"])
+        self.assertEqual(self.index.count(), 2)
+        self.assertEqual(self.index.query([0.0, 1.0], k=1)[0]['content'], "alpha2")
+
+    def test_reopen_is_memory_mapped(self):
+        """Test that the persisted index reloads with the same contents."""
+        reopened = FlatIndex(self.tmpdir.name, read_only=True)
+        self.assertEqual(reopened.count(), 3)
+        self.assertEqual(reopened.query([0.0, 1.0], k=1)[0]['id'], "b")
+        with self.assertRaises(RuntimeError):
+            reopened.delete(["a"])
+
+
+class TestQuantizedIndex(unittest.TestCase):
+    """Test cases for float16/int8 scan vectors with full-precision re-ranking."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.vectors = rng.standard_normal((300, 32)).astype(np.float32)
+        self.ids = [str(i) for i in range(300)]
+        self.exact = FlatIndex(tempfile.mkdtemp(dir=self.tmpdir.name))
+        self.exact.upsert(self.ids, [""] * 300, [{}] * 300, self.vectors)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _build(self, precision, rerank_factor=4):
+        index = FlatIndex(tempfile.mkdtemp(dir=self.tmpdir.name), precision=precision,
+                          rerank_factor=rerank_factor)
+        index.upsert(self.ids, [""] * 300, [{}] * 300, self.vectors)
+        return index
+
+    def test_int8_roundtrip_error_is_small(self):
+        """Test that per-row scales keep the int8 reconstruction close."""
+        codes, scales = quantize_rows(self.vectors, "int8")
+        self.assertEqual(codes.dtype, np.int8)
+        restored = codes.astype(np.float32) * scales[:, None]
+        self.assertLess(np.abs(restored - self.vectors).max(), scales.max())
+
+    def test_reranked_results_match_exact_search(self):
+        """Test that re-ranking returns exact hits and float32 scores."""
+        for precision in ("float16", "int8"):
+            index = self._build(precision)
+            for row in (0, 17, 123):
+                expected = self.exact.query(self.vectors[row], k=5)
+                found = index.query(self.vectors[row], k=5)
+                self.assertEqual([hit['id'] for hit in found], [hit['id'] for hit in expected])
+                self.assertAlmostEqual(found[1]['score'], expected[1]['score'], places=5)
+
+    def test_reopen_maps_quantized_vectors(self):
+        """Test that the quantized matrix is persisted and memory-mapped."""
+        index = self._build("int8")
+        reopened = FlatIndex(index.directory, read_only=True, precision="int8")
+        self.assertIsInstance(reopened.codes, np.memmap)
+        self.assertEqual(reopened.codes.dtype, np.int8)
+        self.assertEqual(
+            [hit['id'] for hit in reopened.query_many([self.vectors[5]], k=3)[0]],
+            [hit['id'] for hit in index.query(self.vectors[5], k=3)]
+        )
+
+
+class TestIVFIndex(unittest.TestCase):
+    """Test cases for the approximate IVF index."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.vectors = rng.standard_normal((500, 16)).astype(np.float32)
+        self.ids = [str(i) for i in range(500)]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _build(self, **kwargs):
+        index = IVFIndex(self.tmpdir.name, **kwargs)
+        index.upsert(self.ids, [""] * 500, [{}] * 500, self.vectors)
+        return index
+
+    def test_small_index_searches_exactly(self):
+        """Test that an index below min_train_size is not clustered."""
+        index = self._build(min_train_size=1000)
+        self.assertIsNone(index.centroids)
+        self.assertEqual(index.query(self.vectors[7], k=1)[0]['id'], "7")
+
+    def test_full_probe_matches_exact_search(self):
+        """Test that probing every list returns the exact neighbors."""
+        index = self._build(nlist=10, min_train_size=100)
+        self.assertEqual(len(index.centroids), 10)
+        exact = FlatIndex.query(index, self.vectors[3], k=5)
+        approx = index.query(self.vectors[3], k=5, nprobe=10)
+        self.assertEqual([hit['id'] for hit in approx], [hit['id'] for hit in exact])
+
+    def test_filtered_query_is_exact(self):
+        """Test that a search over a subset of IDs ignores the probed lists."""
+        index = self._build(nlist=10, nprobe=1, min_train_size=100)
+        allowed = self.ids[::7]
+        expected = FlatIndex.query_many(index, [self.vectors[3]], k=4, ids=allowed)[0]
+        found = index.query(self.vectors[3], k=4, ids=allowed)
+        self.assertEqual([hit['id'] for hit in found], [hit['id'] for hit in expected])
+        self.assertTrue(all(hit['id'] in allowed for hit in found))
+
+    def test_reload_keeps_assignments(self):
+        """Test that centroids and assignments survive a reopen."""
+        self._build(nlist=10, min_train_size=100)
+        reopened = IVFIndex(self.tmpdir.name, nprobe=2, min_train_size=100)
+        self.assertEqual(len(reopened.centroids), 10)
+        self.assertEqual(reopened.query(self.vectors[42], k=1)[0]['id'], "42")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+"""Unit tests for token-budgeted conversation history."""
+import threading
+import unittest
+
+from src.assistant.history_manager import HistoryManager, SUMMARY_PREFIX
+
+
+def _conversation(turns, words=20):
+    """A history of user/assistant turns, each message about ``words`` words long."""
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"question {i} " + "word " * words})
+        history.append({"role": "assistant", "content": f"answer {i} " + "word " * words})
+    return history
+
+
+def _summarizer(calls):
+    def summarize(summary, messages):
+        calls.append((summary, messages))
+        return (summary + " " if summary else "") + " ".join("".join(m["content"].split()[:2]) for m in messages)
+    return summarize
+
+
+class TestHistoryManager(unittest.TestCase):
+    """Test cases for the budget, turn boundaries and the rolling summary."""
+
+    def test_short_history_is_sent_unchanged(self):
+        """Test that a history within the budget is sent as it is."""
+        manager = HistoryManager(None, token_budget=10000)
+        history = _conversation(3)
+        self.assertEqual(manager.compact("c", history), history)
+
+    def test_history_stays_within_budget(self):
+        """Test that only the newest whole turns that fit the budget are sent."""
+        manager = HistoryManager(None, token_budget=200)
+        history = _conversation(20)
+        messages = manager.compact("c", history)
+        self.assertLessEqual(sum(manager.message_tokens(m) for m in messages), 200)
+        self.assertEqual(messages, history[-len(messages):])
+        self.assertEqual(messages[0]["role"], "user")
+
+    def test_latest_turn_is_always_sent(self):
+        """Test that the latest turn is sent even when it alone exceeds the budget."""
+        manager = HistoryManager(None, token_budget=10)
+        history = _conversation(3) + [{"role": "user", "content": "word " * 100}]
+        self.assertEqual(manager.compact("c", history), history[-1:])
+
+    def test_tool_calls_are_not_split_from_their_results(self):
+        """Test that a tool call and its result are kept or dropped together."""
+        manager = HistoryManager(None, token_budget=60)
+        history = _conversation(5, words=5) + [
+            {"role": "user", "content": "where is ORD-12345"},
+            {"role": "assistant", "content": "", "tool_calls": [{"id": "1", "type": "function",
+             "function": {"name": "get_order_status", "arguments": "{\"order_id\": \"ORD-12345\"}"}}]},
+            {"role": "tool", "tool_call_id": "1", "content": "shipped " * 5},
+            {"role": "assistant", "content": "It has shipped."},
+        ]
+        messages = manager.compact("c", history)
+        self.assertEqual(messages[0]["role"], "user")
+        self.assertIn(history[-3], messages)
+
+    def test_older_turns_are_folded_in_the_background(self):
+        """Test that older turns are folded into a summary sent ahead of the rest."""
+        calls = []
+        manager = HistoryManager(_summarizer(calls), token_budget=300)
+        history = _conversation(20)
+        manager.compact("c", history)
+        manager.wait()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0][1][0], history[0])
+
+        messages = manager.compact("c", history)
+        self.assertTrue(messages[0]["content"].startswith(SUMMARY_PREFIX))
+        self.assertIn("question0", messages[0]["content"])
+        # Everything after the summary is sent verbatim, so nothing is lost
+        covered = len(history) - (len(messages) - 1)
+        self.assertEqual(messages[1:], history[covered:])
+        self.assertEqual(calls[0][1], history[:covered])
+
+    def test_folds_are_incremental(self):
+        """Test that each fold only adds the messages after the previous one."""
+        calls = []
+        manager = HistoryManager(_summarizer(calls), token_budget=300)
+        history = _conversation(20)
+        manager.compact("c", history)
+        manager.wait()
+        for turns in range(21, 40):
+            manager.compact("c", _conversation(turns))
+            manager.wait()
+        self.assertGreater(len(calls), 1)
+        # Each fold starts where the previous one ended
+        folded = [m for _, messages in calls for m in messages]
+        self.assertEqual(folded, _conversation(39)[:len(folded)])
+        self.assertTrue(calls[1][0])
+
+    def test_compact_does_not_wait_for_the_summarizer(self):
+        """Test that compact returns while a fold is still running."""
+        release = threading.Event()
+
+        def slow(summary, messages):
+            release.wait(5)
+            return "summary"
+
+        manager = HistoryManager(slow, token_budget=200)
+        messages = manager.compact("c", _conversation(20))
+        self.assertEqual(manager.stats()["pending"], 1)
+        self.assertNotIn(SUMMARY_PREFIX, messages[0]["content"])
+        release.set()
+        manager.wait()
+
+    def test_reset_discards_summary(self):
+        """Test that a reset conversation gets no summary of its old turns."""
+        manager = HistoryManager(_summarizer([]), token_budget=300)
+        manager.compact("c", _conversation(20))
+        manager.wait()
+        manager.reset("c")
+        messages = manager.compact("c", _conversation(1))
+        self.assertEqual(messages, _conversation(1))
+
+    def _folded(self, history, calls):
+        """Manager holding a summary of ``history``; returns it with the index of the first uncovered message."""
+        manager = HistoryManager(_summarizer(calls), token_budget=300)
+        manager.compact("c", history)
+        manager.wait()
+        return manager, len(calls[0][1])
+
+    def test_trimmed_history_keeps_summary_without_repeating_it(self):
+        """Test that the summary still applies once the store trimmed the oldest messages."""
+        history = _conversation(20)
+        manager, covered = self._folded(history, [])
+
+        # The store keeps the history at its cap by dropping the oldest messages:
+        # first up to the last folded one, then past it
+        later = [{"role": m["role"], "content": "later " + m["content"]} for m in _conversation(covered // 2 + 1)]
+        for dropped in (covered - 1, covered + 2):
+            trimmed = (history + later[:dropped])[-len(history):]
+            messages = manager.compact("c", trimmed)
+            self.assertTrue(messages[0]["content"].startswith(SUMMARY_PREFIX))
+            self.assertEqual(messages[1:], trimmed[len(trimmed) - len(messages) + 1:])
+            self.assertTrue(set(map(str, messages[1:])).isdisjoint(map(str, history[:covered])))
+
+    def test_repeated_exchange_is_not_mistaken_for_the_summary_end(self):
+        """Test that a later exchange identical to the last folded one does not hide newer turns."""
+        history = [message for _ in range(20) for message in _conversation(1)]
+        manager, covered = self._folded(history, [])
+
+        messages = manager.compact("c", history)
+        self.assertTrue(messages[0]["content"].startswith(SUMMARY_PREFIX))
+        self.assertEqual(messages[1:], history[covered:])
+        self.assertEqual(messages[-1], history[-1])
+
+    def test_summary_of_a_reset_conversation_is_not_sent(self):
+        """Test that a summary is dropped when the history was reset elsewhere, and rebuilt later."""
+        calls = []
+        manager, _ = self._folded(_conversation(20), calls)
+
+        restarted = [{"role": "user", "content": "new question"}]
+        self.assertEqual(manager.compact("c", restarted), restarted)
+
+        manager.compact("c", _conversation(15))
+        manager.wait()
+        self.assertEqual(calls[-1][0], "")
+        self.assertTrue(manager.compact("c", _conversation(15))[0]["content"].startswith(SUMMARY_PREFIX))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""Unit tests for the rule-based intent router."""
+import unittest
+from src.assistant.intent_router import IntentRouter
+from src.tools.mock_apis import execute_tool
+
+
+class TestIntentRouter(unittest.TestCase):
+    """Test cases for routing messages and rendering answers."""
+    
+    def setUp(self):
+        self.router = IntentRouter()
+    
+    def test_routes_order_status(self):
+        """Test that a plain order status question is routed with its ID."""
+        for message in ["Where is my order ORD-12345?", "track ord-12345 please", "ORD-12345"]:
+            route = self.router.route(message)
+            self.assertEqual(route["tool"], "get_order_status", message)
+            self.assertEqual(route["arguments"], {"order_id": "ORD-12345"})
+    
+    def test_routes_refund_status_and_policy(self):
+        """Test routing of return IDs and policy questions."""
+        self.assertEqual(self.router.route("Check status of return RET-12345")["tool"], "get_refund_status")
+        self.assertEqual(self.router.route("What is your return policy?")["tool"], "get_refund_policy")
+    
+    def test_leaves_ambiguous_messages_to_the_llm(self):
+        """Test that actions, complaints and compound requests are not routed."""
+        for message in [
+            "I want to return my order ORD-11111",
+            "Can I get a refund for order ORD-12345?",
+            "My order ORD-12345 arrived damaged",
+            "Where is ORD-12345? Also can I change the address?",
+            "Compare ORD-12345 and ORD-67890",
+            "I need to track my package",
+            "How long does shipping take?"
+        ]:
+            self.assertIsNone(self.router.route(message), message)
+    
+    def test_extra_words_go_to_the_llm(self):
+        """Test that a lookup with anything besides status phrasing is not answered from a template."""
+        for message in [
+            "Where is my order ORD-12345 - it was supposed to arrive monday, it is not here",
+            "Has ORD-12345 shipped? I need it by Friday",
+            "Status of RET-12345, the store said it was approved",
+            "What is your return policy for opened electronics?"
+        ]:
+            self.assertIsNone(self.router.route(message), message)
+        for message in [
+            "Hi, can you check the status of my order ORD-12345 please?",
+            "Has my order ORD-12345 shipped yet?",
+            "What's the status of my refund RET-12345?",
+            "What are your return policies?"
+        ]:
+            self.assertIsNotNone(self.router.route(message), message)
+    
+    def test_bare_id_is_not_routed_mid_conversation(self):
+        """Test that a bare ID answering an earlier question goes to the LLM."""
+        for message in ["ORD-12345", "RET-12345"]:
+            self.assertIsNotNone(self.router.route(message), message)
+            self.assertIsNone(self.router.route(message, has_history=True), message)
+        # Asking for the lookup outright is still routed
+        self.assertEqual(self.router.route("Where is ORD-12345?", has_history=True)["tool"], "get_order_status")
+    
+    def test_renders_order_status(self):
+        """Test the templated order status answer."""
+        route = self.router.route("Where is my order ORD-12345?")
+        answer = self.router.render(route, execute_tool(route["tool"], route["arguments"]))
+        self.assertIn("ORD-12345", answer)
+        self.assertIn("TRACK-789456", answer)
+    
+    def test_renders_unknown_order(self):
+        """Test that a missing order gets a templated answer."""
+        route = self.router.route("Where is my order ORD-99999?")
+        answer = self.router.render(route, execute_tool(route["tool"], route["arguments"]))
+        self.assertIn("couldn't find", answer)
+    
+    def test_other_failures_fall_back(self):
+        """Test that results without a template return None."""
+        route = self.router.route("Where is my order ORD-12345?")
+        self.assertIsNone(self.router.render(route, {"success": False, "error": "timed out"}))
+
+    
+    def test_likely_tool_calls(self):
+        """Test prefetch candidates for messages the router does not answer."""
+        self.assertEqual(
+            self.router.likely_tool_calls("Can I get a refund for order ORD-12345 and ord-67890? ORD-12345 first"),
+            [("get_order_status", {"order_id": "ORD-12345"}),
+             ("get_order_status", {"order_id": "ORD-67890"}),
+             ("get_refund_policy", {})]
+        )
+        self.assertEqual(
+            self.router.likely_tool_calls("Any news on RET-12345?"),
+            [("get_refund_status", {"return_id": "RET-12345"})]
+        )
+        self.assertEqual(self.router.likely_tool_calls("Do you ship internationally?"), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""Unit tests for the incremental indexing manifest."""
+import os
+import tempfile
+import unittest
+from src.rag.manifest import IndexManifest, content_hash, make_chunk_ids
+
+
+class TestIndexManifest(unittest.TestCase):
+    """Test cases for content-hash manifest bookkeeping."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "manifest.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_chunk_ids_are_stable_and_unique(self):
+        """Test that IDs depend on content only and duplicates stay unique."""
+        ids = make_chunk_ids("faqs.md", ["a", "b", "a"])
+        self.assertEqual(len(set(ids)), 3)
+        self.assertEqual(ids[:2], make_chunk_ids("faqs.md", ["a", "b"]))
+        self.assertNotEqual(ids[0], make_chunk_ids("policies.md", ["a"])[0])
+
+    def test_update_file_reports_only_changes(self):
+        """Test that only added and removed chunks are reported."""
+        manifest = IndexManifest(self.path)
+        first = make_chunk_ids("faqs.md", ["a", "b"])
+        added, removed = manifest.update_file("faqs.md", "h1", first, ["a", "b"])
+        self.assertEqual(added, first)
+        self.assertEqual(removed, [])
+
+        second = make_chunk_ids("faqs.md", ["a", "c"])
+        added, removed = manifest.update_file("faqs.md", "h2", second, ["a", "c"])
+        self.assertEqual(added, [second[1]])
+        self.assertEqual(removed, [first[1]])
+        self.assertEqual(manifest.chunk_count, 2)
+
+    def test_save_and_load_roundtrip(self):
+        """Test persisting the manifest to disk."""
+        manifest = IndexManifest(self.path)
+        ids = make_chunk_ids("faqs.md", ["a"])
+        manifest.update_file("faqs.md", content_hash("a"), ids, ["a"])
+        manifest.save()
+
+        loaded = IndexManifest.load(self.path)
+        self.assertTrue(loaded.is_file_current("faqs.md", content_hash("a")))
+        self.assertEqual(loaded.remove_file("faqs.md"), ids)
+        self.assertEqual(loaded.chunk_count, 0)
+
+    def test_load_missing_manifest(self):
+        """Test that a missing manifest loads as empty."""
+        manifest = IndexManifest.load(self.path)
+        self.assertEqual(manifest.chunk_count, 0)
+        self.assertEqual(manifest.files, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
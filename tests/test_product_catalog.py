@@ -0,0 +1,132 @@
+"""Unit tests for the structured product catalog."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import config
+from src.tools import product_catalog
+from src.tools.mock_apis import execute_tool
+from src.tools.product_catalog import (
+    ProductCatalog,
+    catalog_files,
+    get_catalog,
+    normalize_category,
+    parse_markdown_catalog
+)
+
+
+CATALOG_MARKDOWN = """# Product Information
+
+## Electronics
+
+### Laptops
+- **ProBook 15**: Professional laptop. Price: $1299. Warranty: 2 years with optional extended warranty.
+- **UltraBook Air**: Thin and light. Price: $1,599-$1,899. Warranty: 1 year.
+
+### Headphones
+- **AudioMax Pro**: Wireless headphones. Price: $249. Return window: 14 days for electronics.
+
+## Home & Living
+
+### Kitchen Appliances
+- **Coffee Maker Pro**: Programmable. Price: $89.99. Includes 1-year warranty.
+
+## Special Categories
+
+### Limited Edition
+- Limited stock available
+"""
+
+
+class TestProductCatalog(unittest.TestCase):
+    """Test cases for catalog parsing and attribute queries."""
+
+    def setUp(self):
+        self.catalog = ProductCatalog(parse_markdown_catalog(CATALOG_MARKDOWN))
+
+    def test_parse_attributes(self):
+        """Test that prices, warranties and categories are extracted."""
+        products = {product['name']: product for product in parse_markdown_catalog(CATALOG_MARKDOWN)}
+        self.assertEqual(len(products), 4)
+        self.assertEqual(products['UltraBook Air']['price_min'], 1599.0)
+        self.assertEqual(products['UltraBook Air']['price_max'], 1899.0)
+        self.assertEqual(products['ProBook 15']['warranty_months'], 24.0)
+        self.assertEqual(products['Coffee Maker Pro']['warranty_months'], 12.0)
+        self.assertEqual(products['AudioMax Pro']['return_window_days'], 14)
+        self.assertEqual(products['Coffee Maker Pro']['subcategory'], "Kitchen Appliances")
+
+    def test_category_and_price_query(self):
+        """Test "laptops under $1500"."""
+        results = self.catalog.query(category="laptop", max_price=1500)
+        self.assertEqual([product['name'] for product in results], ["ProBook 15"])
+
+    def test_price_range_overlap_and_order(self):
+        """Test that a price range matches if any of its prices does, cheapest first."""
+        results = self.catalog.query(min_price=1700)
+        self.assertEqual([product['name'] for product in results], ["UltraBook Air"])
+        results = self.catalog.query(category="Electronics")
+        self.assertEqual(
+            [product['name'] for product in results],
+            ["AudioMax Pro", "ProBook 15", "UltraBook Air"]
+        )
+
+    def test_return_window_defaults_to_policy(self):
+        """Test explicit and policy-derived return windows."""
+        results = self.catalog.query(return_window_days=14)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(self.catalog.query(category="kitchen")[0]['return_window_days'], 30)
+
+    def test_search_products_tool(self):
+        """Test the tool against the shipped catalog."""
+        result = execute_tool("search_products", {"category": "headphones", "return_window_days": 14})
+        self.assertTrue(result["success"])
+        self.assertEqual(result["products"][0]["name"], "AudioMax Pro")
+
+        result = execute_tool("search_products", {"category": "toys"})
+        self.assertEqual(result["count"], 0)
+        self.assertIn("Laptops", result["available_categories"])
+
+    def test_plural_categories_match_singular_queries(self):
+        """Test that queries and headings share one singular form, including "-ies" and "-es" plurals."""
+        catalog = ProductCatalog(parse_markdown_catalog(
+            "## Clothing & Apparel\n\n### Accessories\n- **Leather Belt**: Belt. Price: $40.\n\n"
+            "### Watches\n- **Field Watch**: Watch. Price: $120.\n"
+        ))
+        for query in ("Accessories", "accessory", "accessories"):
+            self.assertEqual([product["name"] for product in catalog.query(category=query)], ["Leather Belt"])
+        self.assertEqual([product["name"] for product in catalog.query(category="watch")], ["Field Watch"])
+        self.assertEqual(normalize_category("Men's Collection"), "men's collection")
+        self.assertEqual(normalize_category("Glasses"), "glass")
+
+    def test_catalog_files_come_from_config(self):
+        """Test that relative catalog names are read from the knowledge base directory."""
+        with mock.patch.object(config.Config, "KNOWLEDGE_BASE_DIR", "/srv/kb"), \
+                mock.patch.object(config.Config, "CATALOG_FILES", "products.md, /data/extra.csv"):
+            self.assertEqual(catalog_files(), [os.path.join("/srv/kb", "products.md"), "/data/extra.csv"])
+
+    def test_catalog_reloads_when_file_changes(self):
+        """Test that the shared catalog follows edits to its file and survives it going missing."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "products.md")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(CATALOG_MARKDOWN)
+            with mock.patch.object(config.Config, "CATALOG_FILES", path), \
+                    mock.patch.object(product_catalog, "_catalog", None), \
+                    mock.patch.object(product_catalog, "_catalog_signature", None):
+                catalog = get_catalog()
+                self.assertIs(get_catalog(), catalog)
+                self.assertEqual(len(catalog), 4)
+
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("- **Gift Card**: Digital gift card. Price: $50.\n")
+                reloaded = get_catalog()
+                self.assertIsNot(reloaded, catalog)
+                self.assertEqual(reloaded.query(name="gift card")[0]["price_min"], 50.0)
+
+                os.remove(path)
+                self.assertIs(get_catalog(), reloaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
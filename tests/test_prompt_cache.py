@@ -0,0 +1,97 @@
+"""Unit tests for canonical tool schemas and prompt cache accounting."""
+import json
+import unittest
+from types import SimpleNamespace
+
+from fakes import make_assistant
+from src.assistant.prompt_cache import canonical_tools, new_turn_usage, PromptCacheStats
+from src.tools.mock_apis import TOOL_DEFINITIONS
+
+
+def _usage(prompt_tokens, cached_tokens):
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens)
+    )
+
+
+class TestCanonicalTools(unittest.TestCase):
+    """Test cases for byte-stable tool schemas."""
+
+    def test_key_order_does_not_change_serialization(self):
+        """Test that schemas written in any key order serialize to the same bytes."""
+        reordered = json.loads(json.dumps(TOOL_DEFINITIONS), object_pairs_hook=lambda pairs: dict(reversed(pairs)))
+        self.assertEqual(json.dumps(canonical_tools(reordered)), json.dumps(canonical_tools(TOOL_DEFINITIONS)))
+        self.assertEqual(canonical_tools(TOOL_DEFINITIONS), TOOL_DEFINITIONS)
+
+    def test_returns_a_copy(self):
+        """Test that changing the canonical copy leaves the definitions alone."""
+        tools = canonical_tools(TOOL_DEFINITIONS)
+        tools[0]["function"]["name"] = "changed"
+        self.assertNotEqual(TOOL_DEFINITIONS[0]["function"]["name"], "changed")
+
+
+class TestPromptCacheStats(unittest.TestCase):
+    """Test cases for per-turn and total cached-token counts."""
+
+    def test_record(self):
+        """Test that usage adds up per turn and in the totals, skipping missing usage."""
+        stats = PromptCacheStats()
+        turn = new_turn_usage()
+        stats.record(turn, _usage(1500, 1024))
+        stats.record(turn, _usage(1600, 1536))
+        stats.record(turn, None)
+        self.assertEqual(turn["prompt_tokens"], 3100)
+        self.assertEqual(turn["cached_tokens"], 2560)
+        self.assertEqual(len(turn["requests"]), 2)
+        self.assertEqual(stats.stats()["requests"], 2)
+        self.assertAlmostEqual(stats.stats()["cache_hit_ratio"], 2560 / 3100)
+
+    def test_usage_without_cache_details(self):
+        """Test that usage without prompt token details counts as uncached."""
+        stats = PromptCacheStats()
+        turn = new_turn_usage()
+        stats.record(turn, SimpleNamespace(prompt_tokens=500, prompt_tokens_details=None))
+        self.assertEqual(turn["cached_tokens"], 0)
+        self.assertEqual(stats.stats()["cache_hit_ratio"], 0.0)
+
+
+class TestPromptLayout(unittest.TestCase):
+    """Test cases for the message order built by the assistant for each turn."""
+
+    def test_prefix_bytes_are_stable_across_turns(self):
+        """Test that system prompt, tools and older history serialize identically in consecutive turns."""
+        assistant, _ = make_assistant()
+        conversation = "layout"
+        assistant.conversations.append(
+            conversation,
+            {"role": "user", "content": "Hi, I ordered a laptop last week."},
+            {"role": "assistant", "content": "Happy to help with your laptop order."}
+        )
+
+        requests = []
+        for question, context in (
+            ("How long does shipping take?", "Standard shipping takes 5-7 business days."),
+            ("Can I return it?", "Electronics can be returned within 14 days."),
+        ):
+            older = assistant.conversations.get_history(conversation)
+            messages, _, _ = assistant._prepare_turn(question, conversation, {"text": context, "tokens": 10})
+            # System prompt, older history, this turn's context, then the latest user message
+            self.assertEqual(messages[0], {"role": "system", "content": assistant.system_prompt})
+            self.assertEqual(messages[1:len(older) + 1], older)
+            self.assertIn(context, messages[-2]["content"])
+            self.assertEqual(messages[-1], {"role": "user", "content": question})
+            requests.append(assistant._completion_args(messages, "auto"))
+            assistant.conversations.append(conversation, {"role": "assistant", "content": f"Answer to {question}"})
+
+        def prefix(args, count):
+            return json.dumps([args["tools"], args["messages"][:count]], ensure_ascii=False).encode()
+
+        # Everything the first request sent before its turn context is resent byte for byte
+        stable = len(requests[0]["messages"]) - 2
+        self.assertEqual(prefix(requests[1], stable), prefix(requests[0], stable))
+        self.assertEqual(requests[1]["messages"][stable], requests[0]["messages"][-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
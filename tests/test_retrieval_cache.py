@@ -0,0 +1,46 @@
+"""Unit tests for the exact and semantic retrieval caches."""
+import time
+import unittest
+from src.rag.retrieval_cache import SemanticCache, TTLCache, normalize_query
+
+
+class TestRetrievalCache(unittest.TestCase):
+    """Test cases for query normalization, LRU/TTL eviction and semantic lookup."""
+
+    def test_normalize_query(self):
+        """Test that trivially different phrasings normalize the same."""
+        self.assertEqual(normalize_query("What's your return policy?"), "what is your return policy")
+        self.assertEqual(normalize_query("  WHAT is your  return policy "), "what is your return policy")
+
+    def test_lru_eviction_and_counters(self):
+        """Test that the least recently used entry is evicted."""
+        cache = TTLCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 1, "size": 2})
+
+    def test_ttl_expiry(self):
+        """Test that expired entries are misses."""
+        cache = TTLCache(ttl_seconds=0.01)
+        cache.put("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_semantic_hit_within_threshold(self):
+        """Test reuse for near-identical embeddings in the same namespace."""
+        cache = SemanticCache(threshold=0.95)
+        cache.put([1.0, 0.0, 0.0], "results", namespace=3)
+        self.assertEqual(cache.get([0.99, 0.05, 0.0], namespace=3), "results")
+        self.assertIsNone(cache.get([0.99, 0.05, 0.0], namespace=5))
+        self.assertIsNone(cache.get([0.5, 0.5, 0.0], namespace=3))
+        cache.clear()
+        self.assertIsNone(cache.get([1.0, 0.0, 0.0], namespace=3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Unit tests for the versioned index snapshot layout."""
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from src.rag.snapshot import (
+    list_versions,
+    load_snapshot_info,
+    new_version_name,
+    prune_versions,
+    read_current,
+    write_current,
+    write_snapshot_info,
+)
+
+
+class TestSnapshotLayout(unittest.TestCase):
+    """Test cases for version directories and the CURRENT pointer."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.base = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _make_versions(self, count):
+        versions = [new_version_name("snap") for _ in range(count)]
+        for version in versions:
+            os.makedirs(os.path.join(self.base, version))
+        return versions
+
+    def test_version_names_sort_chronologically(self):
+        """Test that later versions sort after earlier ones."""
+        versions = self._make_versions(5)
+        self.assertEqual(list_versions(self.base), versions)
+
+    def test_current_pointer(self):
+        """Test that CURRENT only resolves to existing versions."""
+        self.assertIsNone(read_current(self.base))
+        version = self._make_versions(1)[0]
+        write_current(self.base, version)
+        self.assertEqual(read_current(self.base), version)
+
+        write_current(self.base, "missing")
+        self.assertIsNone(read_current(self.base))
+
+    def test_snapshot_info_roundtrip(self):
+        """Test that incomplete snapshots have no info."""
+        version = self._make_versions(1)[0]
+        directory = os.path.join(self.base, version)
+        self.assertIsNone(load_snapshot_info(directory))
+
+        write_snapshot_info(directory, {"backend": "flat", "chunk_count": 3})
+        self.assertEqual(load_snapshot_info(directory)["chunk_count"], 3)
+
+    def test_prune_keeps_newest_and_current(self):
+        """Test that pruning never removes the served version."""
+        versions = self._make_versions(4)
+        write_current(self.base, versions[0])
+
+        removed = prune_versions(self.base, keep=2)
+        self.assertEqual(removed, versions[1:2])
+        self.assertEqual(list_versions(self.base), [versions[0]] + versions[2:])
+
+
+    def test_prune_waits_for_grace_period(self):
+        """Test that a version is only removed once its successor is older than the grace period."""
+        now = datetime.now()
+        versions = [
+            f"gen-{(now - timedelta(minutes=minutes)).strftime('%Y%m%d%H%M%S%f')}-abcdef"
+            for minutes in (120, 90, 5, 1)
+        ]
+        for version in versions:
+            os.makedirs(os.path.join(self.base, version))
+        os.makedirs(os.path.join(self.base, "legacy"))
+        write_current(self.base, versions[3])
+
+        removed = prune_versions(self.base, keep=2, grace_seconds=600, prefix="gen-")
+        # versions[1] was superseded only 5 minutes ago
+        self.assertEqual(removed, versions[:1])
+        self.assertEqual(list_versions(self.base), versions[1:] + ["legacy"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""Unit tests for the SQLite-backed conversation store."""
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from src.assistant.sqlite_conversation_store import (
+    SQLiteConversationStore,
+    decode_message,
+    encode_message,
+)
+
+
+def _message(i, size=10):
+    return {"role": "user", "content": f"message {i} " + "x" * size}
+
+
+class TestSQLiteConversationStore(unittest.TestCase):
+    """Test cases for sharing, batching and expiry."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "sessions.sqlite3")
+        self.stores = []
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        self.tmpdir.cleanup()
+
+    def _store(self, **kwargs):
+        store = SQLiteConversationStore(self.path, **kwargs)
+        self.stores.append(store)
+        return store
+
+    def test_encoding_round_trip(self):
+        """Test that messages survive encoding, with large ones compressed."""
+        for message in (_message(1), _message(2, size=5000), {"role": "assistant", "content": "héllo"}):
+            self.assertEqual(decode_message(*encode_message(message)), message)
+        self.assertEqual(encode_message(_message(2, size=5000))[1], 1)
+
+    def test_conversations_are_shared_between_stores(self):
+        """Test that stores on one database see each other's messages."""
+        worker_a, worker_b = self._store(), self._store()
+        worker_a.append("a", _message(1))
+        worker_b.append("a", _message(2))
+        worker_b.append("b", _message(3))
+
+        self.assertEqual(worker_a.get_history("a"), [_message(1), _message(2)])
+        self.assertEqual(worker_a.get_history("b"), [_message(3)])
+        self.assertEqual(len(worker_a), 2)
+
+    def test_turn_is_written_when_lock_is_released(self):
+        """Test that a turn's messages reach other workers when its lock is released."""
+        worker_a, worker_b = self._store(), self._store()
+        with worker_a.lock("a"):
+            worker_a.append("a", _message(1))
+            worker_a.append("a", _message(2))
+            self.assertEqual(len(worker_a.get_history("a")), 2)
+            self.assertEqual(worker_b.get_history("a"), [])
+        self.assertEqual(worker_b.get_history("a"), [_message(1), _message(2)])
+
+    def test_different_conversations_run_turns_concurrently(self):
+        """Test that a long turn does not block another conversation's turn."""
+        store = self._store()
+        holding, release = threading.Event(), threading.Event()
+
+        def long_turn():
+            with store.lock("a"):
+                holding.set()
+                release.wait(5)
+
+        turn = threading.Thread(target=long_turn)
+        turn.start()
+        holding.wait(5)
+        try:
+            # No other conversation waits for "a", whatever its ID
+            others_done = threading.Event()
+
+            def other_turns():
+                for i in range(500):
+                    with store.lock(f"conversation-{i}"):
+                        store.append(f"conversation-{i}", _message(i))
+                others_done.set()
+
+            threading.Thread(target=other_turns, daemon=True).start()
+            self.assertTrue(others_done.wait(5))
+
+            # A second turn of "a" still waits
+            same_done = threading.Event()
+
+            def same_turn():
+                with store.lock("a"):
+                    same_done.set()
+
+            threading.Thread(target=same_turn, daemon=True).start()
+            self.assertFalse(same_done.wait(0.2))
+        finally:
+            release.set()
+            turn.join()
+        self.assertTrue(same_done.wait(5))
+
+    def test_message_cap_drops_oldest(self):
+        """Test that the oldest messages are dropped beyond the cap."""
+        store = self._store(max_messages=3)
+        for i in range(5):
+            store.append("a", _message(i))
+        self.assertEqual(store.get_history("a"), [_message(2), _message(3), _message(4)])
+
+    def test_idle_sessions_expire_and_are_purged(self):
+        """Test that idle conversations are hidden and then deleted."""
+        store = self._store(ttl_seconds=60, purge_interval=0)
+        with mock.patch("src.assistant.sqlite_conversation_store.time.time", return_value=1000.0):
+            store.append("a", _message(1))
+        with mock.patch("src.assistant.sqlite_conversation_store.time.time", return_value=1070.0):
+            self.assertEqual(store.get_history("a"), [])
+            store.append("b", _message(2))
+            self.assertEqual(len(store), 1)
+            self.assertEqual(store.stats()["evictions"], 1)
+
+    def test_least_recently_used_sessions_are_evicted(self):
+        """Test that the least recently used conversations are deleted when full."""
+        store = self._store(max_sessions=2, purge_interval=0)
+        for i, conversation_id in enumerate(("a", "b", "c")):
+            with mock.patch("src.assistant.sqlite_conversation_store.time.time", return_value=1000.0 + i):
+                store.append(conversation_id, _message(i))
+
+        with mock.patch("src.assistant.sqlite_conversation_store.time.time", return_value=1010.0):
+            self.assertEqual(store.get_history("a"), [])
+            self.assertEqual(store.get_history("c"), [_message(2)])
+            self.assertEqual(len(store), 2)
+
+    def test_reset_only_affects_one_conversation(self):
+        """Test that resetting a conversation leaves the others alone."""
+        store = self._store()
+        store.append("a", _message(1))
+        store.append("b", _message(2))
+        store.reset("a")
+
+        self.assertEqual(store.get_history("a"), [])
+        self.assertEqual(store.get_history("b"), [_message(2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
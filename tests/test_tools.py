@@ -1,6 +1,13 @@
 """Unit tests for mock API tools."""
+import asyncio
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 from src.tools.mock_apis import (
+    TOOL_FUNCTIONS,
+    aexecute_tools,
+    execute_tools,
     get_order_status,
     create_return_request,
     get_refund_policy,
@@ -45,6 +52,93 @@ class TestMockAPIs(unittest.TestCase):
         self.assertIn("error", result)
 
 
+
+class TestExecuteTools(unittest.TestCase):
+    """Test cases for running several tool calls concurrently."""
+    
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+    
+    def tearDown(self):
+        self.executor.shutdown(wait=False)
+    
+    def test_results_keep_call_order(self):
+        """Test that results come back in the order of the calls."""
+        results = execute_tools(
+            [("get_order_status", {"order_id": "ORD-12345"}),
+             ("get_refund_policy", {}),
+             ("get_order_status", {"order_id": "ORD-67890"})],
+            self.executor,
+            timeout=5
+        )
+        self.assertEqual(results[0]["order_id"], "ORD-12345")
+        self.assertIn("policy", results[1])
+        self.assertEqual(results[2]["order_id"], "ORD-67890")
+    
+    def test_calls_run_concurrently(self):
+        """Test that the batch takes as long as the slowest call, not the sum."""
+        def slow_tool(delay):
+            time.sleep(delay)
+            return {"success": True, "delay": delay}
+        
+        with mock.patch.dict(TOOL_FUNCTIONS, {"slow_tool": slow_tool}):
+            start = time.monotonic()
+            results = execute_tools([("slow_tool", {"delay": 0.2})] * 3, self.executor, timeout=5)
+            elapsed = time.monotonic() - start
+        
+        self.assertTrue(all(result["success"] for result in results))
+        self.assertLess(elapsed, 0.5)
+    
+    def test_slow_call_times_out(self):
+        """Test that a call over the timeout gets an error and the others still return."""
+        def slow_tool(delay):
+            time.sleep(delay)
+            return {"success": True}
+        
+        with mock.patch.dict(TOOL_FUNCTIONS, {"slow_tool": slow_tool}):
+            results = execute_tools(
+                [("slow_tool", {"delay": 1}), ("get_refund_policy", {})],
+                self.executor,
+                timeout=0.1
+            )
+        
+        self.assertFalse(results[0]["success"])
+        self.assertIn("timed out", results[0]["error"])
+        self.assertTrue(results[1]["success"])
+    
+    def test_queued_calls_do_not_time_out(self):
+        """Test that time spent waiting for a worker does not count against a call's timeout."""
+        def slow_tool(delay):
+            time.sleep(delay)
+            return {"success": True}
+        
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown, wait=False)
+        calls = [("slow_tool", {"delay": 0.15})] * 3
+        with mock.patch.dict(TOOL_FUNCTIONS, {"slow_tool": slow_tool}):
+            results = execute_tools(calls, executor, timeout=0.3)
+            async_results = asyncio.run(aexecute_tools(calls, executor, timeout=0.3))
+        
+        self.assertTrue(all(result["success"] for result in results), results)
+        self.assertTrue(all(result["success"] for result in async_results), async_results)
+    
+    def test_async_slow_call_times_out(self):
+        """Test that the async variant reports a call over the timeout as an error."""
+        def slow_tool(delay):
+            time.sleep(delay)
+            return {"success": True}
+        
+        with mock.patch.dict(TOOL_FUNCTIONS, {"slow_tool": slow_tool}):
+            results = asyncio.run(aexecute_tools(
+                [("slow_tool", {"delay": 0.5}), ("get_refund_policy", {})],
+                self.executor,
+                timeout=0.1
+            ))
+        
+        self.assertIn("timed out", results[0]["error"])
+        self.assertTrue(results[1]["success"])
+
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -0,0 +1,334 @@
+"""Unit tests for the vector store: reloads, the watcher and batched search."""
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+
+import config
+from src.rag import vector_store
+from src.rag.snapshot import list_versions, read_current
+from src.rag.vector_store import VectorStore
+
+KNOWLEDGE_BASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "knowledge_base")
+
+
+class FakeEmbeddings:
+    """Bag-of-words hashing embedder that counts the texts it embeds."""
+
+    def __init__(self):
+        self.embedded = []
+        self.fail = False
+        self._lock = threading.Lock()
+
+    def _vector(self, text):
+        vector = np.zeros(64)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        if self.fail:
+            raise RuntimeError("embedding API unavailable")
+        with self._lock:
+            self.embedded.extend(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class VectorStoreTestCase(unittest.TestCase):
+    """Builds a flat index over a private copy of the knowledge base."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.kb_dir = os.path.join(self.tmpdir.name, "knowledge_base")
+        shutil.copytree(KNOWLEDGE_BASE, self.kb_dir)
+        self.index_dir = os.path.join(self.tmpdir.name, "flat")
+        self.embeddings = FakeEmbeddings()
+
+        settings = {
+            "KNOWLEDGE_BASE_DIR": self.kb_dir,
+            "INDEX_BACKEND": "flat",
+            "FLAT_INDEX_DIR": self.index_dir,
+            "INDEX_SNAPSHOT_DIR": "",
+            "INDEX_PRECISION": "float32",
+            "SIMILARITY_THRESHOLD": 0.0,
+            "INDEX_GENERATION_GRACE_SECONDS": 0,
+        }
+        for name, value in settings.items():
+            patcher = mock.patch.object(config.Config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(vector_store, "create_embeddings", lambda: (self.embeddings, "fake"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.store = VectorStore()
+        self.addCleanup(self._stop_watcher)
+        self.embeddings.embedded.clear()
+
+    def _stop_watcher(self):
+        self.store.stop_watcher()
+        # Let a reload the watcher started finish before the directories go
+        with self.store._reload_lock:
+            pass
+
+    def _edit(self, name="faqs.md", text="\n\n## Gift Cards\n\nGift cards never expire and can be used on any order.\n"):
+        with open(os.path.join(self.kb_dir, name), "a", encoding="utf-8") as f:
+            f.write(text)
+
+
+class TestReload(VectorStoreTestCase):
+    """Test cases for rebuilding and swapping the index."""
+
+    def test_reload_embeds_only_changed_chunks(self):
+        """Test that a knowledge base edit re-embeds only the new chunks and changes the version."""
+        version, content_version = self.store.version, self.store.content_version
+        self._edit()
+        self.assertTrue(self.store.reload())
+
+        self.assertTrue(self.embeddings.embedded)
+        self.assertTrue(all("Gift cards never expire" in text for text in self.embeddings.embedded))
+        self.assertNotEqual(self.store.version, version)
+        self.assertNotEqual(self.store.content_version, content_version)
+        self.assertIsNone(self.store.last_reload_error)
+
+    def test_reload_without_changes_does_nothing(self):
+        """Test that reloading unchanged files neither embeds nor swaps."""
+        version = self.store.version
+        self.assertFalse(self.store.reload())
+        self.assertEqual(self.store.version, version)
+        self.assertEqual(self.embeddings.embedded, [])
+
+    def test_state_captured_before_swap_stays_searchable(self):
+        """Test that a search holding the old state finishes on it after the swap."""
+        old_state = self.store._state
+        query_vector = self.embeddings.embed_query("return policy")
+        self._edit()
+        self.assertTrue(self.store.reload())
+
+        self.assertIsNot(self.store._state, old_state)
+        self.assertTrue(old_state.index.query_many([query_vector], 3)[0])
+        self.assertFalse(any("Gift cards" in chunk["content"] for chunk in old_state.chunks.values()))
+        self.assertTrue(any("Gift cards" in chunk["content"] for chunk in self.store.chunks.values()))
+
+    def test_reload_clears_retrieval_caches(self):
+        """Test that cached results of the old index are not served after a reload."""
+        self.store.search("Do gift cards expire?")
+        self.assertGreater(len(self.store.query_cache), 0)
+        self._edit()
+        self.assertTrue(self.store.reload())
+
+        self.assertEqual(len(self.store.query_cache), 0)
+        self.assertEqual(len(self.store.semantic_cache), 0)
+        results = self.store.search("Do gift cards expire?")
+        self.assertIn("Gift cards never expire", results[0]["content"])
+
+    def test_failed_reload_keeps_old_state_in_service(self):
+        """Test that a reload that fails leaves the served index and its directory untouched."""
+        version, state = self.store.version, self.store._state
+        self.embeddings.fail = True
+        self._edit()
+        self.assertFalse(self.store.reload())
+
+        self.assertIs(self.store._state, state)
+        self.assertEqual(self.store.version, version)
+        self.assertEqual(self.store.last_reload_error, "embedding API unavailable")
+        self.assertEqual(list_versions(self.index_dir), [version])
+        self.embeddings.fail = False
+        self.assertTrue(self.store.search("How do I return an item?"))
+
+    def test_searches_during_reload_never_fail(self):
+        """Test that searches running while a reload swaps the index always get results."""
+        failures = []
+        stop = threading.Event()
+
+        def search():
+            while not stop.is_set():
+                # Keep the caches empty, so every search reads the index
+                self.store.invalidate_caches()
+                if not self.store.search("How do I return an item?"):
+                    failures.append(True)
+
+        searchers = [threading.Thread(target=search) for _ in range(4)]
+        for searcher in searchers:
+            searcher.start()
+        try:
+            for i in range(3):
+                self._edit(text=f"\n\n## Note {i}\n\nNote number {i}.\n")
+                self.assertTrue(self.store.reload())
+        finally:
+            stop.set()
+            for searcher in searchers:
+                searcher.join()
+        self.assertEqual(failures, [])
+
+    def test_watcher_retries_a_failed_reload(self):
+        """Test that a change whose reload failed is retried on the next poll."""
+        self.embeddings.fail = True
+        version = self.store.version
+        self.store.start_watcher(0.05)
+        time.sleep(0.2)
+        self._edit()
+        self.assertTrue(_wait_for(lambda: self.store.last_reload_error is not None))
+        self.assertEqual(self.store.version, version)
+
+        # The change is picked up once embedding works again, with no further edits
+        self.embeddings.fail = False
+        self.assertTrue(_wait_for(lambda: self.store.version != version and self.store.last_reload_error is None))
+        self.assertTrue(any("Gift cards never expire" in text for text in self.embeddings.embedded))
+
+
+    def test_reloads_keep_two_generations(self):
+        """Test that repeated reloads keep only the current generation and its predecessor."""
+        versions = [self.store.version]
+        for i in range(3):
+            self._edit(text=f"\n\n## Note {i}\n\nNote number {i}.\n")
+            self.assertTrue(self.store.reload())
+            versions.append(self.store.version)
+        self.assertEqual(list_versions(self.index_dir), versions[-2:])
+
+    def test_startup_removes_generations_left_by_earlier_runs(self):
+        """Test that generations from earlier runs are collected at startup, after the grace period."""
+        current = self.store.version
+        old = [
+            f"gen-{(datetime.now() - timedelta(hours=hours)).strftime('%Y%m%d%H%M%S%f')}-abcdef"
+            for hours in (3, 2)
+        ]
+        for version in old:
+            shutil.copytree(os.path.join(self.index_dir, current), os.path.join(self.index_dir, version))
+
+        with mock.patch.object(config.Config, "INDEX_GENERATION_GRACE_SECONDS", 600):
+            restarted = VectorStore()
+        self.assertEqual(read_current(self.index_dir), current)
+        self.assertEqual(restarted.version, current)
+        # The newest old one is the current generation's predecessor
+        self.assertEqual(list_versions(self.index_dir), [old[1], current])
+
+
+class TestSearchMany(VectorStoreTestCase):
+    """Test cases for batched and async search."""
+
+    def _fresh(self, query):
+        """Result of searching one query against empty caches."""
+        self.store.invalidate_caches()
+        return self.store.search(query)
+
+    def assertSameResults(self, actual, expected):
+        """Compare result lists; batched scoring may differ from single queries in the last bits."""
+        self.assertEqual(len(actual), len(expected))
+        for actual_results, expected_results in zip(actual, expected):
+            self.assertEqual(
+                [(r["content"], r["metadata"]) for r in actual_results],
+                [(r["content"], r["metadata"]) for r in expected_results]
+            )
+            for actual_result, expected_result in zip(actual_results, expected_results):
+                if expected_result["score"] is None:
+                    self.assertIsNone(actual_result["score"])
+                else:
+                    self.assertAlmostEqual(actual_result["score"], expected_result["score"], places=5)
+
+    def test_repeated_queries_are_searched_once(self):
+        """Test that queries equal after normalization share one embedding and one result."""
+        queries = ["How do I return an item?", "how do I return an item", "How do I return an item?"]
+        results = self.store.search_many(queries)
+
+        self.assertEqual(self.embeddings.embedded, ["How do I return an item?"])
+        self.assertTrue(results[0])
+        self.assertEqual(results[1], results[0])
+        self.assertEqual(results[2], results[0])
+        # Every caller gets its own copies
+        self.assertIsNot(results[1][0], results[0][0])
+
+    def test_mixed_paths_keep_input_order(self):
+        """Test that cache hits, keyword fast path hits and embedded queries come back in input order."""
+        cached, keyword, first, second = (
+            "Do gift cards expire?", "Leather Wallet RFID", "How do I return an item?", "How long does shipping take?"
+        )
+        expected = {query: self._fresh(query) for query in (cached, keyword, first, second)}
+
+        self.store.invalidate_caches()
+        self.store.search(cached)
+        self.embeddings.embedded.clear()
+        queries = [first, cached, keyword, second, first]
+        results = self.store.search_many(queries)
+
+        # Only the two uncached, non-keyword queries are embedded, in one batch
+        self.assertEqual(self.embeddings.embedded, [first, second])
+        self.assertSameResults(results, [expected[query] for query in queries])
+        self.assertIsNone(results[2][0]["score"])
+
+    def test_asearch_matches_search(self):
+        """Test that the async variants return what the sync ones do."""
+        queries = ["How do I return an item?", "Leather Wallet RFID", "Do gift cards expire?"]
+        expected = [self._fresh(query) for query in queries]
+        self.store.invalidate_caches()
+
+        async def search_all():
+            single = [await self.store.asearch(query) for query in queries]
+            return single, await self.store.asearch_many(queries)
+
+        single, batched = asyncio.run(search_all())
+        self.assertEqual(single, expected)
+        self.assertSameResults(batched, expected)
+
+
+class TestAdminReloadEndpoint(VectorStoreTestCase):
+    """Test cases for POST/GET /api/admin/reload."""
+
+    def setUp(self):
+        super().setUp()
+        from fakes import assistant_environment
+        with assistant_environment():
+            from src.ui import app as web_app
+        patcher = mock.patch.object(web_app.assistant, "vector_store", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = web_app.app.test_client()
+
+    def test_requires_admin_token(self):
+        """Test that the endpoint is disabled without a token and rejects a wrong one."""
+        with mock.patch.object(config.Config, "ADMIN_TOKEN", None):
+            self.assertEqual(self.client.post("/api/admin/reload").status_code, 404)
+        with mock.patch.object(config.Config, "ADMIN_TOKEN", "secret"):
+            response = self.client.post("/api/admin/reload", headers={"X-Admin-Token": "wrong"})
+            self.assertEqual(response.status_code, 401)
+
+    def test_reload_runs_in_background(self):
+        """Test that a reload started over HTTP swaps in the edited knowledge base."""
+        version = self.store.version
+        self._edit()
+        headers = {"X-Admin-Token": "secret"}
+        with mock.patch.object(config.Config, "ADMIN_TOKEN", "secret"):
+            response = self.client.post("/api/admin/reload", headers=headers)
+            self.assertEqual(response.status_code, 202)
+            self.assertTrue(response.get_json()["started"])
+            self.assertTrue(_wait_for(lambda: not self.client.get("/api/admin/reload", headers=headers).get_json()["reloading"]))
+            status = self.client.get("/api/admin/reload", headers=headers).get_json()
+        self.assertNotEqual(status["version"], version)
+        self.assertIsNone(status["last_error"])
+
+
+if __name__ == '__main__':
+    unittest.main()